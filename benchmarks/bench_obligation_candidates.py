@@ -0,0 +1,96 @@
+"""
+Obligation candidate extraction: split-then-scan per sentence vs. the single
+combined-regex pass over the whole text, on a synthetic corpus (10 MB by default).
+The sentence index is built once per document and shared with other analyzers,
+so it is timed separately.
+
+Usage (settings need DATABASE_URL and OPENAI_API_KEY to be set, any value works):
+    python -m benchmarks.bench_obligation_candidates --megabytes 10
+"""
+import argparse
+import random
+import re
+import time
+
+from services.extraction_service.sentence_index import SentenceIndex
+from services.obligation_service.rule_engine import (
+    DATE_PATTERNS,
+    OBLIGATION_KEYWORDS,
+    extract_candidates,
+    iter_candidate_spans,
+)
+
+FILLER = [
+    "The parties agree to the terms set out in this schedule.",
+    "Coverage applies to the insured property described above.",
+    "This section describes the claims handling process in detail.",
+    "Definitions used in this policy have the meaning given in section two.",
+    "The insurer will consider each claim on its merits",
+]
+OBLIGATIONS = [
+    "The premium must be paid before 10 March 2026.",
+    "Policy shall be renewed within 30 days.",
+    "The annual fee is due on 2026-01-31.",
+    "Notice of cancellation is required by 04/05/2026.",
+]
+
+
+def _synthetic_corpus(megabytes: float) -> str:
+    rng = random.Random(11)
+    target = int(megabytes * 1024 * 1024)
+    lines = []
+    size = 0
+    while size < target:
+        pool = OBLIGATIONS if rng.random() < 0.05 else FILLER
+        line = " ".join(rng.choice(pool) for _ in range(rng.randint(1, 4)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def _legacy_candidates(text: str) -> list[str]:
+    candidates = []
+    for sentence in re.split(r"[.\n]", text):
+        cleaned = sentence.strip()
+        if not cleaned:
+            continue
+        sentence_lower = cleaned.lower()
+        if any(keyword in sentence_lower for keyword in OBLIGATION_KEYWORDS) or any(
+            re.search(pattern, cleaned, re.IGNORECASE) for pattern in DATE_PATTERNS
+        ):
+            candidates.append(cleaned)
+    return candidates
+
+
+def _time(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = _synthetic_corpus(args.megabytes)
+    legacy_seconds, legacy = _time(lambda: _legacy_candidates(text), args.repeat)
+    index_seconds, index = _time(lambda: SentenceIndex.from_text(text), args.repeat)
+    spans_seconds, spans = _time(lambda: list(iter_candidate_spans(index)), args.repeat)
+    models_seconds, _ = _time(lambda: extract_candidates(text, index=index), args.repeat)
+
+    assert [text[start:end] for start, end in spans] == legacy, "scanner output differs from legacy"
+    print(f"chars={len(text)} sentences={len(index)} candidates={len(legacy)}")
+    print(f"legacy split+scan      {legacy_seconds:7.3f}s")
+    print(f"sentence index build   {index_seconds:7.3f}s  (shared by all analyzers)")
+    print(f"single-pass spans      {spans_seconds:7.3f}s  speedup={legacy_seconds / spans_seconds:5.1f}x")
+    print(f"extract_candidates     {models_seconds:7.3f}s  speedup={legacy_seconds / models_seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
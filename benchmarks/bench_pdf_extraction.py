@@ -0,0 +1,70 @@
+"""
+PDF extraction throughput at 1, 2, 4 and 8 processes.
+
+Usage (settings need DATABASE_URL and OPENAI_API_KEY to be set, any value works):
+    python -m benchmarks.bench_pdf_extraction --pages 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from services.ingestion_service.parser_service import (
+    _extract_pdf_parallel,
+    _iter_pdf_pages,
+    _pdf_page_count,
+)
+
+CLAUSE = (
+    "The insured shall pay the premium within 30 days of the invoice date. "
+    "This agreement renews automatically unless terminated in writing. "
+)
+
+
+def _build_synthetic_pdf(path: str, pages: int):
+    import fitz
+
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        body = f"Page {page_number + 1}\n" + CLAUSE * 20
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), body, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def _time_extraction(path: str, page_count: int, processes: int) -> float:
+    started = time.perf_counter()
+    if processes == 1:
+        text = "".join(page_text for _, page_text in _iter_pdf_pages(path))
+    else:
+        text = _extract_pdf_parallel(path, page_count, processes)
+    elapsed = time.perf_counter() - started
+    assert text
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "synthetic.pdf")
+        _build_synthetic_pdf(path, args.pages)
+        page_count = _pdf_page_count(path)
+
+        print(f"pages={page_count} cpus={os.cpu_count()}")
+        baseline = None
+        for processes in args.processes:
+            elapsed = _time_extraction(path, page_count, processes)
+            baseline = baseline or elapsed
+            print(
+                f"processes={processes:<2} seconds={elapsed:7.3f} "
+                f"pages/s={page_count / elapsed:9.1f} speedup={baseline / elapsed:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
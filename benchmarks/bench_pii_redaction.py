@@ -0,0 +1,127 @@
+"""
+PII redaction: the four sequential re.sub passes vs. the single-pass engine, on
+prose and on digit-heavy exports (CSV, fixed-width columns padded with spaces,
+and adversarial digit/separator runs). Both engines must produce identical text
+and placeholders.
+
+Usage (settings need DATABASE_URL and OPENAI_API_KEY to be set, any value works):
+    python -m benchmarks.bench_pii_redaction --megabytes 5
+"""
+import argparse
+import random
+import re
+import time
+
+from services.privacy_service.pii_redactor import (
+    CARD_PATTERN,
+    EMAIL_PATTERN,
+    PHONE_PATTERN,
+    SSN_PATTERN,
+    _apply_redactions,
+    _build_tokenizer,
+    _luhn_valid,
+)
+
+PROSE = [
+    "The insured party agrees to notify the insurer within 30 days of any claim.",
+    "Contact john.doe@example.com or call 415-555-1234 for support.",
+    "Premium payments are due on the first business day of each month.",
+    "SSN on file: 123-45-6789. Card ending 4111 1111 1111 1111 was charged.",
+]
+
+
+def _prose(size: int, rng: random.Random) -> str:
+    parts, total = [], 0
+    while total < size:
+        line = rng.choice(PROSE)
+        parts.append(line)
+        total += len(line) + 1
+    return "\n".join(parts)
+
+
+def _csv_export(size: int, rng: random.Random) -> str:
+    rows, total = [], 0
+    while total < size:
+        cells = [str(rng.randint(0, 99999)) for _ in range(8)]
+        if rng.random() < 0.05:
+            cells.append("4111 1111 1111 1111")
+        if rng.random() < 0.05:
+            cells.append(f"{rng.randint(200, 999)} 555 {rng.randint(1000, 9999)}")
+        row = " ".join(cells)
+        rows.append(row)
+        total += len(row) + 1
+    return "\n".join(rows)
+
+
+def _fixed_width_export(size: int, rng: random.Random) -> str:
+    # Right-aligned numeric columns: long space runs between short digit blocks.
+    rows, total = [], 0
+    while total < size:
+        row = " ".join(f"{rng.randint(0, 99999):>12}" for _ in range(8)) + "  ACME Ltd"
+        rows.append(row)
+        total += len(row) + 1
+    return "\n".join(rows)
+
+
+def _adversarial_runs(size: int, rng: random.Random) -> str:
+    # Space/hyphen separated digits with no boundary-friendly break: every digit
+    # is a possible card start and no card ever completes.
+    rows, total = [], 0
+    while total < size:
+        row = " - ".join(str(rng.randint(0, 9)) for _ in range(rng.randint(10, 12))) + "x "
+        rows.append(row * 50)
+        total += len(row) * 50 + 1
+    return "\n".join(rows)
+
+
+def _legacy_redact(text: str):
+    redactions: list[dict] = []
+    tokenize = _build_tokenizer(redactions)
+    redacted = EMAIL_PATTERN.sub(lambda m: tokenize("EMAIL", m.group(0)), text)
+    redacted = SSN_PATTERN.sub(lambda m: tokenize("SSN", m.group(0)), redacted)
+    redacted = PHONE_PATTERN.sub(lambda m: tokenize("PHONE", m.group(0)), redacted)
+
+    def _card(match):
+        raw = match.group(0)
+        return tokenize("CARD", raw) if _luhn_valid(re.sub(r"\D", "", raw)) else raw
+
+    return CARD_PATTERN.sub(_card, redacted), redactions
+
+
+def _single_pass_redact(text: str):
+    redactions: list[dict] = []
+    return _apply_redactions(text, _build_tokenizer(redactions), redactions), redactions
+
+
+def _time(fn) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=5)
+    args = parser.parse_args()
+
+    size = int(args.megabytes * 1024 * 1024)
+    rng = random.Random(5)
+    corpora = {
+        "prose": _prose(size, rng),
+        "csv export": _csv_export(size, rng),
+        "fixed-width": _fixed_width_export(size, rng),
+        "adversarial runs": _adversarial_runs(size, rng),
+    }
+    for name, text in corpora.items():
+        legacy_seconds, legacy = _time(lambda: _legacy_redact(text))
+        single_seconds, single = _time(lambda: _single_pass_redact(text))
+        assert legacy == single, f"{name}: single-pass output differs from the sequential passes"
+        print(
+            f"{name:<17} chars={len(text):<9} redactions={len(single[1]):<6} "
+            f"sequential={legacy_seconds:7.3f}s single-pass={single_seconds:7.3f}s "
+            f"speedup={legacy_seconds / single_seconds:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Windowed PII redaction of a large CSV export at 1, 2, 4 and 8 processes,
+against the single-pass redactor on the whole string. Every run must produce
+the same text and placeholders.
+
+Usage (settings need DATABASE_URL and OPENAI_API_KEY to be set, any value works):
+    python -m benchmarks.bench_pii_redaction_windows --megabytes 100
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.bench_pii_redaction import _csv_export
+from services.privacy_service.pii_redactor import _apply_redactions, _build_tokenizer, redact_stream
+from shared.config.settings import settings
+
+BLOCK_CHARS = 1024 * 1024
+
+
+def _blocks(text: str):
+    for start in range(0, len(text), BLOCK_CHARS):
+        yield text[start:start + BLOCK_CHARS]
+
+
+def _time_stream(text: str, processes: int) -> tuple[float, str, dict]:
+    settings.PII_REDACTION_WORKERS = processes
+    started = time.perf_counter()
+    pieces, placeholders = [], {}
+    for redacted, new_redactions in redact_stream(_blocks(text)):
+        pieces.append(redacted)
+        placeholders.update((item["placeholder"], item["value"]) for item in new_redactions)
+    return time.perf_counter() - started, "".join(pieces), placeholders
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=100)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    settings.PII_REDACTION_ENABLED = True
+    text = _csv_export(int(args.megabytes * 1024 * 1024), random.Random(17))
+
+    # Whole-string baseline: one process, one window.
+    settings.PII_PARALLEL_MIN_CHARS = len(text) + 1
+    redactions: list[dict] = []
+    started = time.perf_counter()
+    expected = _apply_redactions(text, _build_tokenizer(redactions), redactions)
+    baseline = time.perf_counter() - started
+    expected_placeholders = {item["placeholder"]: item["value"] for item in redactions}
+
+    print(f"chars={len(text)} redactions={len(redactions)} cpus={os.cpu_count()} window={settings.PII_REDACTION_WINDOW_CHARS}")
+    print(f"whole string         {baseline:7.3f}s")
+    for processes in args.processes:
+        elapsed, redacted, placeholders = _time_stream(text, processes)
+        assert redacted == expected and placeholders == expected_placeholders, "windowed output differs"
+        print(f"windows, {processes} process(es) {elapsed:7.3f}s  speedup={baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
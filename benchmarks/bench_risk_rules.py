@@ -0,0 +1,99 @@
+"""
+Risk rule engine: per-pattern re.search loop vs. CompiledRiskRules, which
+skips every rule whose literal anchor prefix is missing from the sentence's
+tokens and runs each remaining rule's own compiled regex, on a synthetic
+500-page contract as the rule count grows to 200.
+
+Usage (settings need DATABASE_URL and OPENAI_API_KEY to be set, any value works):
+    python -m benchmarks.bench_risk_rules --pages 500
+"""
+import argparse
+import random
+import re
+import time
+
+from services.risk_service.risk_detector import (
+    RISK_RULES,
+    CompiledRiskRules,
+    _extract_candidate_sentences,
+    detect_risks,
+)
+
+FILLER = [
+    "The parties agree to the terms set out in this schedule.",
+    "Coverage applies to the insured property described above.",
+    "Notices must be delivered to the registered address.",
+    "The premium is payable annually in advance.",
+    "This section describes the claims handling process in detail.",
+]
+CLAUSES = [
+    "This agreement will auto-renew for successive one year terms.",
+    "An early termination fee of two months rent applies.",
+    "We may share your data with third parties for marketing.",
+    "The tenant shall indemnify the landlord against all claims.",
+]
+
+
+def _synthetic_rules(count: int) -> list[dict]:
+    rules = list(RISK_RULES)
+    idx = 0
+    while len(rules) < count:
+        rules.append(
+            {
+                "name": f"synthetic_{idx}",
+                "severity": "LOW",
+                "confidence": 0.5,
+                "patterns": [rf"\bclause{idx} trigger\b", rf"\bsynthetic term {idx}\b"],
+                "description": f"Synthetic rule {idx}.",
+            }
+        )
+        idx += 1
+    return rules[:count]
+
+
+def _synthetic_contract(pages: int, sentences_per_page: int = 40) -> str:
+    rng = random.Random(7)
+    lines = []
+    for _ in range(pages * sentences_per_page):
+        pool = CLAUSES if rng.random() < 0.02 else FILLER
+        lines.append(rng.choice(pool))
+    return "\n".join(lines)
+
+
+def _legacy_detect(text: str, rules: list[dict]) -> int:
+    hits = 0
+    for sentence in _extract_candidate_sentences(text):
+        sentence_lower = sentence.lower()
+        for rule in rules:
+            if any(re.search(pattern, sentence_lower, re.IGNORECASE) for pattern in rule["patterns"]):
+                hits += 1
+    return hits
+
+
+def _time(fn) -> tuple[float, int]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--rules", type=int, nargs="+", default=[5, 25, 50, 100, 200])
+    args = parser.parse_args()
+
+    text = _synthetic_contract(args.pages)
+    print(f"pages={args.pages} chars={len(text)} sentences={len(_extract_candidate_sentences(text))}")
+    for rule_count in args.rules:
+        rules = _synthetic_rules(rule_count)
+        compiled = CompiledRiskRules(rules)
+        legacy_seconds, _ = _time(lambda: _legacy_detect(text, rules))
+        prefiltered_seconds, findings = _time(lambda: len(detect_risks(text, rules=compiled)))
+        print(
+            f"rules={rule_count:<4} legacy={legacy_seconds:7.3f}s prefiltered={prefiltered_seconds:7.3f}s "
+            f"speedup={legacy_seconds / prefiltered_seconds:6.1f}x findings={findings}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+import json
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -10,22 +13,19 @@ from shared.models.document import Document
 
 try:
     from services.qa_service.qa_pipeline import (
-        run_qa_pipeline,
-        run_qa_pipeline_for_documents,
-        run_qa_pipeline_with_metadata,
-        run_qa_pipeline_with_metadata_for_documents,
+        arun_qa_pipeline_with_metadata_for_documents,
+        stream_qa_pipeline_for_documents,
     )
 except ModuleNotFoundError:
-    def run_qa_pipeline(question: str, document_id: str):
-        raise RuntimeError("QA pipeline dependencies are not installed.")
-
-    def run_qa_pipeline_for_documents(question: str, document_ids: list[str], thread_id: str | None = None, user_id: str | None = None):
-        raise RuntimeError("QA pipeline dependencies are not installed.")
-
-    def run_qa_pipeline_with_metadata(question: str, document_id: str):
+    async def arun_qa_pipeline_with_metadata_for_documents(
+        question: str,
+        document_ids: list[str],
+        thread_id: str | None = None,
+        user_id: str | None = None,
+    ):
         raise RuntimeError("QA pipeline dependencies are not installed.")
 
-    def run_qa_pipeline_with_metadata_for_documents(
+    def stream_qa_pipeline_for_documents(
         question: str,
         document_ids: list[str],
         thread_id: str | None = None,
@@ -66,6 +66,11 @@ def _ensure_document_access(db: Session, document_id: str, user_id):
         )
 
 
+def _ensure_documents_access(db: Session, document_ids: list[str], user_id):
+    for document_id in document_ids:
+        _ensure_document_access(db, document_id, user_id)
+
+
 def _resolve_document_ids(payload: QARequest) -> list[str]:
     candidates = []
     if payload.document_ids:
@@ -88,33 +93,53 @@ def _resolve_document_ids(payload: QARequest) -> list[str]:
     return deduped
 
 @router.post("/ask")
-def ask_question(
+async def ask_question(
     payload: QARequest,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     document_ids = _resolve_document_ids(payload)
-    for document_id in document_ids:
-        _ensure_document_access(db, document_id, current_user["user_id"])
+    # The database session is synchronous, so the access check runs off the event loop.
+    await run_in_threadpool(_ensure_documents_access, db, document_ids, current_user["user_id"])
 
+    result = await arun_qa_pipeline_with_metadata_for_documents(
+        question=payload.question,
+        document_ids=document_ids,
+        thread_id=payload.thread_id,
+        user_id=str(current_user["user_id"]),
+    )
     if payload.include_reasoning:
-        if len(document_ids) == 1 and payload.thread_id is None:
-            return run_qa_pipeline_with_metadata(payload.question, document_ids[0])
-        return run_qa_pipeline_with_metadata_for_documents(
-            question=payload.question,
-            document_ids=document_ids,
-            thread_id=payload.thread_id,
-            user_id=str(current_user["user_id"]),
-        )
+        return result
+    return {"answer": result["answer"]}
+
+
+def _server_sent_events(events):
+    try:
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except Exception as stream_error:
+        # Headers are already sent, so the failure is reported in the stream.
+        print(f"QA stream failed: {stream_error}")
+        yield f"event: error\ndata: {json.dumps({'detail': 'Failed to answer the question'})}\n\n"
 
-    if len(document_ids) == 1 and payload.thread_id is None:
-        answer = run_qa_pipeline(payload.question, document_ids[0])
-        return {"answer": answer}
 
-    answer = run_qa_pipeline_for_documents(
+@router.post("/ask/stream")
+def ask_question_stream(
+    payload: QARequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    document_ids = _resolve_document_ids(payload)
+    _ensure_documents_access(db, document_ids, current_user["user_id"])
+
+    events = stream_qa_pipeline_for_documents(
         question=payload.question,
         document_ids=document_ids,
         thread_id=payload.thread_id,
         user_id=str(current_user["user_id"]),
     )
-    return {"answer": answer}
+    return StreamingResponse(
+        _server_sent_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,28 @@
+"""add content hash to documents
+
+Revision ID: b41d7e2a9c05
+Revises: 9e3f1b7c4a21
+Create Date: 2026-03-02 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b41d7e2a9c05"
+down_revision: Union[str, Sequence[str], None] = "9e3f1b7c4a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_documents_content_hash", "documents", ["content_hash"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_content_hash", table_name="documents")
+    op.drop_column("documents", "content_hash")
@@ -0,0 +1,26 @@
+"""add obligations available at to documents
+
+Revision ID: d7a4c1e9b352
+Revises: b41d7e2a9c05
+Create Date: 2026-03-09 09:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a4c1e9b352"
+down_revision: Union[str, Sequence[str], None] = "b41d7e2a9c05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("obligations_available_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "obligations_available_at")
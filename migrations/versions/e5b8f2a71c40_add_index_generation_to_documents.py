@@ -0,0 +1,29 @@
+"""add index generation to documents
+
+Revision ID: e5b8f2a71c40
+Revises: d7a4c1e9b352
+Create Date: 2026-03-16 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b8f2a71c40"
+down_revision: Union[str, Sequence[str], None] = "d7a4c1e9b352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "documents",
+        sa.Column("index_generation", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "index_generation")
@@ -1,3 +1,4 @@
+import hashlib
 import os
 
 from sqlalchemy.orm import Session
@@ -45,15 +46,41 @@ class DocumentService:
                 f"File too large. Maximum allowed size is {settings.MAX_UPLOAD_SIZE_MB} MB"
             )
 
+    @staticmethod
+    def _compute_content_hash(file_obj, block_size: int = 1024 * 1024) -> str:
+        digest = hashlib.sha256()
+        file_obj.seek(0)
+        for block in iter(lambda: file_obj.read(block_size), b""):
+            digest.update(block)
+        file_obj.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _find_existing_blob(db: Session, user_id, content_hash: str):
+        return (
+            db.query(Document.storage_path)
+            .filter(Document.user_id == user_id)
+            .filter(Document.content_hash == content_hash)
+            .first()
+        )
+
     def upload_document(self,db: Session,file,user_id):
         self._validate_upload(file)
-        storage_path = self.storage.upload_file(file.file,file.filename)
+        content_hash = self._compute_content_hash(file.file)
+
+        # Identical bytes are already stored for this user; point at the same blob.
+        existing = self._find_existing_blob(db, user_id, content_hash)
+        if existing is not None:
+            storage_path = existing.storage_path
+        else:
+            storage_path = self.storage.upload_file(file.file,file.filename)
 
         document = Document(
             user_id=user_id,
             file_name=file.filename,
             file_type=file.content_type,
-            storage_path=storage_path
+            storage_path=storage_path,
+            content_hash=content_hash,
         )
 
         db.add(document)
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Callable
+
+from shared.cache import get_cache_service
+from shared.config.settings import settings
+
+_SQLITE_BATCH_SIZE = 500
+# The row count is tracked in memory; other processes sharing the file make it
+# drift, so it is re-read from SQLite once per this many writes.
+_RECOUNT_EVERY_WRITES = 100
+# Reads refresh last_used at most this often per key, so most lookups are pure
+# reads and do not take SQLite's write lock.
+_TOUCH_INTERVAL_SECONDS = 60
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{text_hash}"
+
+
+def _redis_key(key: str) -> str:
+    return f"embedding:v1:{key}"
+
+
+class LocalEmbeddingStore:
+    """SQLite file on local disk holding float32 vectors, evicted least-recently-used first."""
+
+    def __init__(self, path: str, max_entries: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        # WAL lets readers in other processes (e.g. prefork children) proceed while one writes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._count = self._count_rows()
+        self._writes_since_count = 0
+
+    def _count_rows(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Vectors found for `keys`. SQLite errors are logged and treated as misses."""
+        found: dict[str, list[float]] = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            try:
+                stale_keys = []
+                for start in range(0, len(keys), _SQLITE_BATCH_SIZE):
+                    batch = keys[start : start + _SQLITE_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                    for key, blob, last_used in rows:
+                        found[key] = array("f", blob).tolist()
+                        if now - last_used >= _TOUCH_INTERVAL_SECONDS:
+                            stale_keys.append(key)
+                for start in range(0, len(stale_keys), _SQLITE_BATCH_SIZE):
+                    batch = stale_keys[start : start + _SQLITE_BATCH_SIZE]
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(batch))})",
+                        [now, *batch],
+                    )
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                print(f"Embedding cache read failed, treating as misses: {exc}")
+                self._rollback()
+                return {}
+        return found
+
+    def set_many(self, items: dict[str, list[float]]):
+        """Store vectors. SQLite errors are logged and the write is skipped."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            try:
+                self._write(rows)
+            except sqlite3.Error as exc:
+                print(f"Embedding cache write skipped: {exc}")
+                self._rollback()
+                # The running count may be off now; re-read it on the next write.
+                self._writes_since_count = _RECOUNT_EVERY_WRITES
+
+    def _write(self, rows: list[tuple[str, bytes, float]]):
+        # Inserting and updating separately makes rowcount the number of new rows.
+        inserted = self._conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            rows,
+        ).rowcount
+        if inserted < len(rows):
+            self._conn.executemany(
+                "UPDATE embeddings SET vector = ?, last_used = ? WHERE key = ?",
+                [(blob, last_used, key) for key, blob, last_used in rows],
+            )
+        self._writes_since_count += 1
+        if self._writes_since_count >= _RECOUNT_EVERY_WRITES:
+            self._count = self._count_rows()
+            self._writes_since_count = 0
+        else:
+            self._count += inserted
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._count -= self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        self._conn.commit()
+
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count_rows()
+
+
+class CachedEmbeddings:
+    """
+    Embedding client wrapper that serves vectors from a local disk store and,
+    optionally, Redis before calling the wrapped client. Only texts missing from
+    every tier are sent to the embedding API.
+    """
+
+    def __init__(self, embeddings, local_store: LocalEmbeddingStore | None = None):
+        self._embeddings = embeddings
+        self._local_store = local_store
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _get_local_store(self) -> LocalEmbeddingStore:
+        if self._local_store is None:
+            self._local_store = LocalEmbeddingStore(
+                os.path.join(settings.EMBEDDING_CACHE_DIR, "embeddings.sqlite3"),
+                settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+        return self._local_store
+
+    def _model_name(self) -> str:
+        return str(getattr(self._embeddings, "model", None) or "default")
+
+    def _embed_with_cache(self, texts: list[str], compute: Callable[[list[str]], list[list[float]]]):
+        model = self._model_name()
+        keys = [embedding_cache_key(model, text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        local_store = self._get_local_store()
+        found = local_store.get_many(unique_keys)
+        local_hit_keys = set(found)
+
+        redis_hit_keys = set()
+        if settings.EMBEDDING_CACHE_REDIS_ENABLED:
+            pending = [key for key in unique_keys if key not in found]
+            cached = get_cache_service().get_many_json([_redis_key(key) for key in pending])
+            redis_found = {
+                key: cached[_redis_key(key)]
+                for key in pending
+                if isinstance(cached.get(_redis_key(key)), list)
+            }
+            found.update(redis_found)
+            redis_hit_keys = set(redis_found)
+            local_store.set_many(redis_found)
+
+        text_by_key = dict(zip(keys, texts))
+        missing_keys = [key for key in unique_keys if key not in found]
+        if missing_keys:
+            vectors = compute([text_by_key[key] for key in missing_keys])
+            computed = dict(zip(missing_keys, vectors))
+            found.update(computed)
+            local_store.set_many(computed)
+            if settings.EMBEDDING_CACHE_REDIS_ENABLED:
+                get_cache_service().set_many_json(
+                    {_redis_key(key): vector for key, vector in computed.items()},
+                    ttl_seconds=settings.EMBEDDING_CACHE_REDIS_TTL_SECONDS,
+                )
+
+        with self._lock:
+            for key in keys:
+                if key in local_hit_keys:
+                    self.local_hits += 1
+                elif key in redis_hit_keys:
+                    self.redis_hits += 1
+                else:
+                    self.misses += 1
+
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not settings.EMBEDDING_CACHE_ENABLED or not texts:
+            return self._embeddings.embed_documents(texts)
+        return self._embed_with_cache(list(texts), self._embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return self._embeddings.embed_query(text)
+        return self._embed_with_cache([text], lambda batch: [self._embeddings.embed_query(batch[0])])[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def __getattr__(self, name):
+        return getattr(self._embeddings, name)
@@ -1,10 +1,10 @@
 from shared.database.session import SessionLocal
 
-from services.qa_service.retriever_service import retrieve_document_chunks
+from services.qa_service.retriever_service import retrieve_document_evidence
 from services.extraction_service.extraction_prompt import build_extraction_prompt
 from services.extraction_service.extraction_llm import run_extraction_llm
 from services.extraction_service.extraction_repository import store_extracted_facts
-from services.privacy_service.pii_redactor import redact_text
+from services.privacy_service.pii_redactor import redact_if_stale
 
 
 
@@ -12,10 +12,10 @@ def run_extraction_pipeline(document_id: str):
     db = SessionLocal()
     # Step 1: Retrieve relevant document chunks
     try:
-        chunks = retrieve_document_chunks(query="Extract facts", document_id=document_id, top_k=5)
-        if not chunks:
+        evidence = retrieve_document_evidence(query="Extract facts", document_id=document_id, top_k=5)
+        if not evidence:
             return
-        safe_chunks = [redact_text(chunk)[0] for chunk in chunks]
+        safe_chunks = [redact_if_stale(item["text"], item.get("redaction_version")) for item in evidence if item.get("text")]
         prompt = build_extraction_prompt(safe_chunks)
         facts  = run_extraction_llm(prompt)
         store_extracted_facts(db, document_id=document_id, facts=facts)
@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+from typing import Iterable
+
+from shared.cache import get_cache_service
+from shared.config.settings import settings
+from shared.database.session import SessionLocal
+from shared.models.document import Document
+
+
+def _cache_key(document_id: str) -> str:
+    return f"index:generation:{document_id}"
+
+
+def _as_uuid(document_id) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(document_id))
+    except ValueError:
+        return None
+
+
+def get_index_generations(document_ids: Iterable[str]) -> dict[str, int]:
+    """
+    Index generation of each document, for building cache keys. Served from
+    the cache when possible; the rest is read in one query. Unknown documents
+    are at generation 0.
+    """
+    document_ids = [str(document_id) for document_id in dict.fromkeys(document_ids)]
+    cache = get_cache_service()
+    cached = cache.get_many_json([_cache_key(document_id) for document_id in document_ids])
+    generations, missing = _split_cached(document_ids, cached)
+    if not missing:
+        return generations
+
+    loaded = _load_generations(missing)
+    if loaded is None:
+        # Not cached: the next request retries the lookup.
+        generations.update({document_id: 0 for document_id in missing})
+        return generations
+    # NX: a bump published while this read was in flight must win.
+    cache.set_many_json(_cache_items(loaded), ttl_seconds=settings.INDEX_GENERATION_CACHE_TTL_SECONDS, only_if_absent=True)
+    generations.update(loaded)
+    return generations
+
+
+async def aget_index_generations(document_ids: Iterable[str]) -> dict[str, int]:
+    """get_index_generations for the async QA path; a database lookup runs in a worker thread."""
+    document_ids = [str(document_id) for document_id in dict.fromkeys(document_ids)]
+    cache = get_cache_service()
+    cached = await cache.aget_many_json([_cache_key(document_id) for document_id in document_ids])
+    generations, missing = _split_cached(document_ids, cached)
+    if not missing:
+        return generations
+
+    loaded = await asyncio.to_thread(_load_generations, missing)
+    if loaded is None:
+        generations.update({document_id: 0 for document_id in missing})
+        return generations
+    await cache.aset_many_json(_cache_items(loaded), ttl_seconds=settings.INDEX_GENERATION_CACHE_TTL_SECONDS, only_if_absent=True)
+    generations.update(loaded)
+    return generations
+
+
+def _split_cached(document_ids: list[str], cached: dict) -> tuple[dict[str, int], list[str]]:
+    generations = {
+        document_id: cached[_cache_key(document_id)]
+        for document_id in document_ids
+        if isinstance(cached.get(_cache_key(document_id)), int)
+    }
+    return generations, [document_id for document_id in document_ids if document_id not in generations]
+
+
+def _cache_items(generations: dict[str, int]) -> dict[str, int]:
+    return {_cache_key(document_id): generation for document_id, generation in generations.items()}
+
+
+def _load_generations(document_ids: list[str]) -> dict[str, int] | None:
+    """Generations from the database in one query, or None if the lookup failed."""
+    loaded: dict[str, int] = {}
+    uuids = [value for value in (_as_uuid(document_id) for document_id in document_ids) if value is not None]
+    if uuids:
+        db = SessionLocal()
+        try:
+            rows = db.query(Document.id, Document.index_generation).filter(Document.id.in_(uuids)).all()
+            loaded = {str(document_id): generation or 0 for document_id, generation in rows}
+        except Exception as lookup_error:
+            print(f"Index generation lookup failed: {lookup_error}")
+            return None
+        finally:
+            db.close()
+    return {document_id: loaded.get(document_id, 0) for document_id in document_ids}
+
+
+def bump_index_generation(document):
+    """
+    Mark the document's chunks as changed. The increment is done in SQL and
+    committed with the caller's transaction; call publish_index_generations
+    after the commit.
+    """
+    document.index_generation = Document.index_generation + 1
+
+
+def publish_index_generations(documents: Iterable):
+    """Write committed generations to the cache so new cache keys apply at once."""
+    generations = {}
+    for document in documents:
+        generation = getattr(document, "index_generation", None)
+        if isinstance(generation, int):
+            generations[_cache_key(str(document.id))] = generation
+    get_cache_service().set_many_json(generations, ttl_seconds=settings.INDEX_GENERATION_CACHE_TTL_SECONDS)
+
+
+def bump_index_generations(document_ids: Iterable[str]):
+    """Bump and publish the generations of several documents in their own transaction."""
+    uuids = [value for value in (_as_uuid(document_id) for document_id in document_ids) if value is not None]
+    if not uuids:
+        return
+    db = SessionLocal()
+    try:
+        documents = db.query(Document).filter(Document.id.in_(uuids)).all()
+        for document in documents:
+            bump_index_generation(document)
+        db.commit()
+        publish_index_generations(documents)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
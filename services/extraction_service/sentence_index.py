@@ -0,0 +1,151 @@
+import json
+import re
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_FORMAT_VERSION = 1
+_TYPECODE = "I"
+_ARRAYS = ("starts", "ends", "pages", "token_offsets", "token_ids")
+
+
+def tokenize(text: str) -> set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+class SentenceIndex:
+    """
+    Sentence boundaries of a document, computed once and shared by every
+    analyzer. Character offsets, page numbers and per-sentence token ids are kept
+    in flat arrays; each distinct lowercase token is stored once in `tokens`.
+    Pages are joined with a newline, which is also a sentence boundary.
+    """
+
+    def __init__(self):
+        self.starts = array(_TYPECODE)
+        self.ends = array(_TYPECODE)
+        self.pages = array(_TYPECODE)
+        self.token_offsets = array(_TYPECODE, [0])
+        self.token_ids = array(_TYPECODE)
+        self.tokens: list[str] = []
+        self._vocabulary: dict[str, int] = {}
+        self._parts: list[str] = []
+        self._length = 0
+        self._text: str | None = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[tuple[int, str]]) -> "SentenceIndex":
+        index = cls()
+        for page_number, text in segments:
+            index.add_page(page_number, text)
+        return index
+
+    @classmethod
+    def from_text(cls, text: str) -> "SentenceIndex":
+        return cls.from_segments([(1, text or "")])
+
+    def add_page(self, page_number: int, text: str):
+        if self._length or self._parts:
+            self._length += 1
+        base = self._length
+        position = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(text):
+            self._add_sentence(text, position, boundary.start(), base, page_number)
+            position = boundary.end()
+        self._add_sentence(text, position, len(text), base, page_number)
+
+        self._parts.append(text)
+        self._length += len(text)
+        self._text = None
+
+    def _add_sentence(self, text: str, start: int, end: int, base: int, page_number: int):
+        raw = text[start:end]
+        stripped = raw.strip()
+        if not stripped:
+            return
+        start += len(raw) - len(raw.lstrip())
+        self.starts.append(base + start)
+        self.ends.append(base + start + len(stripped))
+        self.pages.append(page_number)
+        for token in tokenize(stripped):
+            token_id = self._vocabulary.get(token)
+            if token_id is None:
+                token_id = self._vocabulary[token] = len(self.tokens)
+                self.tokens.append(token)
+            self.token_ids.append(token_id)
+        self.token_offsets.append(len(self.token_ids))
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, idx: int) -> tuple[int, int]:
+        return self.starts[idx], self.ends[idx]
+
+    def sentence(self, idx: int) -> str:
+        return self.text[self.starts[idx]:self.ends[idx]]
+
+    def sentences(self) -> Iterator[str]:
+        text = self.text
+        for start, end in zip(self.starts, self.ends):
+            yield text[start:end]
+
+    def page(self, idx: int) -> int:
+        return self.pages[idx]
+
+    def token_set(self, idx: int) -> frozenset[str]:
+        ids = self.token_ids[self.token_offsets[idx]:self.token_offsets[idx + 1]]
+        return frozenset(self.tokens[token_id] for token_id in ids)
+
+    def locate(self, offset: int) -> int | None:
+        """Index of the sentence containing the character offset, if any."""
+        idx = bisect_right(self.starts, offset) - 1
+        if idx >= 0 and offset < self.ends[idx]:
+            return idx
+        return None
+
+    def dump(self, path: str):
+        text_bytes = self.text.encode("utf-8")
+        token_bytes = "\n".join(self.tokens).encode("utf-8")
+        header = {
+            "version": _FORMAT_VERSION,
+            "itemsize": array(_TYPECODE).itemsize,
+            "arrays": {name: len(getattr(self, name)) for name in _ARRAYS},
+            "tokens": len(token_bytes),
+            "text": len(text_bytes),
+        }
+        with open(path, "wb") as file:
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name in _ARRAYS:
+                getattr(self, name).tofile(file)
+            file.write(token_bytes)
+            file.write(text_bytes)
+
+    @classmethod
+    def load(cls, path: str) -> "SentenceIndex":
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != _FORMAT_VERSION or header.get("itemsize") != array(_TYPECODE).itemsize:
+                raise ValueError(f"Unsupported sentence index format: {header.get('version')}")
+
+            index = cls()
+            for name in _ARRAYS:
+                values = array(_TYPECODE)
+                values.fromfile(file, header["arrays"][name])
+                setattr(index, name, values)
+            token_text = file.read(header["tokens"]).decode("utf-8")
+            index.tokens = token_text.split("\n") if token_text else []
+            index._vocabulary = {token: token_id for token_id, token in enumerate(index.tokens)}
+            text = file.read(header["text"]).decode("utf-8")
+        index._parts = [text]
+        index._length = len(text)
+        return index
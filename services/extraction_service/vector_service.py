@@ -1,9 +1,13 @@
 import hashlib
+from typing import Iterable
+
 import chromadb
 from chromadb.config import Settings
 from langchain_openai import OpenAIEmbeddings
 
 from services.extraction_service.chunking_service import chunk_text
+from services.extraction_service.embedding_cache import CachedEmbeddings
+from services.privacy_service.pii_redactor import REDACTION_VERSION, redact_text
 from shared.config.settings import settings
 
 CHROMA_DIR = settings.CHROMA_DIR
@@ -32,32 +36,249 @@ class _LazyEmbeddings:
         return getattr(self._get_instance(), name)
 
 
-embeddings = _LazyEmbeddings()
+embeddings = CachedEmbeddings(_LazyEmbeddings())
+
+def _chunk_id(document_id: str, idx: int, chunk: str) -> str:
+    chunk_hash = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:12]
+    return f"{document_id}:{idx}:{chunk_hash}"
+
+
+def _existing_chunk_ids(document_id: str) -> set[str]:
+    try:
+        existing = collection.get(where={"document_id": document_id}, include=[])
+    except Exception:
+        return set()
+    return set(existing.get("ids") or [])
+
+
+def _reusable_vectors(chunk_ids: list[str], existing_ids: set[str]) -> dict[str, list[float]]:
+    """Embeddings of chunks whose text is already stored under a different index."""
+    old_id_by_hash = {chunk_id.rsplit(":", 1)[-1]: chunk_id for chunk_id in existing_ids}
+    moved = {
+        chunk_id: old_id_by_hash[chunk_id.rsplit(":", 1)[-1]]
+        for chunk_id in chunk_ids
+        if chunk_id.rsplit(":", 1)[-1] in old_id_by_hash
+    }
+    if not moved:
+        return {}
+
+    stored = collection.get(ids=list(set(moved.values())), include=["embeddings"])
+    vector_by_old_id = {
+        old_id: list(vector)
+        for old_id, vector in zip(stored.get("ids") or [], stored.get("embeddings") or [])
+    }
+    return {
+        chunk_id: vector_by_old_id[old_id]
+        for chunk_id, old_id in moved.items()
+        if old_id in vector_by_old_id
+    }
+
+
+def _upsert_chunks(
+    document_id: str,
+    chunks: list[str],
+    start_index: int,
+    existing_ids: set[str],
+    extra_metadata: dict | None = None,
+) -> list[str]:
+    """
+    Add the chunks whose id is not stored yet and return the ids of all chunks.
+    Moved chunks reuse their stored embedding; only new text is embedded.
+    """
+    ids = [_chunk_id(document_id, start_index + offset, chunk) for offset, chunk in enumerate(chunks)]
+    new_positions = [offset for offset, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+    if not new_positions:
+        return ids
+
+    new_ids = [ids[offset] for offset in new_positions]
+    vectors = _reusable_vectors(new_ids, existing_ids)
+    to_embed = [chunk_id for chunk_id in new_ids if chunk_id not in vectors]
+    if to_embed:
+        chunk_by_id = dict(zip(ids, chunks))
+        vectors.update(zip(to_embed, embeddings.embed_documents([chunk_by_id[chunk_id] for chunk_id in to_embed])))
+
+    metadata = []
+    for offset in new_positions:
+        item = {"document_id": document_id, "chunk_index": start_index + offset}
+        if extra_metadata:
+            item.update(extra_metadata)
+        metadata.append(item)
+
+    collection.add(
+        documents=[chunks[offset] for offset in new_positions],
+        embeddings=[vectors[chunk_id] for chunk_id in new_ids],
+        ids=new_ids,
+        metadatas=metadata
+    )
+    return ids
+
+
+def _delete_vanished_chunks(existing_ids: set[str], current_ids: set[str]):
+    vanished = list(existing_ids - current_ids)
+    if vanished:
+        collection.delete(ids=vanished)
+
 
-def store_document_chunks(document_id: str, text: str):
+def _redaction_metadata(redaction_version: str | None) -> dict:
+    # Chroma metadata cannot hold None; a missing version reads as "not redacted".
+    return {"redaction_version": redaction_version} if redaction_version else {}
+
+
+def store_document_chunks(document_id: str, text: str, redaction_version: str | None = None):
+    """
+    `redaction_version` is the redaction engine version already applied to
+    `text`; readers skip redacting chunks stored with the current version.
+    """
     chunks = chunk_text(text)
 
     if not chunks:
         return
 
-    # Keep chunk IDs stable and avoid duplicate rows on re-ingestion.
+    # Diff against the stored ids: unchanged chunks are left in place, new ones
+    # are added before vanished ones are removed, so the document stays searchable.
+    existing_ids = _existing_chunk_ids(document_id)
+    current_ids = _upsert_chunks(document_id, chunks, 0, existing_ids, _redaction_metadata(redaction_version))
+    _delete_vanished_chunks(existing_ids, set(current_ids))
+
+
+def store_document_segments(
+    document_id: str,
+    segments: Iterable[tuple[int, str]],
+    redaction_version: str | None = None,
+) -> int:
+    """
+    Chunk, embed and store (page_number, text) segments one at a time so only
+    the current page's chunks and vectors are held in memory. Returns the
+    number of chunks stored.
+    """
+    redaction_metadata = _redaction_metadata(redaction_version)
+    existing_ids = _existing_chunk_ids(document_id)
+    current_ids: set[str] = set()
+
+    next_index = 0
+    for page_number, text in segments:
+        chunks = chunk_text(text)
+        if not chunks:
+            continue
+
+        current_ids.update(
+            _upsert_chunks(
+                document_id,
+                chunks,
+                next_index,
+                existing_ids,
+                {"page_number": page_number, **redaction_metadata},
+            )
+        )
+        next_index += len(chunks)
+
+    if next_index:
+        _delete_vanished_chunks(existing_ids, current_ids)
+    return next_index
+
+
+def clone_document_chunks(source_document_id: str, target_document_id: str) -> int:
+    """
+    Copy the stored chunks and embeddings of an already-ingested document under
+    a new document id, without calling the embedding API. Returns the number of
+    chunks copied (0 when the source has nothing indexed).
+    """
+    existing = collection.get(
+        where={"document_id": source_document_id},
+        include=["documents", "embeddings", "metadatas"],
+    )
+    source_ids = existing.get("ids") or []
+    if not source_ids:
+        return 0
+
     try:
-        collection.delete(where={"document_id": document_id})
+        collection.delete(where={"document_id": target_document_id})
     except Exception:
         pass
 
-    vectors = embeddings.embed_documents(chunks)
     ids = []
     metadata = []
-    for idx, chunk in enumerate(chunks):
-        chunk_hash = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:12]
-        chunk_id = f"{document_id}:{idx}:{chunk_hash}"
-        ids.append(chunk_id)
-        metadata.append({"document_id": document_id, "chunk_index": idx})
+    for idx, chunk_id in enumerate(source_ids):
+        source_metadata = dict(existing["metadatas"][idx] or {})
+        source_metadata["document_id"] = target_document_id
+        _, chunk_index, chunk_hash = chunk_id.split(":", 2)
+        ids.append(f"{target_document_id}:{chunk_index}:{chunk_hash}")
+        metadata.append(source_metadata)
 
     collection.add(
-        documents=chunks,
-        embeddings=vectors,
+        documents=existing["documents"],
+        embeddings=existing["embeddings"],
         ids=ids,
         metadatas=metadata
     )
+    return len(ids)
+
+
+
+def _stale_chunk_ids(page_size: int) -> list[str]:
+    stale = []
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        ids = page.get("ids") or []
+        for chunk_id, metadata in zip(ids, page.get("metadatas") or []):
+            if (metadata or {}).get("redaction_version") != REDACTION_VERSION:
+                stale.append(chunk_id)
+        if len(ids) < page_size:
+            return stale
+        offset += page_size
+
+
+def reredact_stale_chunks(batch_size: int = 256) -> dict:
+    """
+    Bring every stored chunk up to the current redaction engine. Chunks whose
+    text the current rules leave unchanged are only relabelled; the others are
+    re-embedded and stored under the id of their new text. Run after bumping
+    REDACTION_VERSION. Returns counts of what was done and the ids of the
+    documents whose chunks changed.
+    """
+    stats = {"scanned": 0, "stale": 0, "rewritten": 0, "relabelled": 0, "rewritten_documents": []}
+    if not settings.PII_REDACTION_ENABLED:
+        print("PII redaction disabled; stored chunks left as they are")
+        return stats
+
+    rewritten_documents: set[str] = set()
+    stale_ids = _stale_chunk_ids(batch_size)
+    stats["stale"] = len(stale_ids)
+    for start in range(0, len(stale_ids), batch_size):
+        batch = collection.get(ids=stale_ids[start:start + batch_size], include=["documents", "metadatas"])
+        relabel_ids, relabel_metadata = [], []
+        rewrite_ids, rewrite_chunks, rewrite_metadata, new_ids = [], [], [], []
+        for chunk_id, chunk, metadata in zip(batch.get("ids") or [], batch["documents"], batch["metadatas"]):
+            stats["scanned"] += 1
+            metadata = {**(metadata or {}), "redaction_version": REDACTION_VERSION}
+            redacted, _ = redact_text(chunk or "")
+            if redacted == chunk:
+                relabel_ids.append(chunk_id)
+                relabel_metadata.append(metadata)
+                continue
+            _, chunk_index, _ = chunk_id.split(":", 2)
+            rewrite_ids.append(chunk_id)
+            rewrite_chunks.append(redacted)
+            rewrite_metadata.append(metadata)
+            new_ids.append(_chunk_id(metadata["document_id"], int(chunk_index), redacted))
+
+        if relabel_ids:
+            collection.update(ids=relabel_ids, metadatas=relabel_metadata)
+            stats["relabelled"] += len(relabel_ids)
+        if rewrite_ids:
+            # Add before delete so the document stays searchable throughout.
+            collection.add(
+                documents=rewrite_chunks,
+                embeddings=embeddings.embed_documents(rewrite_chunks),
+                ids=new_ids,
+                metadatas=rewrite_metadata,
+            )
+            collection.delete(ids=rewrite_ids)
+            stats["rewritten"] += len(rewrite_ids)
+            rewritten_documents.update(metadata["document_id"] for metadata in rewrite_metadata)
+
+    stats["rewritten_documents"] = sorted(rewritten_documents)
+
+    print("Re-redacted stored chunks:", stats)
+    return stats
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+from shared.models.document import Document
+from services.obligation_service.obligation_detector import clone_document_obligations
+from services.obligation_service.reminder_generator import ReminderGenerator
+from services.privacy_service.pii_redactor import applied_redaction_version
+from services.risk_service.risk_detector import clone_document_risks
+
+
+def store_redacted_text(document_id: str, text: str):
+    from services.extraction_service.vector_service import store_document_chunks
+
+    store_document_chunks(document_id, text, redaction_version=applied_redaction_version())
+
+
+def store_redacted_segments(document_id: str, segments) -> int:
+    from services.extraction_service.vector_service import store_document_segments
+
+    return store_document_segments(document_id, segments, redaction_version=applied_redaction_version())
+
+
+def _clone_document_chunks(source_document_id: str, target_document_id: str) -> int:
+    from services.extraction_service.vector_service import clone_document_chunks
+
+    return clone_document_chunks(source_document_id, target_document_id)
+
+
+def find_ingested_duplicate(db: Session, document: Document):
+    content_hash = getattr(document, "content_hash", None)
+    if not content_hash:
+        return None
+    return (
+        db.query(Document)
+        .filter(Document.user_id == document.user_id)
+        .filter(Document.content_hash == content_hash)
+        .filter(Document.id != document.id)
+        .filter(Document.document_status == "EXTRACTED")
+        .order_by(Document.uploaded_at.asc())
+        .first()
+    )
+
+
+def reuse_ingested_duplicate(db: Session, document: Document) -> bool:
+    """
+    Copy chunks, risks, obligations and reminders from an already ingested
+    upload with the same content. Returns False when there is none to reuse.
+    """
+    source = find_ingested_duplicate(db, document)
+    if source is None:
+        return False
+    if not _clone_document_chunks(str(source.id), str(document.id)):
+        return False
+    try:
+        clone_document_risks(db, str(source.id), str(document.id))
+    except Exception as risk_error:
+        print(f"Risk cloning failed for document {document.id}: {risk_error}")
+    # The document is finished here, so the obligation stage never runs for
+    # it; its obligations and reminders are copied instead. Committed by the caller.
+    obligations = clone_document_obligations(db, str(source.id), document, commit=False)
+    ReminderGenerator.generate_many(db, obligations, commit=False)
+    document.obligations_available_at = datetime.now(timezone.utc)
+    print(f"Reused ingestion of identical document {source.id}")
+    return True
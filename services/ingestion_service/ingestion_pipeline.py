@@ -4,20 +4,71 @@ import tempfile
 from sqlalchemy.orm import Session
 from shared.database.session import SessionLocal
 from shared.models.document import Document
-from services.ingestion_service.parser_service import extract_text_from_document
-from services.privacy_service.pii_redactor import redact_text
+from shared.config.settings import settings
+from services.extraction_service.index_generation import bump_index_generation, publish_index_generations
+from services.ingestion_service.parser_service import extract_text_from_document, iter_document_segments
+from services.extraction_service.sentence_index import SentenceIndex
+from services.ingestion_service.ingestion_common import (
+    reuse_ingested_duplicate,
+    store_redacted_segments,
+    store_redacted_text,
+)
+from services.privacy_service.pii_redactor import redact_segments, redact_text
 from services.storage_service.storage_service import StorageService
-from services.risk_service.risk_detector import run_risk_detection_pipeline
+from services.risk_service.risk_detector import (
+    detect_risks,
+    record_detected_risks,
+    run_risk_detection_pipeline,
+)
 from workers.tasks.extraction_tasks import extract_document_facts
 
 
-def _store_document_chunks(document_id: str, text: str):
-    from services.extraction_service.vector_service import store_document_chunks
+def _should_stream(path: str) -> bool:
+    return os.path.getsize(path) >= settings.INGESTION_STREAMING_MIN_BYTES
 
-    store_document_chunks(document_id, text)
+
+def _ingest_text(document_id: str, path: str):
+    extracted_text = extract_text_from_document(path)
+    print("Extracted Text Length:", len(extracted_text))
+    redacted_text, redactions = redact_text(extracted_text)
+    print("PII Redactions Applied:", len(redactions))
+    store_redacted_text(document_id, redacted_text)
+    try:
+        run_risk_detection_pipeline(document_id, redacted_text, index=SentenceIndex.from_text(redacted_text))
+    except Exception as risk_error:
+        print(f"Risk detection failed for document {document_id}: {risk_error}")
+
+
+def _ingest_segments(document_id: str, path: str):
+    """Page-wise ingestion: peak memory is bounded by one page plus its chunks."""
+    stats = {"pages": 0, "characters": 0, "redactions": 0}
+    findings: list[dict] = []
+    seen_risks: set = set()
+
+    def _redacted_pages():
+        for page_number, page_text, page_redactions in redact_segments(iter_document_segments(path)):
+            stats["pages"] += 1
+            stats["characters"] += len(page_text)
+            stats["redactions"] += len(page_redactions)
+            page_index = SentenceIndex.from_segments([(page_number, page_text)])
+            findings.extend(detect_risks(index=page_index, seen=seen_risks))
+            yield page_number, page_text
+
+    chunk_count = store_redacted_segments(document_id, _redacted_pages())
+    print(f"Streamed {stats['pages']} pages ({stats['characters']} chars, {chunk_count} chunks)")
+    print("PII Redactions Applied:", stats["redactions"])
+    try:
+        record_detected_risks(document_id, findings)
+    except Exception as risk_error:
+        print(f"Risk detection failed for document {document_id}: {risk_error}")
 
 
 def run_ingestion_pipeline(document_id: str):
+    """
+    Ingest one document in-process: parse, redact, embed and detect risks in a
+    single call. This is the entry point for tests and one-off CLI runs; Celery
+    workers run the staged chain from build_ingestion_chain instead.
+    """
     db: Session = SessionLocal()
     document = None
     downloaded_path = None
@@ -29,25 +80,29 @@ def run_ingestion_pipeline(document_id: str):
         document.document_status = "PROCESSING"
         db.commit()
 
+        if reuse_ingested_duplicate(db, document):
+            bump_index_generation(document)
+            document.document_status = "EXTRACTED"
+            db.commit()
+            publish_index_generations([document])
+            return
+
         storage_service = StorageService()
         suffix = os.path.splitext(document.file_name or "")[1]
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
             downloaded_path = temp_file.name
 
         storage_service.download_file(document.storage_path, downloaded_path)
-        extracted_text = extract_text_from_document(downloaded_path)
-        print("Extracted Text Length:", len(extracted_text))
-        redacted_text, redactions = redact_text(extracted_text)
-        print("PII Redactions Applied:", len(redactions))
-        _store_document_chunks(str(document.id), redacted_text)
-        try:
-            run_risk_detection_pipeline(str(document.id), redacted_text)
-        except Exception as risk_error:
-            print(f"Risk detection failed for document {document.id}: {risk_error}")
+        if _should_stream(downloaded_path):
+            _ingest_segments(str(document.id), downloaded_path)
+        else:
+            _ingest_text(str(document.id), downloaded_path)
 
+        bump_index_generation(document)
         document.document_status = "EXTRACTED"
         db.commit()
         db.refresh(document)
+        publish_index_generations([document])
         
     except Exception:
         db.rollback()
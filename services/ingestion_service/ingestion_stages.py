@@ -0,0 +1,279 @@
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from shared.cache import get_cache_service
+from shared.database.session import SessionLocal
+from shared.models.document import Document
+from services.extraction_service.index_generation import bump_index_generation, publish_index_generations
+from services.extraction_service.sentence_index import SentenceIndex
+from services.ingestion_service.ingestion_common import reuse_ingested_duplicate, store_redacted_segments
+from services.ingestion_service.parser_service import iter_document_segments
+from services.obligation_service.obligation_detector import detect_obligations, persist_obligations
+from services.obligation_service.reminder_generator import ReminderGenerator
+from services.privacy_service.pii_redactor import applied_redaction_version, redact_stream
+from services.risk_service.risk_detector import detect_risks, record_detected_risks
+from services.storage_service.storage_service import StorageService
+
+EXTRACTED_ARTIFACT = "extracted"
+REDACTED_ARTIFACT = "redacted"
+SENTENCE_INDEX_ARTIFACT = "sentences"
+
+_ARTIFACT_EXTENSIONS = {SENTENCE_INDEX_ARTIFACT: "idx"}
+
+# Pages are written to artifacts separated by a form feed so later stages can
+# read them back one page at a time.
+PAGE_SEPARATOR = "\f"
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def artifact_name(document_id: str, artifact: str) -> str:
+    return f"artifacts/{document_id}/{artifact}.{_ARTIFACT_EXTENSIONS.get(artifact, 'txt')}"
+
+
+def _redacted_artifact() -> str:
+    # Named after the redaction version so the embed stage, which labels chunks
+    # with the current version, never picks up text redacted by another one.
+    version = applied_redaction_version()
+    return f"{REDACTED_ARTIFACT}-{version}" if version else REDACTED_ARTIFACT
+
+
+def _write_segments(path: str, segments: Iterable[tuple[int, str]]) -> int:
+    pages = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for _, text in segments:
+            if pages:
+                file.write(PAGE_SEPARATOR)
+            file.write(text.replace(PAGE_SEPARATOR, "\n"))
+            pages += 1
+    return pages
+
+
+def _iter_artifact_blocks(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as file:
+        yield from iter(lambda: file.read(_READ_BLOCK_SIZE), "")
+
+
+def _iter_pages(blocks: Iterable[str]) -> Iterator[tuple[int, str]]:
+    page_number = 1
+    pending = []
+    for block in blocks:
+        *complete, rest = block.split(PAGE_SEPARATOR)
+        for text in complete:
+            pending.append(text)
+            yield page_number, "".join(pending)
+            pending = []
+            page_number += 1
+        pending.append(rest)
+    yield page_number, "".join(pending)
+
+
+def _iter_artifact_segments(path: str) -> Iterator[tuple[int, str]]:
+    yield from _iter_pages(_iter_artifact_blocks(path))
+
+
+@contextmanager
+def _document_stage(document_id: str):
+    db = SessionLocal()
+    document = None
+    try:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        yield db, document
+    except Exception:
+        db.rollback()
+        if document is not None:
+            try:
+                document.document_status = "FAILED"
+                db.commit()
+            except Exception:
+                db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _is_finished(document) -> bool:
+    return document is None or document.document_status == "EXTRACTED"
+
+
+def _download_artifact(storage: StorageService, document_id: str, artifact: str, directory: str) -> str:
+    path = os.path.join(directory, os.path.basename(artifact_name(document_id, artifact)))
+    storage.download_file(artifact_name(document_id, artifact), path)
+    return path
+
+
+def run_parse_stage(document_id: str) -> str:
+    """Download the upload and write its page texts to the extracted-text artifact."""
+    with _document_stage(document_id) as (db, document):
+        if _is_finished(document):
+            return document_id
+
+        document.document_status = "PROCESSING"
+        db.commit()
+
+        if reuse_ingested_duplicate(db, document):
+            bump_index_generation(document)
+            document.document_status = "EXTRACTED"
+            db.commit()
+            publish_index_generations([document])
+            return document_id
+
+        storage = StorageService()
+        if storage.exists(artifact_name(document_id, EXTRACTED_ARTIFACT)):
+            return document_id
+
+        suffix = os.path.splitext(document.file_name or "")[1]
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, f"source{suffix}")
+            storage.download_file(document.storage_path, source_path)
+            artifact_path = os.path.join(directory, f"{EXTRACTED_ARTIFACT}.txt")
+            pages = _write_segments(artifact_path, iter_document_segments(source_path))
+            storage.upload_path(artifact_path, artifact_name(document_id, EXTRACTED_ARTIFACT))
+        print(f"Parsed {pages} pages for document {document_id}")
+    return document_id
+
+
+def run_redact_stage(document_id: str) -> str:
+    """
+    Stream the extracted-text artifact through the redactor in blocks into the
+    redacted-text artifact, and store the sentence index of the redacted text
+    for the analyzers. No redaction spans a page break.
+    """
+    with _document_stage(document_id) as (_db, document):
+        if _is_finished(document):
+            return document_id
+
+        storage = StorageService()
+        redacted_artifact = _redacted_artifact()
+        if storage.exists(artifact_name(document_id, redacted_artifact)):
+            return document_id
+
+        redaction_count = 0
+        index = SentenceIndex()
+        with tempfile.TemporaryDirectory() as directory:
+            extracted_path = _download_artifact(storage, document_id, EXTRACTED_ARTIFACT, directory)
+            redacted_path = os.path.join(directory, f"{redacted_artifact}.txt")
+            index_path = os.path.join(directory, os.path.basename(artifact_name(document_id, SENTENCE_INDEX_ARTIFACT)))
+
+            def _redacted_windows():
+                nonlocal redaction_count
+                # Windows are written as soon as they are redacted, so even a
+                # single-page CSV/XLSX export is never redacted as one string.
+                with open(redacted_path, "w", encoding="utf-8") as file:
+                    for window, window_redactions in redact_stream(
+                        _iter_artifact_blocks(extracted_path), separator=PAGE_SEPARATOR
+                    ):
+                        redaction_count += len(window_redactions)
+                        file.write(window)
+                        yield window
+
+            for page_number, page_text in _iter_pages(_redacted_windows()):
+                index.add_page(page_number, page_text)
+            index.dump(index_path)
+            # The redacted artifact marks the stage as done, so it is uploaded last.
+            storage.upload_path(index_path, artifact_name(document_id, SENTENCE_INDEX_ARTIFACT))
+            storage.upload_path(redacted_path, artifact_name(document_id, redacted_artifact))
+        print("PII Redactions Applied:", redaction_count)
+    return document_id
+
+
+def run_embed_stage(document_id: str) -> str:
+    """Chunk and embed the redacted-text artifact. Safe to retry: chunks are upserted by id."""
+    with _document_stage(document_id) as (db, document):
+        if _is_finished(document):
+            return document_id
+
+        storage = StorageService()
+        with tempfile.TemporaryDirectory() as directory:
+            redacted_path = _download_artifact(storage, document_id, _redacted_artifact(), directory)
+            chunk_count = store_redacted_segments(document_id, _iter_artifact_segments(redacted_path))
+        bump_index_generation(document)
+        db.commit()
+        publish_index_generations([document])
+        print(f"Stored {chunk_count} chunks for document {document_id}")
+    return document_id
+
+
+def _load_sentence_index(storage: StorageService, document_id: str) -> SentenceIndex:
+    """The index written by the redact stage, rebuilt from the redacted text if it is missing."""
+    with tempfile.TemporaryDirectory() as directory:
+        if storage.exists(artifact_name(document_id, SENTENCE_INDEX_ARTIFACT)):
+            return SentenceIndex.load(_download_artifact(storage, document_id, SENTENCE_INDEX_ARTIFACT, directory))
+        redacted_path = _download_artifact(storage, document_id, _redacted_artifact(), directory)
+        return SentenceIndex.from_segments(_iter_artifact_segments(redacted_path))
+
+
+def run_analyze_stage(document_id: str) -> str:
+    """Run risk detection on the redacted text."""
+    with _document_stage(document_id) as (_db, document):
+        if _is_finished(document):
+            return document_id
+
+        index = _load_sentence_index(StorageService(), document_id)
+        findings = detect_risks(index=index)
+        try:
+            record_detected_risks(document_id, findings)
+        except Exception as risk_error:
+            print(f"Risk detection failed for document {document_id}: {risk_error}")
+    return document_id
+
+
+def _mark_obligations_available(document, obligation_count: int):
+    available_at = datetime.now(timezone.utc)
+    document.obligations_available_at = available_at
+    uploaded_at = document.uploaded_at
+    if uploaded_at is None:
+        return
+    if uploaded_at.tzinfo is None:
+        uploaded_at = uploaded_at.replace(tzinfo=timezone.utc)
+    print(
+        f"Obligations available for document {document.id}: {obligation_count} obligations, "
+        f"{(available_at - uploaded_at).total_seconds():.1f}s after upload"
+    )
+
+
+async def _detect_obligations(document_id: str, index: SentenceIndex):
+    try:
+        return await detect_obligations(document_id, index.text, index=index)
+    finally:
+        # asyncio.run() discards its loop, so the Redis client opened on it is closed here.
+        await get_cache_service().aclose()
+
+
+def run_obligation_stage(document_id: str) -> str:
+    """
+    Detect obligations on the redacted text, concurrently with risk detection,
+    and persist them with their reminders in one transaction.
+    """
+    with _document_stage(document_id) as (db, document):
+        if _is_finished(document) or document.obligations_available_at is not None:
+            return document_id
+
+        index = _load_sentence_index(StorageService(), document_id)
+        detected = asyncio.run(_detect_obligations(document_id, index))
+        obligations = persist_obligations(db, document, detected, commit=False)
+        ReminderGenerator.generate_many(db, obligations, commit=False)
+        _mark_obligations_available(document, len(obligations))
+        db.commit()
+    return document_id
+
+
+def run_finalize_stage(document_id: str) -> str:
+    """Mark the document EXTRACTED once every analyzer has finished and drop the artifacts."""
+    with _document_stage(document_id) as (db, document):
+        if _is_finished(document):
+            return document_id
+
+        document.document_status = "EXTRACTED"
+        db.commit()
+
+        storage = StorageService()
+        for artifact in (EXTRACTED_ARTIFACT, _redacted_artifact(), SENTENCE_INDEX_ARTIFACT):
+            try:
+                storage.delete_file(artifact_name(document_id, artifact))
+            except Exception as cleanup_error:
+                print(f"Artifact cleanup failed for document {document_id}: {cleanup_error}")
+    return document_id
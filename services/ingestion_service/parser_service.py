@@ -1,16 +1,104 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from email import policy
 from email.parser import BytesParser
 from pathlib import Path
+from typing import Iterator
 
+from shared.config.settings import settings
 
-def _extract_pdf(path: str) -> str:
+
+def _iter_pdf_pages(path: str) -> Iterator[tuple[int, str]]:
+    import fitz
+
+    with fitz.open(path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+            yield page_number, page.get_text()
+
+
+def _pdf_page_count(path: str) -> int:
     import fitz
 
-    text_content = ""
     with fitz.open(path) as doc:
-        for page in doc:
-            text_content += page.get_text()
-    return text_content
+        return doc.page_count
+
+
+def _extract_pdf_page_range(path: str, start: int, stop: int) -> list[str]:
+    import fitz
+
+    with fitz.open(path) as doc:
+        return [doc.load_page(index).get_text() for index in range(start, stop)]
+
+
+def _pdf_page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    # Several ranges per worker keep the pool busy when some pages are much heavier than others.
+    range_size = max(1, -(-page_count // (workers * 4)))
+    return [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+
+
+def _iter_pdf_pages_parallel(path: str, page_count: int, workers: int) -> Iterator[tuple[int, str]]:
+    """(page_number, text) in order. At most two ranges per worker are in flight,
+    so extracted text that the consumer has not reached yet stays bounded."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, stop in _pdf_page_ranges(page_count, workers):
+            pending.append((start, executor.submit(_extract_pdf_page_range, path, start, stop)))
+            if len(pending) >= workers * 2:
+                start, future = pending.popleft()
+                for offset, text in enumerate(future.result()):
+                    yield start + offset + 1, text
+        while pending:
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
+
+
+def _extract_pdf_parallel(path: str, page_count: int, workers: int) -> str:
+    return "".join(text for _, text in _iter_pdf_pages_parallel(path, page_count, workers))
+
+
+def _pdf_extraction_workers() -> int:
+    return max(1, settings.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1)
+
+
+def _parallel_pdf_workers(path: str) -> tuple[int, int]:
+    """Return (workers, page_count) when the PDF qualifies for the process pool, else (1, 0)."""
+    workers = _pdf_extraction_workers()
+    if workers > 1:
+        page_count = _pdf_page_count(path)
+        if page_count >= settings.PDF_PARALLEL_PAGE_THRESHOLD:
+            return workers, page_count
+    return 1, 0
+
+
+def _extract_pdf(path: str) -> str:
+    workers, page_count = _parallel_pdf_workers(path)
+    if workers > 1:
+        try:
+            return _extract_pdf_parallel(path, page_count, workers)
+        except Exception as exc:
+            # e.g. daemonic worker processes that may not fork children
+            print(f"Parallel PDF extraction unavailable, falling back to a single process: {exc}")
+    return "".join(text for _, text in _iter_pdf_pages(path))
+
+
+def _iter_pdf_segments(path: str) -> Iterator[tuple[int, str]]:
+    workers, page_count = _parallel_pdf_workers(path)
+    if workers > 1:
+        try:
+            # Materialize the first range before yielding so a pool that cannot
+            # start falls back cleanly instead of failing mid-document.
+            pages = _iter_pdf_pages_parallel(path, page_count, workers)
+            first = next(pages, None)
+        except Exception as exc:
+            print(f"Parallel PDF extraction unavailable, falling back to a single process: {exc}")
+        else:
+            if first is not None:
+                yield first
+                yield from pages
+            return
+    yield from _iter_pdf_pages(path)
 
 
 def _extract_text_file(path: str) -> str:
@@ -145,3 +233,12 @@ def extract_text_from_document(path: str) -> str:
     raise ValueError(f"Unsupported document type: {extension or 'unknown'}")
 
 
+def iter_document_segments(path: str) -> Iterator[tuple[int, str]]:
+    """
+    Yield (page_number, text) segments without materializing the whole document.
+    PDFs are read one page at a time; other formats yield a single segment as page 1.
+    """
+    if Path(path).suffix.lower() == ".pdf":
+        yield from _iter_pdf_segments(path)
+        return
+    yield 1, extract_text_from_document(path)
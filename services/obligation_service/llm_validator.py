@@ -1,14 +1,17 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from services.obligation_service.schemas import ObligationStructured
+from services.obligation_service.schemas import ObligationStructured, ObligationStructuredBatch, ObligationValidation
+from services.obligation_service.validation_cache import get_validation_cache
 from shared.config.settings import settings
 
 
 # ---------------------------
 # Initialize LLM
 # ---------------------------
+VALIDATOR_MODEL = "gpt-4o-mini"
+
 llm = ChatOpenAI(
-    model="gpt-4o-mini",
+    model=VALIDATOR_MODEL,
     temperature=0,
     api_key=settings.OPENAI_API_KEY,
 )
@@ -23,9 +26,12 @@ Extract obligation details from the sentence.
 
 Return ONLY valid JSON with structure:
 {{
-    "title": string,
-    "due_date": ISO date string or null,
-    "confidence_score": float between 0 and 1
+    "is_obligation": boolean,
+    "obligation": {{
+        "title": string,
+        "due_date": ISO date string or null,
+        "confidence_score": float between 0 and 1
+    }} or null when the sentence is not an obligation
 }}
 
 Sentence:
@@ -34,21 +40,106 @@ Sentence:
 )
 
 
+def _verdict(obligation: ObligationStructured | None) -> ObligationValidation:
+    return ObligationValidation(is_obligation=obligation is not None, obligation=obligation)
+
+
 # ---------------------------
 # Validator Function
 # ---------------------------
-async def validate_obligation(sentence: str) -> ObligationStructured | None:
+async def validate_obligation(sentence: str) -> ObligationValidation | None:
     """
-    Validate and structure obligation using LLM
+    Validate and structure obligation using LLM.
+    Returns None when the LLM call fails, so callers can tell a failure from
+    a "not an obligation" verdict.
     """
 
-    try:
-        chain = prompt | llm.with_structured_output(ObligationStructured)
+    cache = get_validation_cache()
+    found, cached = await cache.aget(sentence, VALIDATOR_MODEL)
+    if found:
+        return _verdict(cached)
 
-        result = await chain.ainvoke({"sentence": sentence})
+    try:
+        chain = prompt | llm.with_structured_output(ObligationValidation)
 
-        return result
+        validation = await chain.ainvoke({"sentence": sentence})
 
     except Exception as e:
         print(f"LLM validation failed: {e}")
         return None
+
+    if validation.is_obligation and validation.obligation is None:
+        print("LLM validation returned an obligation verdict without details")
+        return None
+
+    result = validation.obligation if validation.is_obligation else None
+    await cache.aset(sentence, VALIDATOR_MODEL, result)
+    return _verdict(result)
+
+
+# ---------------------------
+# Batched Prompt Template
+# ---------------------------
+batch_prompt = ChatPromptTemplate.from_template(
+    """
+Extract obligation details from each numbered sentence.
+
+Return ONLY valid JSON with structure:
+{{
+    "items": [
+        {{
+            "index": sentence number,
+            "obligation": {{
+                "title": string,
+                "due_date": ISO date string or null,
+                "confidence_score": float between 0 and 1
+            }} or null when the sentence is not an obligation
+        }}
+    ]
+}}
+
+Sentences:
+{sentences}
+"""
+)
+
+
+async def validate_obligations_batch(sentences: list[str]) -> list[ObligationValidation | None]:
+    """
+    Validate many sentences in one structured-output call.
+    Returns one entry per input sentence, in input order; None for sentences
+    the call failed on or the model skipped.
+    """
+
+    results: list[ObligationValidation | None] = [None] * len(sentences)
+    cache = get_validation_cache()
+    pending: list[int] = []
+    for position, (found, cached) in enumerate(await cache.aget_many(sentences, VALIDATOR_MODEL)):
+        if found:
+            results[position] = _verdict(cached)
+        else:
+            pending.append(position)
+
+    if not pending:
+        return results
+
+    try:
+        chain = batch_prompt | llm.with_structured_output(ObligationStructuredBatch)
+
+        numbered = "\n".join(f"[{idx}] {sentences[position]}" for idx, position in enumerate(pending))
+        batch = await chain.ainvoke({"sentences": numbered})
+
+    except Exception as e:
+        print(f"LLM batch validation failed: {e}")
+        return results
+
+    # Sentences the model skipped stay uncached so a later call can retry them.
+    validated: dict[str, ObligationStructured | None] = {}
+    for item in batch.items:
+        if 0 <= item.index < len(pending):
+            position = pending[item.index]
+            results[position] = _verdict(item.obligation)
+            validated[sentences[position]] = item.obligation
+    await cache.aset_many(validated, VALIDATOR_MODEL)
+
+    return results
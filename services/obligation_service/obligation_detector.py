@@ -1,6 +1,10 @@
+import asyncio
 from typing import List
-from services.obligation_service.rule_engine import extract_candidates
-from services.obligation_service.schemas import ObligationCreate
+from services.extraction_service.sentence_index import SentenceIndex
+from services.obligation_service.rule_engine import extract_candidates, resolve_deterministically
+from services.obligation_service.schemas import ObligationCreate, ObligationStructured, ObligationValidation
+from services.obligation_service.validation_cache import get_validation_cache
+from shared.config.settings import settings
 from shared.models.obligation import Obligation
 from services.obligation_service.obligation_repository import ObligationRepository
 import uuid
@@ -17,38 +21,132 @@ def _resolve_validator():
         return _fallback_validator
 
 
+def _resolve_batch_validator():
+    try:
+        from services.obligation_service.llm_validator import validate_obligations_batch
+        return validate_obligations_batch
+    except ModuleNotFoundError:
+        async def _fallback_batch_validator(sentences: list[str]):
+            return [None] * len(sentences)
+
+        return _fallback_batch_validator
+
+
+async def _gather_bounded(coroutine_factories, limit: int) -> list:
+    """Run coroutines with at most `limit` in flight; results keep the input order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(factory):
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(*(_run(factory) for factory in coroutine_factories))
+
+
+async def validate_candidates(sentences: list[str]) -> list[ObligationValidation | None]:
+    """
+    Validate candidate sentences concurrently, bounded by OBLIGATION_VALIDATION_CONCURRENCY.
+    Each result is the LLM verdict, or None when validation failed.
+    With OBLIGATION_VALIDATION_BATCH_SIZE > 0, sentences are packed into batched
+    structured-output calls instead of one call per sentence.
+    """
+    limit = settings.OBLIGATION_VALIDATION_CONCURRENCY
+    batch_size = settings.OBLIGATION_VALIDATION_BATCH_SIZE
+
+    if batch_size > 0:
+        validate_batch = _resolve_batch_validator()
+        batches = [sentences[start:start + batch_size] for start in range(0, len(sentences), batch_size)]
+        batch_results = await _gather_bounded(
+            [lambda batch=batch: validate_batch(batch) for batch in batches],
+            limit,
+        )
+        return [result for results in batch_results for result in results]
+
+    validate_obligation = _resolve_validator()
+    return await _gather_bounded(
+        [lambda sentence=sentence: validate_obligation(sentence) for sentence in sentences],
+        limit,
+    )
+
+
 async def detect_obligations(
     document_id: str,
     text: str,
+    stats: dict | None = None,
+    index: SentenceIndex | None = None,
 ) -> List[ObligationCreate]:
-    """Main orchestration function for obligation detection"""
-    validate_obligation = _resolve_validator()
+    """
+    Main orchestration function for obligation detection.
+    Pass the document's SentenceIndex to reuse its sentence boundaries, and a
+    `stats` dict to receive per-document counters
+    (candidates, resolved_by_rules, llm_validations, llm_rejected).
+    Candidates the LLM rejects are dropped; only failed validations fall back
+    to a low-confidence obligation.
+    """
 
     obligations: List[ObligationCreate] = []
+    stats = {} if stats is None else stats
+    stats.update({"candidates": 0, "resolved_by_rules": 0, "llm_validations": 0, "llm_rejected": 0})
 
     # -----------------------
     # Step 1: Extract Candidates
     # -----------------------
-    candidates = extract_candidates(text)
+    candidates = extract_candidates(text, index=index)
+    stats["candidates"] = len(candidates)
 
     if not candidates:
         return obligations
 
     # -----------------------
-    # Step 2: Validate via LLM
+    # Step 2: Deterministic fast path
     # -----------------------
+    resolved: list[ObligationStructured | None] = []
     for candidate in candidates:
+        structured = resolve_deterministically(candidate.sentence)
+        if structured and structured.confidence_score >= settings.OBLIGATION_FAST_PATH_MIN_CONFIDENCE:
+            resolved.append(structured)
+        else:
+            resolved.append(None)
+
+    # -----------------------
+    # Step 3: Validate the rest via LLM
+    # -----------------------
+    escalated = [idx for idx, structured in enumerate(resolved) if structured is None]
+    validated = await validate_candidates([candidates[idx].sentence for idx in escalated])
+    llm_results = dict(zip(escalated, validated))
+
+    stats["resolved_by_rules"] = len(candidates) - len(escalated)
+    stats["llm_validations"] = len(escalated)
+    stats["llm_rejected"] = sum(1 for verdict in validated if verdict is not None and not verdict.is_obligation)
+    print(
+        f"Obligation detection for document {document_id}: {stats['candidates']} candidates, "
+        f"{stats['resolved_by_rules']} resolved by rules (LLM calls avoided), "
+        f"{stats['llm_validations']} sent to LLM, {stats['llm_rejected']} rejected by LLM"
+    )
+    # Process-wide, so it shows how many validator calls the cache has saved so far.
+    cache_stats = get_validation_cache().stats()
+    print(
+        f"Obligation validation cache: hit rate {cache_stats['hit_rate']:.1%} "
+        f"({cache_stats['local_hits']} local, {cache_stats['shared_hits']} shared, {cache_stats['misses']} misses)"
+    )
 
-        structured = await validate_obligation(candidate.sentence)
+    for idx, candidate in enumerate(candidates):
+        verdict = llm_results.get(idx)
+        if verdict is not None and not verdict.is_obligation:
+            continue
+        structured = resolved[idx] or (verdict.obligation if verdict is not None else None)
+        detected_by = "rule_engine" if resolved[idx] else "llm"
 
         if not structured:
-            # fallback with low confidence
+            # validation failed: fall back with low confidence
             obligations.append(
                 ObligationCreate(
                     document_id=document_id,
                     title=candidate.sentence[:100],
                     due_date=None,
                     confidence_score=0.3,
+                    detected_by="rule_engine",
+                    source_text=candidate.sentence,
                 )
             )
             continue
@@ -59,14 +157,15 @@ async def detect_obligations(
                 title=structured.title,
                 due_date=structured.due_date,
                 confidence_score=structured.confidence_score,
+                detected_by=detected_by,
+                source_text=candidate.sentence,
             )
         )
 
     return obligations
 
-def persist_obligation(db, document, normalized_obligation):
-
-    obligation = Obligation(
+def _build_obligation(document, normalized_obligation) -> Obligation:
+    return Obligation(
         id=uuid.uuid4(),
         document_id=document.id,
         user_id=document.user_id,
@@ -83,4 +182,17 @@ def persist_obligation(db, document, normalized_obligation):
         status="PENDING"
     )
 
-    ObligationRepository.create(db, obligation)
+
+def persist_obligation(db, document, normalized_obligation):
+    ObligationRepository.create(db, _build_obligation(document, normalized_obligation))
+
+
+def persist_obligations(db, document, normalized_obligations, commit: bool = True) -> list[Obligation]:
+    obligations = [_build_obligation(document, item) for item in normalized_obligations]
+    return ObligationRepository.create_many(db, obligations, commit=commit)
+
+
+def clone_document_obligations(db, source_document_id: str, document, commit: bool = True) -> list[Obligation]:
+    """Copy the obligations of an identical, already ingested document to `document` as new PENDING rows."""
+    sources = ObligationRepository.get_by_document(db, source_document_id)
+    return ObligationRepository.create_many(db, [_build_obligation(document, item) for item in sources], commit=commit)
@@ -9,6 +9,17 @@ class ObligationRepository:
         db.refresh(obligation)
         return obligation
 
+    @staticmethod
+    def create_many(db: Session, obligations: list[Obligation], commit: bool = True) -> list[Obligation]:
+        if not obligations:
+            return []
+        db.add_all(obligations)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return obligations
+
     @staticmethod
     def get_by_document(db: Session, document_id):
         return (
@@ -9,15 +9,27 @@ class ReminderGenerator:
     DEFAULT_OFFSETS = [30, 7, 1]
 
     @staticmethod
-    def generate(db, obligation):
-
+    def build(obligation) -> list[Reminder]:
         if not obligation.due_date:
-            return
+            return []
 
-        for days_before in ReminderGenerator.DEFAULT_OFFSETS:
-            remind_time = obligation.due_date - timedelta(days=days_before)
-            reminder = Reminder(
+        return [
+            Reminder(
                 obligation_id=obligation.id,
-                remind_at=remind_time
+                remind_at=obligation.due_date - timedelta(days=days_before)
             )
-            ReminderRepository.create(db, reminder)
+            for days_before in ReminderGenerator.DEFAULT_OFFSETS
+        ]
+
+    @staticmethod
+    def generate(db, obligation):
+        return ReminderGenerator.generate_many(db, [obligation])
+
+    @staticmethod
+    def generate_many(db, obligations, commit: bool = True):
+        reminders = [
+            reminder
+            for obligation in obligations
+            for reminder in ReminderGenerator.build(obligation)
+        ]
+        return ReminderRepository.create_many(db, reminders, commit=commit)
@@ -12,6 +12,17 @@ class ReminderRepository:
         db.refresh(reminder)
         return reminder
 
+    @staticmethod
+    def create_many(db: Session, reminders: list[Reminder], commit: bool = True) -> list[Reminder]:
+        if not reminders:
+            return []
+        db.add_all(reminders)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return reminders
+
     @staticmethod
     def get_pending_reminders(db: Session, current_time):
         return (
@@ -1,6 +1,8 @@
 import re
-from typing import List
-from services.obligation_service.schemas import ObligationCandidate
+from datetime import datetime
+from typing import Iterator, List
+from services.extraction_service.sentence_index import SentenceIndex
+from services.obligation_service.schemas import ObligationCandidate, ObligationStructured
 
 
 # ---------------------------
@@ -30,33 +32,148 @@ DATE_PATTERNS = [
 ]
 
 
-def _contains_keyword(sentence: str) -> bool:
-    sentence_lower = sentence.lower()
-    return any(keyword in sentence_lower for keyword in OBLIGATION_KEYWORDS)
+_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
+
+# Keywords and DATE_PATTERNS folded into one alternation, matched against the
+# lowercased text so the document is scanned once; hits are mapped to the
+# sentences of the document's SentenceIndex. Every branch starts with a
+# literal character (dates get one branch per leading digit), which lets the
+# regex engine skip ahead to positions that can start a match. Whitespace inside
+# dates may not cross a newline, which is always a sentence boundary. The leading
+# word boundary of date branches is checked in _starts_word instead.
+_DATE_TAIL = (
+    r"(?:\d?[^\S\n]+(?:" + _MONTHS + r")[^\S\n]+\d{4}"
+    r"|\d?/\d{1,2}/\d{4}"
+    r"|\d{3}-\d{2}-\d{2})\b"
+)
+_CANDIDATE_PATTERN = re.compile(
+    "|".join(
+        [re.escape(keyword) for keyword in OBLIGATION_KEYWORDS]
+        + [r"within[^\S\n]+\d+[^\S\n]+days\b"]
+        + [digit + _DATE_TAIL for digit in "0123456789"]
+    )
+)
+
+
+def _starts_word(text: str, match: re.Match) -> bool:
+    """Keywords match anywhere; dates and "within" must start at a word boundary."""
+    if match.group()[0] not in "0123456789w" or match.group() in OBLIGATION_KEYWORDS:
+        return True
+    previous = text[match.start() - 1] if match.start() else ""
+    return not (previous.isalnum() or previous == "_")
+
+
+def iter_candidate_spans(index: SentenceIndex) -> Iterator[tuple[int, int]]:
+    """
+    Yield (start, end) character offsets of every indexed sentence that contains
+    an obligation keyword or a date, without its trailing full stop.
+    """
+    text = index.text
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters lowercase to two code points; keep offsets aligned.
+        lowered = "".join(char.lower()[0] for char in text)
+
+    position = 0
+    while True:
+        match = _CANDIDATE_PATTERN.search(lowered, position)
+        if match is None:
+            return
+        if not _starts_word(lowered, match):
+            position = match.start() + 1
+            continue
 
+        sentence_idx = index.locate(match.start())
+        if sentence_idx is None:
+            position = match.end()
+            continue
 
-def _contains_date(sentence: str) -> bool:
-    return any(re.search(pattern, sentence, re.IGNORECASE) for pattern in DATE_PATTERNS)
+        start, end = index.span(sentence_idx)
+        position = end
+        while end > start and (text[end - 1] == "." or text[end - 1].isspace()):
+            end -= 1
+        yield start, end
 
 
-def extract_candidates(text: str) -> List[ObligationCandidate]:
+def extract_candidates(text: str, index: SentenceIndex | None = None) -> List[ObligationCandidate]:
     """ Extract obligation candidate sentences from document text """
 
-    if not text:
+    index = index if index is not None else SentenceIndex.from_text(text or "")
+    if not index.text:
         return []
 
-    # Simple sentence splitting
-    sentences = re.split(r"[.\n]", text)
+    return [
+        ObligationCandidate(sentence=index.text[start:end], start=start, end=end)
+        for start, end in iter_candidate_spans(index)
+    ]
 
-    candidates = []
 
-    for sentence in sentences:
-        cleaned = sentence.strip()
-
-        if not cleaned:
+# ---------------------------
+# Deterministic Fast Path
+# ---------------------------
+FAST_PATH_KEYWORDS = ["due", "expires", "expiry", "deadline"]
+
+_FAST_PATH_KEYWORD_PATTERN = re.compile(r"\b(?:" + "|".join(FAST_PATH_KEYWORDS) + r")\b", re.IGNORECASE)
+_MODAL_PATTERN = re.compile(r"\b(?:must|shall|required)\b", re.IGNORECASE)
+_ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_LONG_DATE_PATTERN = re.compile(
+    r"\b(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})\b",
+    re.IGNORECASE,
+)
+_AMBIGUOUS_DATE_PATTERN = re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b|\bwithin\s+\d+\s+days\b", re.IGNORECASE)
+_DATE_PREPOSITION_PATTERN = re.compile(r"\s*\b(?:on|by|before|until|from|of)\s*$", re.IGNORECASE)
+
+
+def _find_unambiguous_dates(sentence: str) -> list[tuple[re.Match, datetime]]:
+    found = []
+    for match in _ISO_DATE_PATTERN.finditer(sentence):
+        try:
+            found.append((match, datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))))
+        except ValueError:
             continue
-
-        if _contains_keyword(cleaned) or _contains_date(cleaned):
-            candidates.append(ObligationCandidate(sentence=cleaned))
-
-    return candidates
+    for match in _LONG_DATE_PATTERN.finditer(sentence):
+        try:
+            found.append((match, datetime.strptime(" ".join(match.groups()).title(), "%d %B %Y")))
+        except ValueError:
+            continue
+    return found
+
+
+def _extract_title(sentence: str, date_match: re.Match) -> str:
+    before = _DATE_PREPOSITION_PATTERN.sub("", sentence[:date_match.start()])
+    title = f"{before} {sentence[date_match.end():]}"
+    title = re.sub(r"\s+([,.;:])", r"\1", re.sub(r"\s+", " ", title)).strip(" ,.;:-")
+    return title[:1].upper() + title[1:100]
+
+
+def resolve_deterministically(sentence: str) -> ObligationStructured | None:
+    """
+    Structure a candidate without the LLM when it names a due/expiry keyword and
+    an unambiguous calendar date (ISO or "12 March 2025"). The confidence score
+    reflects how clear-cut the sentence is; callers compare it to a threshold.
+    """
+    if not _FAST_PATH_KEYWORD_PATTERN.search(sentence):
+        return None
+
+    dates = _find_unambiguous_dates(sentence)
+    if not dates:
+        return None
+
+    date_match, due_date = dates[0]
+    title = _extract_title(sentence, date_match)
+    if len(title) < 3:
+        return None
+
+    confidence = 0.7
+    if len(dates) == 1:
+        confidence += 0.15
+    if _MODAL_PATTERN.search(sentence):
+        confidence += 0.05
+    if _AMBIGUOUS_DATE_PATTERN.search(sentence):
+        confidence -= 0.2
+
+    return ObligationStructured(
+        title=title,
+        due_date=due_date,
+        confidence_score=round(min(confidence, 0.95), 2),
+    )
@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field
 class ObligationCandidate(BaseModel):
     """Represents rule-based extracted candidate sentence"""
     sentence: str = Field(..., description="Sentence containing possible obligation")
+    start: Optional[int] = Field(None, description="Character offset of the sentence in the document text")
+    end: Optional[int] = Field(None, description="Character offset just past the sentence")
 
 
 class ObligationStructured(BaseModel):
@@ -15,8 +17,35 @@ class ObligationStructured(BaseModel):
     due_date: Optional[datetime] = None
     confidence_score: float = Field(..., ge=0.0, le=1.0)
 
+class ObligationValidation(BaseModel):
+    """Structured output of a single-sentence validation call; an explicit verdict lets negatives be cached"""
+
+    is_obligation: bool
+    obligation: Optional[ObligationStructured] = None
+
+
+class ObligationBatchItem(BaseModel):
+    """One validated sentence of a batched LLM call, keyed by its position in the prompt"""
+
+    index: int = Field(..., ge=0)
+    obligation: Optional[ObligationStructured] = None
+
+
+class ObligationStructuredBatch(BaseModel):
+    """Structured output of a batched validation call"""
+
+    items: list[ObligationBatchItem] = Field(default_factory=list)
+
+
 class ObligationCreate(BaseModel):
     document_id: str
     title: str
     due_date: Optional[datetime]
     confidence_score: float
+    detected_by: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    recurrence: Optional[str] = None
+    priority: Optional[str] = None
+    risk_level: Optional[str] = None
+    source_text: Optional[str] = None
@@ -0,0 +1,127 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from services.obligation_service.schemas import ObligationStructured
+from shared.cache import get_cache_service
+from shared.config.settings import settings
+
+# Bump when the validator prompt or its output schema changes so cached
+# answers from the old prompt stop being served.
+VALIDATION_PROMPT_VERSION = "v2"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sentence(sentence: str) -> str:
+    return _WHITESPACE.sub(" ", sentence or "").strip().strip(".;:").lower()
+
+
+class ObligationValidationCache:
+    """
+    Two-tier cache for LLM obligation validation results: an in-process LRU in
+    front of the shared CacheService. Negative results (not an obligation) are
+    cached too; validator failures are never stored.
+    """
+
+    def __init__(self, max_local_entries: int):
+        self.max_local_entries = max(1, max_local_entries)
+        self._local: OrderedDict[str, dict | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _key(self, sentence: str, model: str) -> str:
+        sentence_hash = hashlib.sha256(normalize_sentence(sentence).encode("utf-8")).hexdigest()
+        return f"obligation:validation:{VALIDATION_PROMPT_VERSION}:{model}:{sentence_hash}"
+
+    def _remember(self, key: str, payload: dict | None):
+        with self._lock:
+            self._local[key] = payload
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def _get_local(self, key: str) -> tuple[bool, dict | None]:
+        with self._lock:
+            if key not in self._local:
+                return False, None
+            self._local.move_to_end(key)
+            self.local_hits += 1
+            return True, self._local[key]
+
+    def _get_shared(self, key: str, cached) -> tuple[bool, ObligationStructured | None]:
+        if isinstance(cached, dict) and "obligation" in cached:
+            payload = cached["obligation"]
+            self._remember(key, payload)
+            with self._lock:
+                self.shared_hits += 1
+            return True, ObligationStructured.model_validate(payload) if payload else None
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _store(self, key: str, result: ObligationStructured | None) -> dict:
+        payload = result.model_dump(mode="json") if result is not None else None
+        self._remember(key, payload)
+        return {"obligation": payload}
+
+    async def aget_many(self, sentences: list[str], model: str) -> list[tuple[bool, ObligationStructured | None]]:
+        """
+        (found, result) per sentence; a found None is a cached negative. Local
+        misses are read from Redis in one async round trip.
+        """
+        keys = [self._key(sentence, model) for sentence in sentences]
+        results: list[tuple[bool, ObligationStructured | None]] = []
+        pending: dict[int, str] = {}
+        for position, key in enumerate(keys):
+            found, payload = self._get_local(key)
+            results.append((found, ObligationStructured.model_validate(payload) if payload else None))
+            if not found:
+                pending[position] = key
+
+        if pending:
+            cached = await get_cache_service().aget_many_json(list(pending.values()))
+            for position, key in pending.items():
+                results[position] = self._get_shared(key, cached.get(key))
+        return results
+
+    async def aget(self, sentence: str, model: str) -> tuple[bool, ObligationStructured | None]:
+        return (await self.aget_many([sentence], model))[0]
+
+    async def aset_many(self, results: dict[str, ObligationStructured | None], model: str):
+        payloads = {}
+        for sentence, result in results.items():
+            key = self._key(sentence, model)
+            payloads[key] = self._store(key, result)
+        if payloads:
+            await get_cache_service().aset_many_json(
+                payloads,
+                ttl_seconds=settings.OBLIGATION_VALIDATION_CACHE_TTL_SECONDS,
+            )
+
+    async def aset(self, sentence: str, model: str, result: ObligationStructured | None):
+        await self.aset_many({sentence: result}, model)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_validation_cache: ObligationValidationCache | None = None
+
+
+def get_validation_cache() -> ObligationValidationCache:
+    global _validation_cache
+    if _validation_cache is None:
+        _validation_cache = ObligationValidationCache(settings.OBLIGATION_VALIDATION_LOCAL_CACHE_SIZE)
+    return _validation_cache
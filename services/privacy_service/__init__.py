@@ -1,3 +1,17 @@
-from services.privacy_service.pii_redactor import redact_text
+from services.privacy_service.pii_redactor import (
+    REDACTION_VERSION,
+    applied_redaction_version,
+    redact_if_stale,
+    redact_segments,
+    redact_stream,
+    redact_text,
+)
 
-__all__ = ["redact_text"]
+__all__ = [
+    "REDACTION_VERSION",
+    "applied_redaction_version",
+    "redact_if_stale",
+    "redact_text",
+    "redact_segments",
+    "redact_stream",
+]
@@ -1,8 +1,16 @@
+import os
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
 
 from shared.config.settings import settings
 
+# Recorded with every stored chunk. Bump when the patterns, their precedence or
+# the placeholder format change, then run the re-redaction job so stored chunks
+# catch up; until they do, readers redact them again at query time.
+REDACTION_VERSION = "v1"
+
 EMAIL_PATTERN = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
 PHONE_PATTERN = re.compile(
     r"(?<!\w)(?:"
@@ -12,8 +20,56 @@ PHONE_PATTERN = re.compile(
     r")(?!\w)"
 )
 SSN_PATTERN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+# Reference definition of a card number. It is not run directly: on digit runs
+# with long separators it backtracks heavily, so _card_spans reproduces its
+# matches in linear time on the runs found by _CARD_RUN.
 CARD_PATTERN = re.compile(r"\b(?:\d[ -]*?){13,19}\b")
 
+_CARD_MIN_DIGITS = 13
+_CARD_MAX_DIGITS = 19
+# A maximal run of digit blocks joined by spaces and hyphens.
+_CARD_RUN = r"\b\d++(?:[ -]++\d++)*+"
+_CARD_RUN_PATTERN = re.compile(_CARD_RUN)
+_DIGIT_BLOCK_PATTERN = re.compile(r"\d+")
+
+# Sequential redaction order: a type wins over every type after it.
+_PII_TYPES = ("EMAIL", "SSN", "PHONE", "CARD")
+_PATTERNS = {"EMAIL": EMAIL_PATTERN, "SSN": SSN_PATTERN, "PHONE": PHONE_PATTERN}
+_MAX_MATCH_LENGTH = {"SSN": 11, "PHONE": 17}
+_EMAIL_TAIL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]*")
+_EMAIL_TAIL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-@")
+_TYPE_RANK = {pii_type: rank for rank, pii_type in enumerate(_PII_TYPES)}
+_HIGHER_TYPES = {pii_type: _PII_TYPES[:rank] for pii_type, rank in _TYPE_RANK.items()}
+# Digit sum of each ASCII digit doubled, used by the Luhn check.
+_LUHN_DOUBLED = str.maketrans("0123456789", "0246813579")
+
+# One pass over the text; the alternation order mirrors the redaction order.
+# Every alternative starts with a character class so the engine can rule it out
+# from the current character alone, and the word-boundary checks of the
+# reference patterns move into lookbehinds after that first character. DIGITS
+# picks up candidate card runs for _card_spans; a run stops in front of an SSN
+# or phone number starting inside it, since those are redacted first.
+_PHONE_SEP = r"[-.\s]"
+_PII_PATTERN = re.compile(
+    r"[a-zA-Z0-9._%+-](?<!\w[a-zA-Z0-9_])(?<!\W[.%+-])(?<!^[.%+-])"
+    r"(?P<EMAIL>[a-zA-Z0-9._%+-]*+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b)"
+    r"|\d(?<!\w\d)(?:"
+    r"(?P<SSN>\d{2}-\d{2}-\d{4}\b)"
+    rf"|(?P<PHONE>(?:\d{{0,2}}{_PHONE_SEP}\d{{3}}|\d{{2}}\)?){_PHONE_SEP}\d{{3}}{_PHONE_SEP}\d{{4}}(?!\w))"
+    rf"|(?P<DIGITS>\d*+(?:[ -]++(?!{SSN_PATTERN.pattern}|{PHONE_PATTERN.pattern})\d++)*+)"
+    r")"
+    rf"|\+(?<!\w\+)(?P<PHONE_INTL>\d{{1,3}}{_PHONE_SEP}\d{{3}}{_PHONE_SEP}\d{{3}}{_PHONE_SEP}\d{{4}}(?!\w))"
+    rf"|\((?<!\w\()(?P<PHONE_AREA>\d{{3}}\)?{_PHONE_SEP}\d{{3}}{_PHONE_SEP}\d{{4}}(?!\w))"
+)
+_GROUP_TYPES = {"PHONE_INTL": "PHONE", "PHONE_AREA": "PHONE"}
+
+# A window may end after a character no redaction can contain: punctuation that
+# is in none of the patterns, or whitespace not followed by a digit, space or
+# hyphen (phone and card separators are). A line break is also a cut unless a
+# phone number spans it. Each of these reads like the start or end of the text
+# to the patterns' boundary checks, so windows redact exactly like the whole text.
+_WINDOW_CUT_PATTERN = re.compile(r"[^\w\s.%+@()\-]|\s(?=[^\d\s-])|\n")
+
 
 def _luhn_valid(number: str) -> bool:
     digits = [int(d) for d in number if d.isdigit()]
@@ -31,13 +87,126 @@ def _luhn_valid(number: str) -> bool:
     return checksum % 10 == 0
 
 
-def redact_text(text: str) -> tuple[str, list[dict]]:
-    if not settings.PII_REDACTION_ENABLED:
-        return text, []
+def _luhn_valid_digits(digits: str) -> bool:
+    """_luhn_valid for a string of 13-19 digits, without per-digit Python work."""
+    if not digits.isascii():
+        return _luhn_valid(digits)
+    # Every second digit from the right is doubled; the byte sum adds the digits.
+    checked = (digits[-1::-2] + digits[-2::-2].translate(_LUHN_DOUBLED)).encode("ascii")
+    return (sum(checked) - ord("0") * len(checked)) % 10 == 0
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _digit_count(text: str, run_start: int, run_end: int) -> int:
+    return run_end - run_start - text.count(" ", run_start, run_end) - text.count("-", run_start, run_end)
+
+
+def _card_spans(text: str, run_start: int, run_end: int, boundary_at_end: bool | None = None) -> list[tuple[int, int]]:
+    """
+    Luhn-valid CARD_PATTERN matches inside one digit run, in linear time.
+    `boundary_at_end` overrides the character after the run, e.g. when a
+    placeholder will be inserted there.
+
+    The run is a sequence of digit blocks split by separators. A match starts at
+    a block, crosses separators until it holds at least 13 digits, and then has
+    to end with that block (at most 19 digits), because the regex only stops at
+    a word boundary and takes adjacent digits greedily.
+    """
+    if _digit_count(text, run_start, run_end) < _CARD_MIN_DIGITS:
+        return []
+
+    blocks = [match.span() for match in _DIGIT_BLOCK_PATTERN.finditer(text, run_start, run_end)]
+    if boundary_at_end is None:
+        boundary_at_end = run_end >= len(text) or not _is_word(text[run_end])
+
+    spans = []
+    first = 0
+    last = -1
+    count = 0
+    while first < len(blocks):
+        while count < _CARD_MIN_DIGITS and last + 1 < len(blocks):
+            last += 1
+            count += blocks[last][1] - blocks[last][0]
+        if count < _CARD_MIN_DIGITS:
+            break
+
+        if count <= _CARD_MAX_DIGITS and (last + 1 < len(blocks) or boundary_at_end):
+            start, stop = blocks[first][0], blocks[last][1]
+            if _luhn_valid_digits(text[start:stop].replace(" ", "").replace("-", "")):
+                spans.append((start, stop))
+            first, last, count = last + 1, last, 0
+        else:
+            count -= blocks[first][1] - blocks[first][0]
+            first += 1
+    return spans
 
+
+def _first_inner_match(text: str, start: int, end: int, kinds: tuple[str, ...]) -> int | None:
+    """Earliest start strictly inside text[start:end] of a match of one of `kinds`."""
+    found = None
+    for kind in kinds:
+        if kind == "EMAIL":
+            # An email starting inside the span has to run past its end up to "@".
+            if text[end:end + 1] not in _EMAIL_TAIL_CHARS:
+                continue
+            tail = _EMAIL_TAIL_PATTERN.match(text, end)
+            if tail is None:
+                continue
+            match = EMAIL_PATTERN.search(text, start + 1, min(len(text), tail.end() + 1))
+        else:
+            match = _PATTERNS[kind].search(text, start + 1, min(len(text), end + _MAX_MATCH_LENGTH[kind] + 1))
+        if match is not None and match.start() < end and (found is None or match.start() < found):
+            found = match.start()
+    return found
+
+
+def _find_spans(text: str) -> list[tuple[int, int, str]] | None:
+    """
+    (start, end, pii_type) of every redaction in text order, found in one scan.
+    Returns None when matches of different types overlap in a way only the
+    sequential type-by-type order resolves.
+    """
+    spans: list[tuple[int, int, str]] = []
+    search = _PII_PATTERN.search
+    position = 0
+    while True:
+        match = search(text, position)
+        if match is None:
+            return spans
+        kind = _GROUP_TYPES.get(match.lastgroup, match.lastgroup)
+        start, end = match.span()
+
+        if kind == "DIGITS":
+            # Only an email can still start inside the run; it is redacted
+            # first, so the run stops in front of it.
+            boundary_at_end = None
+            inner = _first_inner_match(text, start, end, ("EMAIL",))
+            if inner is not None:
+                end, boundary_at_end = inner, True
+            if end - start >= _CARD_MIN_DIGITS:
+                spans.extend(
+                    (card_start, card_end, "CARD")
+                    for card_start, card_end in _card_spans(text, start, end, boundary_at_end)
+                )
+            position = end
+            continue
+
+        higher = _HIGHER_TYPES[kind]
+        if higher and _first_inner_match(text, start, end, higher) is not None:
+            return None
+        if kind in ("EMAIL", "SSN") and text[end:end + 1] in ("+", "("):
+            # A phone number may start right after the placeholder.
+            return None
+        spans.append((start, end, kind))
+        position = end
+
+
+def _build_tokenizer(redactions: list[dict]) -> Callable[[str, str], str]:
     counters = defaultdict(int)
     token_cache: dict[tuple[str, str], str] = {}
-    redactions: list[dict] = []
 
     def _tokenize(pii_type: str, raw_value: str) -> str:
         key = (pii_type, raw_value)
@@ -54,17 +223,220 @@ def redact_text(text: str) -> tuple[str, list[dict]]:
             )
         return token_cache[key]
 
+    return _tokenize
+
+
+def _redact_cards(text: str, tokenize: Callable[[str, str], str]) -> str:
+    pieces = []
+    last = 0
+    for run in _CARD_RUN_PATTERN.finditer(text):
+        for start, end in _card_spans(text, run.start(), run.end()):
+            pieces.append(text[last:start])
+            pieces.append(tokenize("CARD", text[start:end]))
+            last = end
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def _apply_redactions_sequential(text: str, tokenize: Callable[[str, str], str]) -> str:
     redacted = text
-    redacted = EMAIL_PATTERN.sub(lambda m: _tokenize("EMAIL", m.group(0)), redacted)
-    redacted = SSN_PATTERN.sub(lambda m: _tokenize("SSN", m.group(0)), redacted)
-    redacted = PHONE_PATTERN.sub(lambda m: _tokenize("PHONE", m.group(0)), redacted)
-
-    def _card_replacer(match: re.Match[str]) -> str:
-        raw = match.group(0)
-        digits_only = re.sub(r"\D", "", raw)
-        if _luhn_valid(digits_only):
-            return _tokenize("CARD", raw)
-        return raw
-
-    redacted = CARD_PATTERN.sub(_card_replacer, redacted)
+    redacted = EMAIL_PATTERN.sub(lambda m: tokenize("EMAIL", m.group(0)), redacted)
+    redacted = SSN_PATTERN.sub(lambda m: tokenize("SSN", m.group(0)), redacted)
+    redacted = PHONE_PATTERN.sub(lambda m: tokenize("PHONE", m.group(0)), redacted)
+    return _redact_cards(redacted, tokenize)
+
+
+def _apply_spans(
+    text: str,
+    spans: list[tuple[int, int, str]] | None,
+    tokenize: Callable[[str, str], str],
+    redactions: list[dict],
+) -> str:
+    if spans is None:
+        return _apply_redactions_sequential(text, tokenize)
+    if not spans:
+        return text
+
+    seen_before = len(redactions)
+    pieces = []
+    last = 0
+    for start, end, kind in spans:
+        pieces.append(text[last:start])
+        pieces.append(tokenize(kind, text[start:end]))
+        last = end
+    pieces.append(text[last:])
+
+    # Placeholders are numbered per type, so text order gives the same numbers
+    # as the sequential passes; only the new redactions need grouping by type.
+    redactions[seen_before:] = sorted(redactions[seen_before:], key=lambda item: _TYPE_RANK[item["pii_type"]])
+    return "".join(pieces)
+
+
+def _apply_redactions(text: str, tokenize: Callable[[str, str], str], redactions: list[dict]) -> str:
+    if len(text) >= settings.PII_PARALLEL_MIN_CHARS and _redaction_workers() > 1:
+        return "".join(_redact_windows([text], tokenize, redactions))
+    return _apply_spans(text, _find_spans(text), tokenize, redactions)
+
+
+def _phone_spans_cut(text: str, cut: int) -> bool:
+    for start in range(max(0, cut - _MAX_MATCH_LENGTH["PHONE"]), cut):
+        match = PHONE_PATTERN.match(text, start)
+        if match is not None and match.end() > cut:
+            return True
+    return False
+
+
+def _find_cut(buffer: str, start: int) -> int | None:
+    """First safe window cut at or after `start`, if the buffer already shows one."""
+    for candidate in _WINDOW_CUT_PATTERN.finditer(buffer, start - 1):
+        cut = candidate.end()
+        if candidate.group() != "\n":
+            return cut
+        if cut + _MAX_MATCH_LENGTH["PHONE"] > len(buffer):
+            return None
+        if not _phone_spans_cut(buffer, cut):
+            return cut
+    return None
+
+
+def _iter_windows(blocks: Iterable[str], window_chars: int, separator: str | None = None) -> Iterator[str]:
+    """
+    Re-cut a stream of text blocks into windows of at least `window_chars`,
+    each ending at a safe cut. Without a safe cut a window keeps growing.
+    With a `separator`, a window also ends right after every separator, so the
+    segments it delimits are scanned independently.
+    """
+    buffer = ""
+    position = 0
+    for block in blocks:
+        pieces = block.split(separator) if separator else [block]
+        for index, piece in enumerate(pieces):
+            if index:
+                yield buffer[position:] + separator
+                buffer = ""
+                position = 0
+            buffer = buffer[position:] + piece if position else buffer + piece
+            position = 0
+            while len(buffer) - position > window_chars:
+                cut = _find_cut(buffer, position + window_chars)
+                if cut is None:
+                    break
+                yield buffer[position:cut]
+                position = cut
+    if len(buffer) > position:
+        yield buffer[position:]
+
+
+def _redaction_workers() -> int:
+    return max(1, settings.PII_REDACTION_WORKERS or os.cpu_count() or 1)
+
+
+def _start_pool(workers: int) -> Executor | None:
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        executor.submit(int).result()
+    except Exception as exc:
+        # e.g. daemonic worker processes that may not fork children
+        print(f"Parallel PII redaction unavailable, falling back to a single process: {exc}")
+        return None
+    return executor
+
+
+def _iter_window_spans(windows: Iterator[str], workers: int) -> Iterator[tuple[str, list[tuple[int, int, str]] | None]]:
+    """(window, spans) in order. Scanning fans out to a process pool; at most
+    two windows per worker are in flight, which bounds memory."""
+    executor = _start_pool(workers) if workers > 1 else None
+    if executor is None:
+        for window in windows:
+            yield window, _find_spans(window)
+        return
+
+    with executor:
+        pending = deque()
+        for window in windows:
+            pending.append((window, executor.submit(_find_spans, window)))
+            if len(pending) >= workers * 2:
+                window, future = pending.popleft()
+                yield window, future.result()
+        while pending:
+            window, future = pending.popleft()
+            yield window, future.result()
+
+
+def _redact_windows(
+    blocks: Iterable[str],
+    tokenize: Callable[[str, str], str],
+    redactions: list[dict],
+    separator: str | None = None,
+) -> Iterator[str]:
+    # Placeholders are assigned here, in window order, so numbering stays
+    # consistent no matter which process scanned a window.
+    windows = _iter_windows(blocks, settings.PII_REDACTION_WINDOW_CHARS, separator)
+    for window, spans in _iter_window_spans(windows, _redaction_workers()):
+        yield _apply_spans(window, spans, tokenize, redactions)
+
+
+def redact_text(text: str) -> tuple[str, list[dict]]:
+    if not settings.PII_REDACTION_ENABLED:
+        return text, []
+
+    redactions: list[dict] = []
+    redacted = _apply_redactions(text, _build_tokenizer(redactions), redactions)
     return redacted, redactions
+
+
+def applied_redaction_version() -> str | None:
+    """Version to record with text redacted now; None when redaction is off."""
+    return REDACTION_VERSION if settings.PII_REDACTION_ENABLED else None
+
+
+def redact_if_stale(text: str, redaction_version: str | None) -> str:
+    """Redact stored text unless it was already redacted by the current engine."""
+    if redaction_version is not None and redaction_version == REDACTION_VERSION:
+        return text
+    return redact_text(text)[0]
+
+
+def redact_segments(
+    segments: Iterable[tuple[int, str]],
+) -> Iterator[tuple[int, str, list[dict]]]:
+    """
+    Lazily redact (page_number, text) segments. Placeholder numbering is shared
+    across segments, so a value keeps the same token on every page. Each yielded
+    item carries only the redactions first seen in that segment.
+    """
+    if not settings.PII_REDACTION_ENABLED:
+        for page_number, text in segments:
+            yield page_number, text, []
+        return
+
+    redactions: list[dict] = []
+    tokenize = _build_tokenizer(redactions)
+    for page_number, text in segments:
+        seen_before = len(redactions)
+        redacted = _apply_redactions(text, tokenize, redactions)
+        yield page_number, redacted, redactions[seen_before:]
+
+
+def redact_stream(blocks: Iterable[str], separator: str | None = None) -> Iterator[tuple[str, list[dict]]]:
+    """
+    Redact a text arriving as a stream of blocks, for exports too large to hold
+    in one string. The text is re-cut into windows that no redaction can span,
+    windows are scanned in a process pool, and (redacted_window, new_redactions)
+    is yielded in order. Placeholder numbering is shared across windows.
+    With a `separator` (e.g. a page break), no redaction spans a separator,
+    matching what redact_segments gives for the separated segments.
+    """
+    if not settings.PII_REDACTION_ENABLED:
+        for block in blocks:
+            yield block, []
+        return
+
+    redactions: list[dict] = []
+    tokenize = _build_tokenizer(redactions)
+    seen_before = 0
+    for redacted in _redact_windows(blocks, tokenize, redactions, separator):
+        yield redacted, redactions[seen_before:]
+        seen_before = len(redactions)
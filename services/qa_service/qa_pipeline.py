@@ -1,17 +1,38 @@
+import asyncio
 import hashlib
-import re
-from typing import Any
+import json
+import threading
+import time
+from typing import Any, Iterator
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from shared.cache import get_cache_service
+from shared.cache import AsyncSingleFlight, SingleFlight, get_cache_service
 from shared.config.settings import settings
-from services.privacy_service.pii_redactor import redact_text
+from services.extraction_service.index_generation import aget_index_generations, get_index_generations
+from services.extraction_service.sentence_index import tokenize
+from services.privacy_service.pii_redactor import redact_if_stale
 from services.qa_service.prompt_service import build_reasoning_qa_prompt
-from services.qa_service.retriever_service import retrieve_document_evidence
+from services.qa_service.retriever_service import (
+    aretrieve_evidence_batch,
+    async_retrieval_flight_stats,
+    retrieval_flight_stats,
+    retrieve_evidence_batch,
+    run_in_retrieval_executor,
+)
+from services.qa_service.semantic_cache import SemanticResponseCache
 
 client = OpenAI(api_key=settings.OPENAI_API_KEY)
-QA_RESPONSE_CACHE_VERSION = "v2"
+async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+QA_MODEL = "gpt-4o-mini"
+QA_RESPONSE_CACHE_VERSION = "v3"
+_response_flight = SingleFlight()
+_async_response_flight = AsyncSingleFlight()
+_semantic_cache = SemanticResponseCache(
+    threshold=settings.QA_SEMANTIC_CACHE_THRESHOLD,
+    max_scopes=settings.QA_SEMANTIC_CACHE_MAX_SCOPES,
+    max_entries_per_scope=settings.QA_SEMANTIC_CACHE_MAX_ENTRIES_PER_SCOPE,
+)
 
 
 def _is_document_advice_question(question: str) -> bool:
@@ -44,7 +65,7 @@ def _is_rejection_answer(answer: str) -> bool:
 
 
 def _normalize_tokens(text: str) -> set[str]:
-    return set(re.findall(r"[a-zA-Z0-9]+", text.lower()))
+    return tokenize(text)
 
 
 def _classify_query(question: str) -> str:
@@ -105,17 +126,37 @@ def _build_query_variants(question: str, query_type: str) -> list[str]:
 
 def _build_evidence(question: str, document_ids: list[str], query_type: str) -> list[dict[str, Any]]:
     variants = _build_query_variants(question, query_type)
+    grouped_evidence = retrieve_evidence_batch(variants, document_ids, top_k=6)
+    return _rank_evidence(question, document_ids, variants, grouped_evidence)
+
+
+async def _abuild_evidence(question: str, document_ids: list[str], query_type: str) -> list[dict[str, Any]]:
+    variants = _build_query_variants(question, query_type)
+    grouped_evidence = await aretrieve_evidence_batch(variants, document_ids, top_k=6)
+    return _rank_evidence(question, document_ids, variants, grouped_evidence)
+
+
+def _rank_evidence(
+    question: str,
+    document_ids: list[str],
+    variants: list[str],
+    grouped_evidence: dict[tuple[str, str], list[dict]],
+) -> list[dict[str, Any]]:
     question_tokens = _normalize_tokens(question)
     by_evidence_key: dict[str, dict[str, Any]] = {}
+    # The same chunk is usually returned for several variants; tokenize it once.
+    tokens_by_text: dict[str, set[str]] = {}
 
     for variant_index, variant in enumerate(variants):
         for doc_index, document_id in enumerate(document_ids):
-            evidence_items = retrieve_document_evidence(variant, document_id, top_k=6)
+            evidence_items = grouped_evidence.get((variant, document_id), [])
             for rank, item in enumerate(evidence_items):
                 text = item.get("text") or ""
                 if not text:
                     continue
-                text_tokens = _normalize_tokens(text)
+                text_tokens = tokens_by_text.get(text)
+                if text_tokens is None:
+                    text_tokens = tokens_by_text[text] = _normalize_tokens(text)
                 overlap = len(question_tokens & text_tokens) / max(1, len(question_tokens))
                 rank_score = 1.0 / (rank + 1)
                 variant_boost = 1.0 - (0.12 * variant_index)
@@ -135,6 +176,7 @@ def _build_evidence(question: str, document_ids: list[str], query_type: str) ->
                         "document_id": item.get("document_id"),
                         "chunk_id": item.get("chunk_id"),
                         "chunk_index": item.get("chunk_index"),
+                        "redaction_version": item.get("redaction_version"),
                         "score": score,
                         "support_queries": [variant],
                     }
@@ -174,10 +216,30 @@ def _confidence_from_evidence(evidence: list[dict[str, Any]]) -> tuple[float, st
     return round(confidence, 2), band
 
 
-def _qa_response_cache_key(question: str, document_ids: list[str]) -> str:
+def _document_set_scope(document_ids: list[str], generations: dict[str, int] | None = None) -> str:
+    # Each document's index generation is part of the scope, so answers drawn
+    # from an older index are never served once a document is re-ingested.
+    if generations is None:
+        generations = get_index_generations(document_ids)
+    docs = ",".join(f"{document_id}@{generations[document_id]}" for document_id in sorted(document_ids))
+    docs_hash = hashlib.sha256(docs.encode("utf-8")).hexdigest()[:16]
+    return f"{QA_RESPONSE_CACHE_VERSION}:{docs_hash}"
+
+
+def _qa_response_cache_key(question: str, scope: str) -> str:
     q_hash = hashlib.sha256(question.strip().lower().encode("utf-8")).hexdigest()
-    docs_hash = hashlib.sha256(",".join(sorted(document_ids)).encode("utf-8")).hexdigest()[:16]
-    return f"qa:response:{QA_RESPONSE_CACHE_VERSION}:{docs_hash}:{q_hash}"
+    return f"qa:response:{scope}:{q_hash}"
+
+
+def _embed_question(question: str) -> list[float] | None:
+    # Shares the embedding cache with retrieval, whose first query variant is the question itself.
+    try:
+        from services.extraction_service.vector_service import embeddings
+
+        return embeddings.embed_query(question)
+    except Exception as embed_error:
+        print(f"Semantic cache lookup skipped: {embed_error}")
+        return None
 
 
 def _thread_cache_key(user_id: str, thread_id: str) -> str:
@@ -187,32 +249,57 @@ def _thread_cache_key(user_id: str, thread_id: str) -> str:
 def _load_thread_context(user_id: str | None, thread_id: str | None) -> list[dict]:
     if not user_id or not thread_id:
         return []
-    cache = get_cache_service()
-    value = cache.get_json(_thread_cache_key(str(user_id), thread_id))
+    return _recent_turns(get_cache_service().get_json(_thread_cache_key(str(user_id), thread_id)))
+
+
+async def _aload_thread_context(user_id: str | None, thread_id: str | None) -> list[dict]:
+    if not user_id or not thread_id:
+        return []
+    return _recent_turns(await get_cache_service().aget_json(_thread_cache_key(str(user_id), thread_id)))
+
+
+def _recent_turns(value) -> list[dict]:
     if isinstance(value, list):
         return value[-settings.QA_THREAD_MAX_TURNS :]
     return []
 
 
-def _save_thread_turn(user_id: str | None, thread_id: str | None, question: str, answer: str):
+def _save_thread_turn(
+    user_id: str | None,
+    thread_id: str | None,
+    thread_context: list[dict],
+    question: str,
+    answer: str,
+):
+    """Append a turn to the context loaded at the start of the request: one SETEX, no re-read."""
     if not user_id or not thread_id:
         return
-    cache = get_cache_service()
-    key = _thread_cache_key(str(user_id), thread_id)
-    turns = cache.get_json(key)
-    if not isinstance(turns, list):
-        turns = []
-    turns.append({"question": question, "answer": answer})
-    turns = turns[-settings.QA_THREAD_MAX_TURNS :]
-    cache.set_json(key, turns, ttl_seconds=settings.QA_THREAD_TTL_SECONDS)
+    turns = [*thread_context, {"question": question, "answer": answer}][-settings.QA_THREAD_MAX_TURNS :]
+    get_cache_service().set_json(
+        _thread_cache_key(str(user_id), thread_id),
+        turns,
+        ttl_seconds=settings.QA_THREAD_TTL_SECONDS,
+    )
 
 
-def run_qa_pipeline_with_metadata_for_documents(
+async def _asave_thread_turn(
+    user_id: str | None,
+    thread_id: str | None,
+    thread_context: list[dict],
     question: str,
-    document_ids: list[str],
-    thread_id: str | None = None,
-    user_id: str | None = None,
-) -> dict:
+    answer: str,
+):
+    if not user_id or not thread_id:
+        return
+    turns = [*thread_context, {"question": question, "answer": answer}][-settings.QA_THREAD_MAX_TURNS :]
+    await get_cache_service().aset_json(
+        _thread_cache_key(str(user_id), thread_id),
+        turns,
+        ttl_seconds=settings.QA_THREAD_TTL_SECONDS,
+    )
+
+
+def _unique_document_ids(document_ids: list[str]) -> list[str]:
     unique_document_ids = []
     seen = set()
     for document_id in document_ids:
@@ -220,48 +307,248 @@ def run_qa_pipeline_with_metadata_for_documents(
         if key and key not in seen:
             seen.add(key)
             unique_document_ids.append(key)
+    return unique_document_ids
+
+
+def _no_documents_result(thread_id: str | None) -> dict:
+    return {
+        "answer": "No relevant information found.",
+        "query_type": "fact",
+        "confidence": 0.0,
+        "confidence_band": "low",
+        "missing_information": ["No document IDs provided."],
+        "evidence_count": 0,
+        "citations": [],
+        "thread_id": thread_id,
+    }
+
+
+def _read_cached_response(key: str) -> dict | None:
+    return _usable_response(get_cache_service().get_json(key))
+
+
+async def _aread_cached_response(key: str) -> dict | None:
+    return _usable_response(await get_cache_service().aget_json(key))
+
+
+def _usable_response(cached_result) -> dict | None:
+    if isinstance(cached_result, dict) and cached_result.get("answer"):
+        return cached_result
+    return None
+
+
+def _lookup_response(question: str, unique_document_ids: list[str]) -> tuple[dict | None, str, str, list[float] | None]:
+    """
+    Exact, then semantic, response cache lookup for a thread-less question.
+    Returns (cached result or None, cache key, document-set scope, question embedding).
+    """
+    scope = _document_set_scope(unique_document_ids)
+    cache_key = _qa_response_cache_key(question, scope)
+    cached_result = _read_cached_response(cache_key)
+    if cached_result is not None:
+        return cached_result, cache_key, scope, None
+
+    # A paraphrase of a question already answered for the same documents
+    # reuses that answer.
+    question_vector = _embed_question(question) if settings.QA_SEMANTIC_CACHE_ENABLED else None
+    if question_vector is not None:
+        match = _semantic_cache.lookup(scope, question_vector)
+        if match is not None:
+            cached_result = _read_cached_response(match[0])
+            if cached_result is not None:
+                return cached_result, cache_key, scope, question_vector
+            _semantic_cache.discard(scope, match[0])
+    return None, cache_key, scope, question_vector
+
+
+async def _alookup_response(
+    question: str,
+    unique_document_ids: list[str],
+) -> tuple[dict | None, str, str, list[float] | None]:
+    generations = await aget_index_generations(unique_document_ids)
+    scope = _document_set_scope(unique_document_ids, generations)
+    cache_key = _qa_response_cache_key(question, scope)
+    cached_result = await _aread_cached_response(cache_key)
+    if cached_result is not None:
+        return cached_result, cache_key, scope, None
+
+    question_vector = None
+    if settings.QA_SEMANTIC_CACHE_ENABLED:
+        question_vector = await run_in_retrieval_executor(_embed_question, question)
+    if question_vector is not None:
+        match = _semantic_cache.lookup(scope, question_vector)
+        if match is not None:
+            cached_result = await _aread_cached_response(match[0])
+            if cached_result is not None:
+                return cached_result, cache_key, scope, question_vector
+            _semantic_cache.discard(scope, match[0])
+    return None, cache_key, scope, question_vector
 
+
+def run_qa_pipeline_with_metadata_for_documents(
+    question: str,
+    document_ids: list[str],
+    thread_id: str | None = None,
+    user_id: str | None = None,
+) -> dict:
+    _maybe_log_cache_stats()
+    unique_document_ids = _unique_document_ids(document_ids)
     if not unique_document_ids:
-        return {
-            "answer": "No relevant information found.",
-            "query_type": "fact",
-            "confidence": 0.0,
-            "confidence_band": "low",
-            "missing_information": ["No document IDs provided."],
-            "evidence_count": 0,
-            "citations": [],
-            "thread_id": thread_id,
-        }
+        return _no_documents_result(thread_id)
+
+    # Answers in a thread depend on its history, so only thread-less answers are cached.
+    if thread_id is not None:
+        return _answer_question(question, unique_document_ids, thread_id, user_id, cache_key=None)
+
+    cached_result, cache_key, scope, question_vector = _lookup_response(question, unique_document_ids)
+    if cached_result is not None:
+        return cached_result
+
+    # Identical questions arriving together share one retrieval and LLM call.
+    result = _response_flight.do(
+        cache_key,
+        lambda: _answer_question(question, unique_document_ids, thread_id, user_id, cache_key=cache_key),
+        lambda: _read_cached_response(cache_key),
+    )
+    if question_vector is not None and result.get("answer"):
+        _semantic_cache.add(scope, question_vector, cache_key)
+    return result
+
+
+async def arun_qa_pipeline_with_metadata_for_documents(
+    question: str,
+    document_ids: list[str],
+    thread_id: str | None = None,
+    user_id: str | None = None,
+) -> dict:
+    """
+    run_qa_pipeline_with_metadata_for_documents without blocking the event
+    loop: Redis through redis.asyncio, the LLM through AsyncOpenAI, and the
+    blocking embedding and Chroma calls in the bounded retrieval executor.
+    """
+    _maybe_log_cache_stats()
+    unique_document_ids = _unique_document_ids(document_ids)
+    if not unique_document_ids:
+        return _no_documents_result(thread_id)
+
+    if thread_id is not None:
+        return await _aanswer_question(question, unique_document_ids, thread_id, user_id, cache_key=None)
+
+    cached_result, cache_key, scope, question_vector = await _alookup_response(question, unique_document_ids)
+    if cached_result is not None:
+        return cached_result
+
+    result = await _async_response_flight.do(
+        cache_key,
+        lambda: _aanswer_question(question, unique_document_ids, thread_id, user_id, cache_key=cache_key),
+        lambda: _aread_cached_response(cache_key),
+    )
+    if question_vector is not None and result.get("answer"):
+        _semantic_cache.add(scope, question_vector, cache_key)
+    return result
+
+
+def stream_qa_pipeline_for_documents(
+    question: str,
+    document_ids: list[str],
+    thread_id: str | None = None,
+    user_id: str | None = None,
+) -> Iterator[tuple[str, dict]]:
+    """
+    Streaming variant of run_qa_pipeline_with_metadata_for_documents. Yields
+    ("metadata", result without the answer) once evidence is built, then
+    ("token", {"text": ...}) for each piece of the answer as the LLM produces
+    it, then ("done", result). The "done" answer is final: it replaces a
+    streamed rejection of a document advice question. The response cache and
+    thread history are filled at the end, as in the blocking pipeline.
+    """
+    _maybe_log_cache_stats()
+    unique_document_ids = _unique_document_ids(document_ids)
+    if not unique_document_ids:
+        yield from _replay(_no_documents_result(thread_id))
+        return
+
+    cache_key = scope = question_vector = None
+    if thread_id is None:
+        cached_result, cache_key, scope, question_vector = _lookup_response(question, unique_document_ids)
+        if cached_result is not None:
+            yield from _replay(cached_result)
+            return
+
+    # Not coalesced with concurrent identical questions: each stream needs its own tokens.
+    prepared = _prepare_answer(question, unique_document_ids, thread_id, user_id)
+    metadata = _result_metadata(prepared, unique_document_ids, thread_id)
+    yield "metadata", metadata
+    if not prepared["safe_evidence"]:
+        result = _finish_answer(question, prepared, metadata, "No relevant information found.", user_id, cache_key)
+        yield from _replay_answer(result)
+        return
+
+    stream = client.chat.completions.create(model=QA_MODEL, messages=_qa_messages(prepared["prompt"]), stream=True)
+    parts = []
+    for chunk in stream:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            parts.append(text)
+            yield "token", {"text": text}
 
-    cache = get_cache_service()
-    can_cache_response = thread_id is None
-    cache_key = _qa_response_cache_key(question, unique_document_ids)
-    if can_cache_response:
-        cached_result = cache.get_json(cache_key)
-        if isinstance(cached_result, dict) and cached_result.get("answer"):
-            return cached_result
+    result = _finish_answer(question, prepared, metadata, "".join(parts), user_id, cache_key)
+    if question_vector is not None and result.get("answer"):
+        _semantic_cache.add(scope, question_vector, cache_key)
+    yield "done", result
 
+
+def _replay(result: dict) -> Iterator[tuple[str, dict]]:
+    yield "metadata", {key: value for key, value in result.items() if key != "answer"}
+    yield from _replay_answer(result)
+
+
+def _replay_answer(result: dict) -> Iterator[tuple[str, dict]]:
+    yield "token", {"text": result["answer"]}
+    yield "done", result
+
+
+def _qa_messages(prompt: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a document QA assistant. "
+                "Only reply 'Please ask about document.' for truly unrelated questions. "
+                "If the user asks for advice/evaluation about the provided document, do not reject."
+            ),
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _prepare_answer(question: str, unique_document_ids: list[str], thread_id: str | None, user_id: str | None) -> dict:
+    """Classify, load the thread and retrieve redacted evidence; builds the prompt when there is evidence."""
     query_type = _classify_query(question)
     thread_context = _load_thread_context(user_id=user_id, thread_id=thread_id)
     evidence = _build_evidence(question, unique_document_ids, query_type)
-    if not evidence:
-        result = {
-            "answer": "No relevant information found.",
-            "query_type": query_type,
-            "confidence": 0.0,
-            "confidence_band": "low",
-            "missing_information": ["No indexed chunks found for the provided document(s)."],
-            "evidence_count": 0,
-            "citations": [],
-            "thread_id": thread_id,
-        }
-        if can_cache_response:
-            cache.set_json(cache_key, result, ttl_seconds=settings.QA_RESPONSE_CACHE_TTL_SECONDS)
-        return result
+    return _prepare_from_evidence(question, query_type, thread_context, evidence)
 
+
+async def _aprepare_answer(
+    question: str,
+    unique_document_ids: list[str],
+    thread_id: str | None,
+    user_id: str | None,
+) -> dict:
+    query_type = _classify_query(question)
+    thread_context, evidence = await asyncio.gather(
+        _aload_thread_context(user_id=user_id, thread_id=thread_id),
+        _abuild_evidence(question, unique_document_ids, query_type),
+    )
+    return _prepare_from_evidence(question, query_type, thread_context, evidence)
+
+
+def _prepare_from_evidence(question: str, query_type: str, thread_context: list[dict], evidence: list[dict]) -> dict:
     safe_evidence = []
     for item in evidence:
-        safe_text = redact_text(item["text"])[0]
+        # Chunks stored by the current redaction engine are already redacted.
+        safe_text = redact_if_stale(item["text"], item.get("redaction_version"))
         safe_evidence.append(
             {
                 "text": safe_text,
@@ -273,38 +560,38 @@ def run_qa_pipeline_with_metadata_for_documents(
             }
         )
 
-    missing_info = _infer_missing_info(question, query_type, safe_evidence)
-    prompt = build_reasoning_qa_prompt(
-        question=question,
-        query_type=query_type,
-        context_chunks=safe_evidence,
-        missing_info=missing_info,
-        thread_context=thread_context,
-    )
+    prepared = {
+        "query_type": query_type,
+        "thread_context": thread_context,
+        "safe_evidence": safe_evidence,
+        "missing_info": [],
+        "prompt": None,
+    }
+    if safe_evidence:
+        prepared["missing_info"] = _infer_missing_info(question, query_type, safe_evidence)
+        prepared["prompt"] = build_reasoning_qa_prompt(
+            question=question,
+            query_type=query_type,
+            context_chunks=safe_evidence,
+            missing_info=prepared["missing_info"],
+            thread_context=thread_context,
+        )
+    return prepared
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a document QA assistant. "
-                    "Only reply 'Please ask about document.' for truly unrelated questions. "
-                    "If the user asks for advice/evaluation about the provided document, do not reject."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
 
-    answer = response.choices[0].message.content or ""
-    if _is_rejection_answer(answer) and _is_document_advice_question(question):
-        answer = (
-            "Your question is related to these document(s). Based on retrieved context, "
-            "I can provide guidance, but some details needed for a strong recommendation "
-            "may be missing. Ask a focused follow-up like policy type, premium, tenure, "
-            "returns, risk profile, and goals to get a better recommendation."
-        )
+def _result_metadata(prepared: dict, unique_document_ids: list[str], thread_id: str | None) -> dict:
+    """Everything in the result except the answer."""
+    safe_evidence = prepared["safe_evidence"]
+    if not safe_evidence:
+        return {
+            "query_type": prepared["query_type"],
+            "confidence": 0.0,
+            "confidence_band": "low",
+            "missing_information": ["No indexed chunks found for the provided document(s)."],
+            "evidence_count": 0,
+            "citations": [],
+            "thread_id": thread_id,
+        }
 
     confidence, confidence_band = _confidence_from_evidence(safe_evidence)
     citations = [
@@ -319,26 +606,156 @@ def run_qa_pipeline_with_metadata_for_documents(
         }
         for idx, item in enumerate(safe_evidence[:6])
     ]
-
-    result = {
-        "answer": answer,
-        "query_type": query_type,
+    return {
+        "query_type": prepared["query_type"],
         "confidence": confidence,
         "confidence_band": confidence_band,
-        "missing_information": missing_info,
+        "missing_information": prepared["missing_info"],
         "evidence_count": len(safe_evidence),
         "document_ids": unique_document_ids,
         "citations": citations,
         "thread_id": thread_id,
     }
 
-    if can_cache_response:
-        cache.set_json(cache_key, result, ttl_seconds=settings.QA_RESPONSE_CACHE_TTL_SECONDS)
 
-    _save_thread_turn(user_id=user_id, thread_id=thread_id, question=question, answer=answer)
+def _finish_answer(
+    question: str,
+    prepared: dict,
+    metadata: dict,
+    answer: str,
+    user_id: str | None,
+    cache_key: str | None,
+) -> dict:
+    """Build the result; stores it under cache_key when given and records the thread turn."""
+    result = _final_result(question, prepared, metadata, answer)
+    if cache_key is not None:
+        get_cache_service().set_json(cache_key, result, ttl_seconds=settings.QA_RESPONSE_CACHE_TTL_SECONDS)
+
+    if prepared["safe_evidence"]:
+        _save_thread_turn(
+            user_id=user_id,
+            thread_id=metadata["thread_id"],
+            thread_context=prepared["thread_context"],
+            question=question,
+            answer=result["answer"],
+        )
+    return result
+
+
+async def _afinish_answer(
+    question: str,
+    prepared: dict,
+    metadata: dict,
+    answer: str,
+    user_id: str | None,
+    cache_key: str | None,
+) -> dict:
+    result = _final_result(question, prepared, metadata, answer)
+    writes = []
+    if cache_key is not None:
+        writes.append(
+            get_cache_service().aset_json(cache_key, result, ttl_seconds=settings.QA_RESPONSE_CACHE_TTL_SECONDS)
+        )
+    if prepared["safe_evidence"]:
+        writes.append(
+            _asave_thread_turn(
+                user_id=user_id,
+                thread_id=metadata["thread_id"],
+                thread_context=prepared["thread_context"],
+                question=question,
+                answer=result["answer"],
+            )
+        )
+    await asyncio.gather(*writes)
     return result
 
 
+def _final_result(question: str, prepared: dict, metadata: dict, answer: str) -> dict:
+    if prepared["safe_evidence"] and _is_rejection_answer(answer) and _is_document_advice_question(question):
+        answer = (
+            "Your question is related to these document(s). Based on retrieved context, "
+            "I can provide guidance, but some details needed for a strong recommendation "
+            "may be missing. Ask a focused follow-up like policy type, premium, tenure, "
+            "returns, risk profile, and goals to get a better recommendation."
+        )
+    return {"answer": answer, **metadata}
+
+
+def _answer_question(
+    question: str,
+    unique_document_ids: list[str],
+    thread_id: str | None,
+    user_id: str | None,
+    cache_key: str | None,
+) -> dict:
+    """Retrieve, ask the LLM and build the result; stores it under cache_key when given."""
+    prepared = _prepare_answer(question, unique_document_ids, thread_id, user_id)
+    metadata = _result_metadata(prepared, unique_document_ids, thread_id)
+    if not prepared["safe_evidence"]:
+        return _finish_answer(question, prepared, metadata, "No relevant information found.", user_id, cache_key)
+
+    response = client.chat.completions.create(model=QA_MODEL, messages=_qa_messages(prepared["prompt"]))
+    return _finish_answer(question, prepared, metadata, response.choices[0].message.content or "", user_id, cache_key)
+
+
+async def _aanswer_question(
+    question: str,
+    unique_document_ids: list[str],
+    thread_id: str | None,
+    user_id: str | None,
+    cache_key: str | None,
+) -> dict:
+    prepared = await _aprepare_answer(question, unique_document_ids, thread_id, user_id)
+    metadata = _result_metadata(prepared, unique_document_ids, thread_id)
+    if not prepared["safe_evidence"]:
+        return await _afinish_answer(question, prepared, metadata, "No relevant information found.", user_id, cache_key)
+
+    response = await async_client.chat.completions.create(model=QA_MODEL, messages=_qa_messages(prepared["prompt"]))
+    return await _afinish_answer(
+        question, prepared, metadata, response.choices[0].message.content or "", user_id, cache_key
+    )
+
+
+def _embedding_cache_stats() -> dict:
+    try:
+        from services.extraction_service.vector_service import embeddings
+
+        return embeddings.stats()
+    except Exception as stats_error:
+        return {"error": str(stats_error)}
+
+
+def qa_cache_stats() -> dict:
+    """Cache tier hits, embedding and semantic cache hits and single-flight coalescing counts of this process."""
+    return {
+        "cache": get_cache_service().stats(),
+        "embedding_cache": _embedding_cache_stats(),
+        "semantic_cache": _semantic_cache.stats(),
+        "response_single_flight": _response_flight.stats(),
+        "async_response_single_flight": _async_response_flight.stats(),
+        "retrieval_single_flight": retrieval_flight_stats(),
+        "async_retrieval_single_flight": async_retrieval_flight_stats(),
+    }
+
+
+_stats_lock = threading.Lock()
+_stats_logged_at = time.monotonic()
+
+
+def _maybe_log_cache_stats():
+    """Print qa_cache_stats() at most once per QA_STATS_LOG_INTERVAL_SECONDS (0 disables)."""
+    global _stats_logged_at
+    interval = settings.QA_STATS_LOG_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    now = time.monotonic()
+    with _stats_lock:
+        if now - _stats_logged_at < interval:
+            return
+        _stats_logged_at = now
+    print(f"QA cache stats: {json.dumps(qa_cache_stats(), sort_keys=True, default=str)}")
+
+
 def run_qa_pipeline_with_metadata(question: str, document_id: str) -> dict:
     return run_qa_pipeline_with_metadata_for_documents(question, [document_id])
 
@@ -1,21 +1,81 @@
+import asyncio
+import functools
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
-from shared.cache import get_cache_service
+from shared.cache import AsyncSingleFlight, SingleFlight, get_cache_service
 from shared.config.settings import settings
+from services.extraction_service.index_generation import aget_index_generations, get_index_generations
 
+_retrieval_flight = SingleFlight()
+_async_retrieval_flight = AsyncSingleFlight()
+# Chroma and the embedding client block; the async path runs them here so a
+# burst of questions cannot take every thread of the event loop's default pool.
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=settings.QA_RETRIEVAL_EXECUTOR_WORKERS,
+    thread_name_prefix="qa-retrieval",
+)
 
-def _retrieval_cache_key(query: str, document_id: str, top_k: int) -> str:
+
+async def run_in_retrieval_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_retrieval_executor, functools.partial(func, *args, **kwargs))
+
+
+def _retrieval_cache_key(query: str, document_id: str, top_k: int, generation: int) -> str:
+    # The index generation changes whenever the document's chunks do, so
+    # entries for an older index are never read again and simply expire.
+    # v3: v2 entries could hold fewer than top_k chunks from a shared $in query.
     q_hash = hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
-    return f"qa:retrieval:v1:{document_id}:{top_k}:{q_hash}"
+    return f"qa:retrieval:v3:{document_id}:g{generation}:{top_k}:{q_hash}"
+
+
+def _to_evidence(ids, documents, metadatas, distances, default_document_id=None) -> list[dict]:
+    evidence = []
+    for idx, text in enumerate(documents):
+        metadata = metadatas[idx] if idx < len(metadatas) and isinstance(metadatas[idx], dict) else {}
+        evidence.append(
+            {
+                "chunk_id": ids[idx] if idx < len(ids) else None,
+                "document_id": metadata.get("document_id", default_document_id),
+                "chunk_index": metadata.get("chunk_index", idx),
+                "text": text,
+                "distance": distances[idx] if idx < len(distances) else None,
+                "redaction_version": metadata.get("redaction_version"),
+            }
+        )
+    return evidence
 
 
 def retrieve_document_evidence(query: str, document_id: str, top_k: int = 5):
     cache = get_cache_service()
-    cache_key = _retrieval_cache_key(query=query, document_id=document_id, top_k=top_k)
-    cached_evidence = cache.get_json(cache_key)
-    if isinstance(cached_evidence, list):
+    generation = get_index_generations([document_id])[str(document_id)]
+    cache_key = _retrieval_cache_key(query=query, document_id=document_id, top_k=top_k, generation=generation)
+
+    def _cached_evidence() -> list[dict] | None:
+        cached_evidence = cache.get_json(cache_key)
+        return cached_evidence if isinstance(cached_evidence, list) else None
+
+    cached_evidence = _cached_evidence()
+    if cached_evidence is not None:
         return cached_evidence
 
+    return _retrieval_flight.do(
+        cache_key,
+        lambda: _query_document_evidence(query, document_id, top_k, cache_key),
+        _cached_evidence,
+    )
+
+
+def retrieval_flight_stats() -> dict:
+    return _retrieval_flight.stats()
+
+
+def async_retrieval_flight_stats() -> dict:
+    return _async_retrieval_flight.stats()
+
+
+def _query_document_evidence(query: str, document_id: str, top_k: int, cache_key: str) -> list[dict]:
     from services.extraction_service.vector_service import collection, embeddings
 
     query_vector = embeddings.embed_query(query)
@@ -26,25 +86,15 @@ def retrieve_document_evidence(query: str, document_id: str, top_k: int = 5):
         n_results=top_k
     )
 
-    ids = results.get("ids", [[]])[0]
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-    distances = results.get("distances", [[]])[0]
-
-    evidence = []
-    for idx, text in enumerate(documents):
-        metadata = metadatas[idx] if idx < len(metadatas) and isinstance(metadatas[idx], dict) else {}
-        evidence.append(
-            {
-                "chunk_id": ids[idx] if idx < len(ids) else None,
-                "document_id": metadata.get("document_id", document_id),
-                "chunk_index": metadata.get("chunk_index", idx),
-                "text": text,
-                "distance": distances[idx] if idx < len(distances) else None,
-            }
-        )
+    evidence = _to_evidence(
+        ids=results.get("ids", [[]])[0],
+        documents=results.get("documents", [[]])[0],
+        metadatas=results.get("metadatas", [[]])[0],
+        distances=results.get("distances", [[]])[0],
+        default_document_id=document_id,
+    )
 
-    cache.set_json(
+    get_cache_service().set_json(
         cache_key,
         evidence,
         ttl_seconds=settings.QA_RETRIEVAL_CACHE_TTL_SECONDS,
@@ -53,6 +103,180 @@ def retrieve_document_evidence(query: str, document_id: str, top_k: int = 5):
     return evidence
 
 
+def retrieve_evidence_batch(
+    queries: list[str],
+    document_ids: list[str],
+    top_k: int = 5,
+) -> dict[tuple[str, str], list[dict]]:
+    """
+    Retrieve evidence for every (query, document) pair with one embedding
+    call and one vector query per document, run concurrently in the retrieval
+    executor. Results are grouped per (query, document_id) and each group
+    holds the document's top_k nearest chunks (fewer only when the document
+    has fewer chunks).
+    """
+    cache = get_cache_service()
+    cache_keys = _batch_cache_keys(queries, document_ids, top_k, get_index_generations(document_ids))
+    cached = cache.get_many_json(list(cache_keys.values()))
+    grouped, missing_queries, missing_documents = _split_cached_evidence(queries, document_ids, cache_keys, cached)
+    if not missing_queries:
+        return grouped
+    missing = {pair: cache_key for pair, cache_key in cache_keys.items() if pair not in grouped}
+
+    def _fetch() -> dict[str, list[dict]]:
+        from services.extraction_service.vector_service import collection, embeddings
+
+        query_vectors = embeddings.embed_documents(missing_queries)
+        per_document = list(
+            _retrieval_executor.map(
+                lambda document_id: _query_document(collection, query_vectors, document_id, top_k),
+                missing_documents,
+            )
+        )
+        fresh = _collect_evidence(missing_queries, missing_documents, per_document, missing)
+        cache.set_many_json(fresh, ttl_seconds=settings.QA_RETRIEVAL_CACHE_TTL_SECONDS)
+        return fresh
+
+    # Concurrent identical retrievals share one embedding call and one set of vector queries.
+    fresh = _retrieval_flight.do(
+        _batch_flight_key(missing),
+        _fetch,
+        lambda: _complete(missing, cache.get_many_json(list(missing.values()))),
+    )
+    grouped.update({pair: fresh[cache_key] for pair, cache_key in missing.items()})
+    return grouped
+
+
+async def aretrieve_evidence_batch(
+    queries: list[str],
+    document_ids: list[str],
+    top_k: int = 5,
+) -> dict[tuple[str, str], list[dict]]:
+    """
+    retrieve_evidence_batch for the async QA path. Cache reads and writes use
+    async Redis. Missing queries are embedded in one call, then each document
+    gets its own vector query; those run concurrently in the retrieval
+    executor and return exactly top_k nearest chunks per document.
+    """
+    cache = get_cache_service()
+    cache_keys = _batch_cache_keys(queries, document_ids, top_k, await aget_index_generations(document_ids))
+    cached = await cache.aget_many_json(list(cache_keys.values()))
+    grouped, missing_queries, missing_documents = _split_cached_evidence(queries, document_ids, cache_keys, cached)
+    if not missing_queries:
+        return grouped
+    missing = {pair: cache_key for pair, cache_key in cache_keys.items() if pair not in grouped}
+
+    async def _fetch() -> dict[str, list[dict]]:
+        from services.extraction_service.vector_service import collection, embeddings
+
+        query_vectors = await run_in_retrieval_executor(embeddings.embed_documents, missing_queries)
+        per_document = await asyncio.gather(
+            *(
+                run_in_retrieval_executor(_query_document, collection, query_vectors, document_id, top_k)
+                for document_id in missing_documents
+            )
+        )
+        fresh = _collect_evidence(missing_queries, missing_documents, per_document, missing)
+        await cache.aset_many_json(fresh, ttl_seconds=settings.QA_RETRIEVAL_CACHE_TTL_SECONDS)
+        return fresh
+
+    async def _cached_fresh() -> dict[str, list[dict]] | None:
+        return _complete(missing, await cache.aget_many_json(list(missing.values())))
+
+    fresh = await _async_retrieval_flight.do(_batch_flight_key(missing), _fetch, _cached_fresh)
+    grouped.update({pair: fresh[cache_key] for pair, cache_key in missing.items()})
+    return grouped
+
+
+def _batch_flight_key(missing: dict[tuple[str, str], str]) -> str:
+    digest = hashlib.sha256("|".join(sorted(set(missing.values()))).encode("utf-8")).hexdigest()
+    return f"qa:retrieval:batch:{digest}"
+
+
+def _complete(missing: dict[tuple[str, str], str], cached: dict) -> dict[str, list[dict]] | None:
+    """The cached evidence of every missing key, or None while any is absent."""
+    if all(isinstance(cached.get(cache_key), list) for cache_key in missing.values()):
+        return cached
+    return None
+
+
+def _query_document(collection, query_vectors: list[list[float]], document_id: str, top_k: int) -> dict:
+    # Filtering on one document (not $in over several) guarantees each document its own top_k.
+    return collection.query(
+        query_embeddings=query_vectors,
+        where={"document_id": document_id},
+        n_results=top_k,
+    )
+
+
+def _collect_evidence(
+    missing_queries: list[str],
+    missing_documents: list[str],
+    per_document: list[dict],
+    missing: dict[tuple[str, str], str],
+) -> dict[str, list[dict]]:
+    """Evidence of each missing (query, document_id) pair from the per-document query results, by cache key."""
+    fresh: dict[str, list[dict]] = {}
+    for document_id, results in zip(missing_documents, per_document):
+        all_ids = results.get("ids") or []
+        all_documents = results.get("documents") or []
+        all_metadatas = results.get("metadatas") or []
+        all_distances = results.get("distances") or []
+        for query_index, query in enumerate(missing_queries):
+            if (query, document_id) not in missing:
+                continue
+            evidence = _to_evidence(
+                ids=all_ids[query_index] if query_index < len(all_ids) else [],
+                documents=all_documents[query_index] if query_index < len(all_documents) else [],
+                metadatas=all_metadatas[query_index] if query_index < len(all_metadatas) and all_metadatas[query_index] else [],
+                distances=all_distances[query_index] if query_index < len(all_distances) and all_distances[query_index] else [],
+                default_document_id=document_id,
+            )
+            fresh[missing[(query, document_id)]] = evidence
+    return fresh
+
+
+def _batch_cache_keys(
+    queries: list[str],
+    document_ids: list[str],
+    top_k: int,
+    generations: dict[str, int],
+) -> dict[tuple[str, str], str]:
+    return {
+        (query, document_id): _retrieval_cache_key(
+            query=query,
+            document_id=document_id,
+            top_k=top_k,
+            generation=generations[str(document_id)],
+        )
+        for query in queries
+        for document_id in document_ids
+    }
+
+
+def _split_cached_evidence(
+    queries: list[str],
+    document_ids: list[str],
+    cache_keys: dict[tuple[str, str], str],
+    cached: dict,
+) -> tuple[dict[tuple[str, str], list[dict]], list[str], list[str]]:
+    """(cached evidence per (query, document_id), queries to embed, documents to query)."""
+    grouped: dict[tuple[str, str], list[dict]] = {}
+    missing_queries: list[str] = []
+    missing_documents: list[str] = []
+    for query in queries:
+        for document_id in document_ids:
+            cached_evidence = cached.get(cache_keys[(query, document_id)])
+            if isinstance(cached_evidence, list):
+                grouped[(query, document_id)] = cached_evidence
+                continue
+            if query not in missing_queries:
+                missing_queries.append(query)
+            if document_id not in missing_documents:
+                missing_documents.append(document_id)
+    return grouped, missing_queries, missing_documents
+
+
 def retrieve_document_chunks(query: str, document_id: str, top_k: int = 5):
     evidence = retrieve_document_evidence(query=query, document_id=document_id, top_k=top_k)
     return [item.get("text", "") for item in evidence if item.get("text")]
@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+_INITIAL_ROWS = 8
+_SIMILARITY_SAMPLE_SIZE = 1000
+
+
+def _normalized(vector) -> np.ndarray | None:
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array))
+    if not norm or not np.isfinite(norm):
+        return None
+    return array / norm
+
+
+class _ScopeIndex:
+    """
+    Question embeddings of one document set: unit-length rows of a float32
+    matrix that grows up to `max_entries`, with the response cache key each row
+    answers and a last-used tick for LRU eviction.
+    """
+
+    def __init__(self, dim: int, max_entries: int):
+        self.max_entries = max_entries
+        self.matrix = np.zeros((min(_INITIAL_ROWS, max_entries), dim), dtype=np.float32)
+        self.last_used = np.zeros(len(self.matrix), dtype=np.int64)
+        self.keys: list[str] = []
+        self.rows: dict[str, int] = {}
+
+    def search(self, vector: np.ndarray) -> tuple[int, float] | None:
+        if not self.keys or vector.shape[0] != self.matrix.shape[1]:
+            return None
+        similarities = self.matrix[: len(self.keys)] @ vector
+        row = int(np.argmax(similarities))
+        return row, float(similarities[row])
+
+    def add(self, response_key: str, vector: np.ndarray, tick: int):
+        if vector.shape[0] != self.matrix.shape[1]:
+            return
+        row = self.rows.get(response_key)
+        if row is None:
+            if len(self.keys) < len(self.matrix):
+                row = len(self.keys)
+                self.keys.append(response_key)
+            elif len(self.matrix) < self.max_entries:
+                self._grow()
+                row = len(self.keys)
+                self.keys.append(response_key)
+            else:
+                row = int(np.argmin(self.last_used))
+                del self.rows[self.keys[row]]
+                self.keys[row] = response_key
+            self.rows[response_key] = row
+        self.matrix[row] = vector
+        self.last_used[row] = tick
+
+    def discard(self, response_key: str):
+        row = self.rows.pop(response_key, None)
+        if row is None:
+            return
+        # Move the last row into the hole so the live rows stay contiguous.
+        last = len(self.keys) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.last_used[row] = self.last_used[last]
+            self.keys[row] = self.keys[last]
+            self.rows[self.keys[row]] = row
+        self.keys.pop()
+
+    def _grow(self):
+        rows = min(self.max_entries, len(self.matrix) * 2)
+        matrix = np.zeros((rows, self.matrix.shape[1]), dtype=np.float32)
+        matrix[: len(self.matrix)] = self.matrix
+        last_used = np.zeros(rows, dtype=np.int64)
+        last_used[: len(self.last_used)] = self.last_used
+        self.matrix, self.last_used = matrix, last_used
+
+
+class SemanticResponseCache:
+    """
+    In-process index from question embeddings to QA response cache keys, one
+    per document set (the scope). A question whose embedding has cosine
+    similarity of at least `threshold` with a cached question reuses that
+    question's cached answer. Scopes and the rows in each scope are evicted
+    least recently used first. The answers themselves stay in the response
+    cache; this index only points at them.
+    """
+
+    def __init__(self, threshold: float, max_scopes: int, max_entries_per_scope: int):
+        self.threshold = threshold
+        self.max_scopes = max(1, max_scopes)
+        self.max_entries_per_scope = max(1, max_entries_per_scope)
+        self._scopes: OrderedDict[str, _ScopeIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._tick = 0
+        self.lookups = 0
+        self.hits = 0
+        self._hit_similarities: deque[float] = deque(maxlen=_SIMILARITY_SAMPLE_SIZE)
+
+    def lookup(self, scope: str, vector) -> tuple[str, float] | None:
+        """(response_key, similarity) of the closest cached question, if close enough."""
+        query = _normalized(vector)
+        with self._lock:
+            self.lookups += 1
+            index = self._scopes.get(scope)
+            if index is None or query is None:
+                return None
+            self._scopes.move_to_end(scope)
+            found = index.search(query)
+            if found is None or found[1] < self.threshold:
+                return None
+            row, similarity = found
+            self._tick += 1
+            index.last_used[row] = self._tick
+            self.hits += 1
+            self._hit_similarities.append(similarity)
+            return index.keys[row], similarity
+
+    def add(self, scope: str, vector, response_key: str):
+        normalized = _normalized(vector)
+        if normalized is None:
+            return
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is None:
+                index = self._scopes[scope] = _ScopeIndex(normalized.shape[0], self.max_entries_per_scope)
+                while len(self._scopes) > self.max_scopes:
+                    self._scopes.popitem(last=False)
+            self._scopes.move_to_end(scope)
+            self._tick += 1
+            index.add(response_key, normalized, self._tick)
+
+    def discard(self, scope: str, response_key: str):
+        """Forget a question whose cached answer has expired."""
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is not None:
+                index.discard(response_key)
+                if not index.keys:
+                    del self._scopes[scope]
+
+    def stats(self) -> dict:
+        with self._lock:
+            similarities = np.array(self._hit_similarities, dtype=np.float32)
+            entries = sum(len(index.keys) for index in self._scopes.values())
+            distribution = None
+            if len(similarities):
+                p50, p90 = np.percentile(similarities, [50, 90])
+                distribution = {
+                    "min": round(float(similarities.min()), 4),
+                    "p50": round(float(p50), 4),
+                    "p90": round(float(p90), 4),
+                    "max": round(float(similarities.max()), 4),
+                }
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "hit_similarity": distribution,
+                "threshold": self.threshold,
+                "scopes": len(self._scopes),
+                "entries": entries,
+            }
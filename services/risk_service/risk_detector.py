@@ -3,6 +3,7 @@ import uuid
 from typing import Iterable
 
 from shared.database.session import SessionLocal
+from services.extraction_service.sentence_index import SentenceIndex, tokenize
 from shared.models.risk import Risk
 from services.risk_service.risk_repository import RiskRepository
 
@@ -46,40 +47,146 @@ RISK_RULES = [
 ]
 
 
+_ANCHOR_PATTERN = re.compile(r"\\b([A-Za-z0-9]+)")
+_TOKEN_MEMO_LIMIT = 100000
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _literal_anchor(pattern: str) -> str | None:
+    """
+    Lowercase literal every match of `pattern` must start with at a word start,
+    e.g. "penalt" for penalt(?:y|ies). None when it cannot be derived safely.
+    """
+    match = _ANCHOR_PATTERN.match(pattern)
+    if match is None or _has_top_level_alternation(pattern):
+        return None
+    literal = match.group(1)
+    if pattern[match.end():match.end() + 1] in {"?", "*", "{"}:
+        literal = literal[:-1]
+    return literal.lower() or None
+
+
+class CompiledRiskRules:
+    """
+    Rule set compiled once for scanning. The patterns are not merged into one
+    regex: each rule gets its own compiled pattern, keyed by the literal word
+    prefixes (anchors) its patterns must start with. A sentence is tokenized
+    once, the tokens select the rules whose anchor occurs in it, and only those
+    rules' regexes are run. Rules without a derivable anchor are run on every
+    sentence.
+    """
+
+    def __init__(self, rules: list[dict]):
+        self.rules = list(rules)
+        self._rule_patterns = [
+            re.compile("|".join(f"(?:{pattern})" for pattern in rule["patterns"]), re.IGNORECASE)
+            for rule in self.rules
+        ]
+        self._unanchored: set[int] = set()
+        self._anchors_by_length: dict[int, dict[str, set[int]]] = {}
+        for idx, rule in enumerate(self.rules):
+            anchors = [_literal_anchor(pattern) for pattern in rule["patterns"]]
+            if not anchors or any(anchor is None for anchor in anchors):
+                self._unanchored.add(idx)
+                continue
+            for anchor in anchors:
+                self._anchors_by_length.setdefault(len(anchor), {}).setdefault(anchor, set()).add(idx)
+        self._token_candidates: dict[str, frozenset[int]] = {}
+
+    def _candidates_for_token(self, token: str) -> frozenset[int]:
+        candidates = self._token_candidates.get(token)
+        if candidates is None:
+            found = set()
+            for length, anchors in self._anchors_by_length.items():
+                if len(token) >= length:
+                    found.update(anchors.get(token[:length], ()))
+            candidates = frozenset(found)
+            if len(self._token_candidates) >= _TOKEN_MEMO_LIMIT:
+                self._token_candidates.clear()
+            self._token_candidates[token] = candidates
+        return candidates
+
+    def matching_rules(self, sentence: str, tokens: Iterable[str] | None = None) -> list[dict]:
+        """Pass the sentence's lowercase tokens when they are already known, e.g. from a SentenceIndex."""
+        candidates = set(self._unanchored)
+        for token in tokenize(sentence) if tokens is None else tokens:
+            candidates.update(self._candidates_for_token(token))
+        return [
+            self.rules[idx]
+            for idx in sorted(candidates)
+            if self._rule_patterns[idx].search(sentence)
+        ]
+
+
+DEFAULT_RISK_RULES = CompiledRiskRules(RISK_RULES)
+
+
 def _extract_candidate_sentences(text: str) -> Iterable[str]:
     if not text:
         return []
-    sentences = re.split(r"(?<=[.!?])\s+|\n", text)
-    return [sentence.strip() for sentence in sentences if sentence and sentence.strip()]
+    return list(SentenceIndex.from_text(text).sentences())
 
 
-def detect_risks(text: str) -> list[dict]:
-    sentences = _extract_candidate_sentences(text)
+def detect_risks(
+    text: str | None = None,
+    seen: set | None = None,
+    rules: CompiledRiskRules | None = None,
+    index: SentenceIndex | None = None,
+) -> list[dict]:
+    """
+    Pass the document's SentenceIndex instead of `text` to reuse its sentences
+    and tokens. Pass a shared `seen` set when scanning a document segment by
+    segment so that a clause repeated on several pages is reported once.
+    """
+    rules = rules or DEFAULT_RISK_RULES
+    index = index if index is not None else SentenceIndex.from_text(text or "")
     findings = []
-    seen = set()
-    for sentence in sentences:
+    seen = set() if seen is None else seen
+    for idx, sentence in enumerate(index.sentences()):
+        matched_rules = rules.matching_rules(sentence, index.token_set(idx))
+        if not matched_rules:
+            continue
         sentence_lower = sentence.lower()
-        for rule in RISK_RULES:
-            if any(re.search(pattern, sentence_lower, re.IGNORECASE) for pattern in rule["patterns"]):
-                key = (rule["name"], sentence_lower[:120])
-                if key in seen:
-                    continue
-                seen.add(key)
-                findings.append(
-                    {
-                        "description": f"{rule['description']} Source: {sentence[:260]}",
-                        "severity": rule["severity"],
-                        "confidence_score": rule["confidence"],
-                        "detected_by": "rule_engine",
-                    }
-                )
+        for rule in matched_rules:
+            key = (rule["name"], sentence_lower[:120])
+            if key in seen:
+                continue
+            seen.add(key)
+            findings.append(
+                {
+                    "description": f"{rule['description']} Source: {sentence[:260]}",
+                    "severity": rule["severity"],
+                    "confidence_score": rule["confidence"],
+                    "detected_by": "rule_engine",
+                }
+            )
     return findings
 
 
 def persist_detected_risks(db, document_id: str, findings: list[dict]) -> list[Risk]:
-    created = []
-    for finding in findings:
-        risk = Risk(
+    risks = [
+        Risk(
             id=uuid.uuid4(),
             document_id=document_id,
             description=finding["description"],
@@ -87,16 +194,33 @@ def persist_detected_risks(db, document_id: str, findings: list[dict]) -> list[R
             confidence_score=finding.get("confidence_score"),
             detected_by=finding.get("detected_by", "rule_engine"),
         )
-        created.append(RiskRepository.create(db, risk))
-    return created
+        for finding in findings
+    ]
+    return RiskRepository.create_many(db, risks)
 
 
-def run_risk_detection_pipeline(document_id: str, text: str):
+def record_detected_risks(document_id: str, findings: list[dict]) -> list[Risk]:
+    if not findings:
+        return []
     db = SessionLocal()
     try:
-        findings = detect_risks(text)
-        if not findings:
-            return []
         return persist_detected_risks(db, document_id, findings)
     finally:
         db.close()
+
+
+def clone_document_risks(db, source_document_id: str, target_document_id: str) -> list[Risk]:
+    findings = [
+        {
+            "description": risk.description,
+            "severity": risk.severity,
+            "confidence_score": risk.confidence_score,
+            "detected_by": risk.detected_by,
+        }
+        for risk in reversed(RiskRepository.get_by_document(db, source_document_id))
+    ]
+    return persist_detected_risks(db, target_document_id, findings)
+
+
+def run_risk_detection_pipeline(document_id: str, text: str, index: SentenceIndex | None = None):
+    return record_detected_risks(document_id, detect_risks(text, index=index))
@@ -9,6 +9,19 @@ class RiskRepository:
         db.refresh(risk)
         return risk
 
+    @staticmethod
+    def create_many(db: Session, risks: list[Risk], commit: bool = True) -> list[Risk]:
+        # One flush batches the INSERTs (executemany / multi-row VALUES) instead of a
+        # transaction and refresh per row. Rows are not refreshed afterwards.
+        if not risks:
+            return []
+        db.add_all(risks)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return risks
+
     @staticmethod
     def get_by_document(db: Session, document_id):
         return (
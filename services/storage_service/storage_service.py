@@ -51,3 +51,16 @@ class StorageService:
         blob = self.bucket.blob(object_name)
         blob.download_to_filename(destination_path)
         return destination_path
+
+    def upload_path(self, source_path: str, object_name: str):
+        blob = self.bucket.blob(object_name)
+        blob.upload_from_filename(source_path)
+        return object_name
+
+    def exists(self, object_name: str) -> bool:
+        return self.bucket.blob(object_name).exists()
+
+    def delete_file(self, object_name: str):
+        blob = self.bucket.blob(object_name)
+        if blob.exists():
+            blob.delete()
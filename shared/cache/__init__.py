@@ -1,3 +1,4 @@
 from shared.cache.cache_service import get_cache_service
+from shared.cache.single_flight import AsyncSingleFlight, SingleFlight
 
-__all__ = ["get_cache_service"]
+__all__ = ["get_cache_service", "AsyncSingleFlight", "SingleFlight"]
@@ -1,19 +1,144 @@
+import asyncio
 import json
+import threading
 import time
+import uuid
+from collections import OrderedDict
 from typing import Any
 
 from shared.config.settings import settings
 
 
+# Delete the lock only if it still holds our token, so an expired lock that
+# another process has since taken is left alone.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _local_ttls() -> dict[str, int]:
+    """
+    Seconds a key may be served from process memory, per keyspace (the first two
+    parts of the key). Other processes' writes are only seen once a local copy
+    expires, so these stay short. A TTL of 0 keeps the keyspace in Redis only
+    while Redis is reachable. Keyspaces not listed are never held locally.
+    """
+    return {
+        "qa:retrieval": settings.QA_RETRIEVAL_LOCAL_TTL_SECONDS,
+        "qa:response": settings.QA_RESPONSE_LOCAL_TTL_SECONDS,
+        "qa:thread": settings.QA_THREAD_LOCAL_TTL_SECONDS,
+        "notification:pref": settings.NOTIFICATION_PREF_LOCAL_TTL_SECONDS,
+        "index:generation": settings.INDEX_GENERATION_LOCAL_TTL_SECONDS,
+    }
+
+
+# Keyspaces that keep their short local TTL even while Redis is down. A stale
+# index generation would keep answering from replaced chunks, and the database
+# can always rebuild it, so it is never held locally for its full TTL.
+_DEGRADED_CAPPED_KEYSPACES = frozenset({"index:generation"})
+
+
+def _keyspace(key: str) -> str:
+    return ":".join(key.split(":", 2)[:2])
+
+
+def _decode_json(raw_values: dict[str, str]) -> dict[str, Any]:
+    values = {}
+    for key, raw in raw_values.items():
+        try:
+            values[key] = json.loads(raw)
+        except Exception:
+            continue
+    return values
+
+
+def _encode_json(items: dict[str, Any]) -> dict[str, str]:
+    payloads = {}
+    for key, value in items.items():
+        try:
+            payloads[key] = json.dumps(value)
+        except Exception:
+            continue
+    return payloads
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU of raw cached values with per-entry expiry. Entries
+    written while Redis was unreachable are marked degraded: they are served
+    only until Redis answers again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[float, str, bool]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[str, bool] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, degraded = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, degraded
+
+    def set(self, key: str, value: str, ttl_seconds: int, degraded: bool = False):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value, degraded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, keyspace: str | None = None):
+        with self._lock:
+            if keyspace is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if _keyspace(key) == keyspace]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class CacheService:
+    """
+    Redis-backed cache with an in-process L1 tier in front of it. Hot keys of
+    the keyspaces in _local_ttls() are served from memory; when Redis is
+    unreachable those keyspaces keep caching locally for their full TTL (except
+    _DEGRADED_CAPPED_KEYSPACES, which keep their local TTL) and Redis is retried after CACHE_REDIS_RETRY_SECONDS. The `a`-prefixed
+    methods are asyncio variants that talk to Redis through redis.asyncio and
+    share the local tier, counters and Redis back-off with the sync methods.
+    """
+
     _redis_client = None
+    _redis_retry_at = 0.0
+    _local: LocalCache | None = None
     _fallback_counters: dict[str, tuple[int, int]] = {}
 
     def __init__(self):
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self._async_redis_client = None
+        self._async_redis_loop = None
         if not settings.CACHE_ENABLED:
             return
         if CacheService._redis_client is None:
             CacheService._redis_client = self._init_redis_client()
+        if CacheService._local is None:
+            CacheService._local = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES)
 
     def _init_redis_client(self):
         try:
@@ -29,45 +154,309 @@ class CacheService:
         except Exception:
             return None
 
-    def get(self, key: str):
-        if not settings.CACHE_ENABLED or self._redis_client is None:
-            return None
+    def _init_async_redis_client(self):
         try:
-            return self._redis_client.get(key)
+            import redis.asyncio
+
+            return redis.asyncio.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=0.2,
+                socket_timeout=0.2,
+                retry_on_timeout=False,
+            )
         except Exception:
             return None
 
-    def set(self, key: str, value: str, ttl_seconds: int):
-        if not settings.CACHE_ENABLED or self._redis_client is None:
+    def _available_redis(self):
+        if self._redis_client is None or time.monotonic() < self._redis_retry_at:
+            return None
+        return self._redis_client
+
+    def _available_async_redis(self):
+        if not settings.CACHE_ENABLED or self._available_redis() is None:
+            return None
+        # asyncio connections belong to the loop that opened them. A client left
+        # behind by a finished loop cannot be closed from here, which is why
+        # asyncio.run() callers close theirs with aclose() before returning.
+        loop = asyncio.get_running_loop()
+        if self._async_redis_loop is not loop:
+            self._async_redis_client = self._init_async_redis_client()
+            self._async_redis_loop = loop
+        return self._async_redis_client
+
+    async def aclose(self):
+        """Close the asyncio Redis client opened on the running loop, if any."""
+        client = self._async_redis_client
+        if client is None or self._async_redis_loop is not asyncio.get_running_loop():
             return
+        self._async_redis_client = None
+        self._async_redis_loop = None
         try:
-            self._redis_client.setex(key, max(1, ttl_seconds), value)
-        except Exception:
+            await client.aclose()
+        except Exception as exc:
+            print(f"Closing the async Redis client failed: {exc}")
+
+    def _mark_redis_down(self):
+        # Skip Redis for a while instead of paying a connect timeout on every call.
+        self._redis_retry_at = time.monotonic() + settings.CACHE_REDIS_RETRY_SECONDS
+
+    def _local_ttl(self, key: str, ttl_seconds: int | None, degraded: bool) -> int | None:
+        if not settings.CACHE_LOCAL_ENABLED or self._local is None:
+            return None
+        keyspace = _keyspace(key)
+        local_ttl = _local_ttls().get(keyspace)
+        if local_ttl is None:
+            return None
+        if degraded and keyspace not in _DEGRADED_CAPPED_KEYSPACES:
+            return ttl_seconds
+        if local_ttl <= 0:
+            return None
+        return local_ttl if ttl_seconds is None else min(local_ttl, ttl_seconds)
+
+    def _remember(self, key: str, value: str, ttl_seconds: int | None, degraded: bool = False):
+        local_ttl = self._local_ttl(key, ttl_seconds, degraded)
+        if local_ttl:
+            self._local.set(key, value, local_ttl, degraded)
+        elif self._local is not None:
+            self._local.delete(key)
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """Values of the keys that are cached, from the local tier and one MGET."""
+        if not settings.CACHE_ENABLED:
+            return {}
+        found, degraded, pending = self._split_local(keys)
+        if not pending:
+            return found
+
+        values = None
+        client = self._available_redis()
+        if client is not None:
+            try:
+                values = client.mget(pending)
+            except Exception:
+                self._mark_redis_down()
+        return self._merge_remote(pending, values, found, degraded)
+
+    async def aget_many(self, keys: list[str]) -> dict[str, str]:
+        if not settings.CACHE_ENABLED:
+            return {}
+        found, degraded, pending = self._split_local(keys)
+        if not pending:
+            return found
+
+        values = None
+        client = self._available_async_redis()
+        if client is not None:
+            try:
+                values = await client.mget(pending)
+            except Exception:
+                self._mark_redis_down()
+        return self._merge_remote(pending, values, found, degraded)
+
+    def _split_local(self, keys: list[str]) -> tuple[dict[str, str], dict[str, str], list[str]]:
+        """(fresh local hits, degraded local values, keys to read from Redis)."""
+        found: dict[str, str] = {}
+        degraded: dict[str, str] = {}
+        pending: list[str] = []
+        for key in dict.fromkeys(keys):
+            local = self._local.get(key) if self._local is not None else None
+            if local is not None and not local[1]:
+                self.local_hits += 1
+                found[key] = local[0]
+                continue
+            pending.append(key)
+            if local is not None:
+                degraded[key] = local[0]
+        return found, degraded, pending
+
+    def _merge_remote(
+        self,
+        pending: list[str],
+        values: list | None,
+        found: dict[str, str],
+        degraded: dict[str, str],
+    ) -> dict[str, str]:
+        """Add the MGET values of the pending keys to found; values is None when Redis failed."""
+        if values is None:
+            for key in pending:
+                if key in degraded:
+                    self.local_hits += 1
+                    found[key] = degraded[key]
+                else:
+                    self.misses += 1
+            return found
+
+        for key, value in zip(pending, values):
+            if value is None:
+                self.misses += 1
+                if key in degraded:
+                    self._local.delete(key)
+                continue
+            self.remote_hits += 1
+            found[key] = value
+            # The remaining Redis TTL is unknown here; the local TTL is short
+            # enough that briefly outliving the Redis entry is fine.
+            self._remember(key, value, None)
+        return found
+
+    def set(self, key: str, value: str, ttl_seconds: int):
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(self, items: dict[str, str], ttl_seconds: int, only_if_absent: bool = False):
+        """
+        SETEX every item in one pipelined round trip. With `only_if_absent`
+        existing keys are left as they are (SET NX), so a value read from a
+        slower source cannot overwrite a newer one written meanwhile.
+        """
+        if not settings.CACHE_ENABLED or not items:
+            return
+        ttl_seconds = max(1, ttl_seconds)
+        written = None
+        client = self._available_redis()
+        if client is not None:
+            try:
+                pipeline = self._queue_writes(client.pipeline(transaction=False), items, ttl_seconds, only_if_absent)
+                written = [bool(result) for result in pipeline.execute()]
+            except Exception:
+                self._mark_redis_down()
+        self._remember_written(items, ttl_seconds, written)
+
+    async def aset_many(self, items: dict[str, str], ttl_seconds: int, only_if_absent: bool = False):
+        if not settings.CACHE_ENABLED or not items:
+            return
+        ttl_seconds = max(1, ttl_seconds)
+        written = None
+        client = self._available_async_redis()
+        if client is not None:
+            try:
+                pipeline = self._queue_writes(client.pipeline(transaction=False), items, ttl_seconds, only_if_absent)
+                written = [bool(result) for result in await pipeline.execute()]
+            except Exception:
+                self._mark_redis_down()
+        self._remember_written(items, ttl_seconds, written)
+
+    @staticmethod
+    def _queue_writes(pipeline, items: dict[str, str], ttl_seconds: int, only_if_absent: bool):
+        for key, value in items.items():
+            if only_if_absent:
+                pipeline.set(key, value, ex=ttl_seconds, nx=True)
+            else:
+                pipeline.setex(key, ttl_seconds, value)
+        return pipeline
+
+    def _remember_written(self, items: dict[str, str], ttl_seconds: int, written: list[bool] | None):
+        """Keep what was written locally; everything, as degraded, when Redis failed (written is None)."""
+        if written is None:
+            for key, value in items.items():
+                self._remember(key, value, ttl_seconds, degraded=True)
             return
+        for (key, value), was_written in zip(items.items(), written):
+            if was_written:
+                self._remember(key, value, ttl_seconds)
 
     def delete(self, key: str):
-        if not settings.CACHE_ENABLED or self._redis_client is None:
+        """Invalidate a key in both tiers."""
+        if not settings.CACHE_ENABLED:
+            return
+        if self._local is not None:
+            self._local.delete(key)
+        client = self._available_redis()
+        if client is None:
             return
         try:
-            self._redis_client.delete(key)
+            client.delete(key)
         except Exception:
-            return
+            self._mark_redis_down()
 
-    def get_json(self, key: str) -> Any:
-        raw = self.get(key)
-        if raw is None:
-            return None
+    def acquire_lock(self, key: str, ttl_seconds: int) -> str | None:
+        """
+        Take a short Redis lock. Returns the token to release it with, or None
+        if another holder has it. Without Redis every caller gets the lock.
+        """
+        token = uuid.uuid4().hex
+        client = self._available_redis() if settings.CACHE_ENABLED else None
+        if client is None:
+            return token
         try:
-            return json.loads(raw)
+            acquired = client.set(key, token, nx=True, ex=max(1, ttl_seconds))
         except Exception:
-            return None
+            self._mark_redis_down()
+            return token
+        return token if acquired else None
 
-    def set_json(self, key: str, value: Any, ttl_seconds: int):
+    def release_lock(self, key: str, token: str):
+        client = self._available_redis() if settings.CACHE_ENABLED else None
+        if client is None:
+            return
+        try:
+            client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception:
+            self._mark_redis_down()
+
+    async def aacquire_lock(self, key: str, ttl_seconds: int) -> str | None:
+        token = uuid.uuid4().hex
+        client = self._available_async_redis()
+        if client is None:
+            return token
         try:
-            payload = json.dumps(value)
+            acquired = await client.set(key, token, nx=True, ex=max(1, ttl_seconds))
         except Exception:
+            self._mark_redis_down()
+            return token
+        return token if acquired else None
+
+    async def arelease_lock(self, key: str, token: str):
+        client = self._available_async_redis()
+        if client is None:
             return
-        self.set(key, payload, ttl_seconds)
+        try:
+            await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception:
+            self._mark_redis_down()
+
+    def invalidate_local(self, keyspace: str | None = None):
+        """
+        Drop this process's copies of a keyspace (or of everything), e.g. after
+        the data behind it changed. Other processes catch up within the local TTL.
+        """
+        if self._local is not None:
+            self._local.clear(keyspace)
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "local_entries": len(self._local) if self._local is not None else 0,
+        }
+
+    def get_json(self, key: str) -> Any:
+        return self.get_many_json([key]).get(key)
+
+    def get_many_json(self, keys: list[str]) -> dict[str, Any]:
+        return _decode_json(self.get_many(keys))
+
+    def set_json(self, key: str, value: Any, ttl_seconds: int):
+        self.set_many_json({key: value}, ttl_seconds)
+
+    def set_many_json(self, items: dict[str, Any], ttl_seconds: int, only_if_absent: bool = False):
+        self.set_many(_encode_json(items), ttl_seconds, only_if_absent=only_if_absent)
+
+    async def aget_json(self, key: str) -> Any:
+        return (await self.aget_many_json([key])).get(key)
+
+    async def aget_many_json(self, keys: list[str]) -> dict[str, Any]:
+        return _decode_json(await self.aget_many(keys))
+
+    async def aset_json(self, key: str, value: Any, ttl_seconds: int):
+        await self.aset_many_json({key: value}, ttl_seconds)
+
+    async def aset_many_json(self, items: dict[str, Any], ttl_seconds: int, only_if_absent: bool = False):
+        await self.aset_many(_encode_json(items), ttl_seconds, only_if_absent=only_if_absent)
 
     def incr_with_ttl(self, key: str, ttl_seconds: int):
         ttl_seconds = max(1, ttl_seconds)
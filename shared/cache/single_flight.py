@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, TypeVar
+
+from shared.cache.cache_service import get_cache_service
+from shared.config.settings import settings
+
+T = TypeVar("T")
+
+_POLL_SECONDS = 0.1
+
+
+class _FlightCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+        self.wait_timeouts = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced_local": self.coalesced_local,
+                "coalesced_remote": self.coalesced_remote,
+                "wait_timeouts": self.wait_timeouts,
+            }
+
+
+class SingleFlight(_FlightCounters):
+    """
+    Coalesces concurrent computations of the same cache key. Within a process,
+    callers that arrive while a computation is running wait on its future.
+    Across processes, a short Redis lock elects one leader; the others poll the
+    cache until the leader has filled it, or take over once the lock is free.
+    Waiting is bounded by SINGLE_FLIGHT_WAIT_SECONDS, after which a caller
+    computes the value itself.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._inflight: dict[str, Future] = {}
+
+    def do(self, key: str, compute: Callable[[], T], cached: Callable[[], T | None]) -> T:
+        """
+        Return compute() for the key, sharing one computation between
+        concurrent callers. `cached` reads the value compute() stores in the
+        cache, or returns None while it is not there.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight[key] = Future()
+
+        if not is_leader:
+            try:
+                result = future.result(timeout=settings.SINGLE_FLIGHT_WAIT_SECONDS)
+            except FutureTimeoutError:
+                self._count("wait_timeouts")
+                return compute()
+            self._count("coalesced_local")
+            return result
+
+        try:
+            result = self._lead(key, compute, cached)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _lead(self, key: str, compute: Callable[[], T], cached: Callable[[], T | None]) -> T:
+        cache = get_cache_service()
+        lock_key = f"lock:{key}"
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        while True:
+            token = cache.acquire_lock(lock_key, settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS)
+            if token is not None:
+                try:
+                    # Another process may have filled the cache and released
+                    # the lock since the caller's own cache check.
+                    result = cached()
+                    if result is not None:
+                        self._count("coalesced_remote")
+                        return result
+                    self._count("leaders")
+                    return compute()
+                finally:
+                    cache.release_lock(lock_key, token)
+
+            if time.monotonic() >= deadline:
+                self._count("wait_timeouts")
+                return compute()
+            time.sleep(_POLL_SECONDS)
+            result = cached()
+            if result is not None:
+                self._count("coalesced_remote")
+                return result
+
+
+class AsyncSingleFlight(_FlightCounters):
+    """
+    SingleFlight for coroutines on one event loop: waiting callers await the
+    leader's future and the lock is polled with asyncio.sleep, so coalesced
+    requests hold no threads. compute and cached return awaitables.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def do(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), settings.SINGLE_FLIGHT_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                self._count("wait_timeouts")
+                return await compute()
+            except asyncio.CancelledError:
+                # The leader was cancelled (its client went away); this caller was not.
+                if not future.cancelled():
+                    raise
+                return await compute()
+            self._count("coalesced_local")
+            return result
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._lead(key, compute, cached)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved when nobody was waiting for it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _lead(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        cache = get_cache_service()
+        lock_key = f"lock:{key}"
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        while True:
+            token = await cache.aacquire_lock(lock_key, settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS)
+            if token is not None:
+                try:
+                    result = await cached()
+                    if result is not None:
+                        self._count("coalesced_remote")
+                        return result
+                    self._count("leaders")
+                    return await compute()
+                finally:
+                    await cache.arelease_lock(lock_key, token)
+
+            if time.monotonic() >= deadline:
+                self._count("wait_timeouts")
+                return await compute()
+            await asyncio.sleep(_POLL_SECONDS)
+            result = await cached()
+            if result is not None:
+                self._count("coalesced_remote")
+                return result
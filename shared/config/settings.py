@@ -10,18 +10,45 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_ENABLED: bool = True
-    QA_RETRIEVAL_CACHE_TTL_SECONDS: int = 900
-    QA_RESPONSE_CACHE_TTL_SECONDS: int = 300
+    QA_RETRIEVAL_CACHE_TTL_SECONDS: int = 604800
+    QA_RESPONSE_CACHE_TTL_SECONDS: int = 259200
     QA_THREAD_TTL_SECONDS: int = 86400
     QA_THREAD_MAX_TURNS: int = 6
     NOTIFICATION_PREF_CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CACHE_REDIS_RETRY_SECONDS: int = 5
+    QA_RETRIEVAL_LOCAL_TTL_SECONDS: int = 60
+    QA_RESPONSE_LOCAL_TTL_SECONDS: int = 30
+    QA_THREAD_LOCAL_TTL_SECONDS: int = 0
+    NOTIFICATION_PREF_LOCAL_TTL_SECONDS: int = 60
+    INDEX_GENERATION_CACHE_TTL_SECONDS: int = 3600
+    INDEX_GENERATION_LOCAL_TTL_SECONDS: int = 5
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: int = 30
+    SINGLE_FLIGHT_WAIT_SECONDS: int = 30
+    QA_SEMANTIC_CACHE_ENABLED: bool = True
+    QA_SEMANTIC_CACHE_THRESHOLD: float = 0.93
+    QA_SEMANTIC_CACHE_MAX_SCOPES: int = 256
+    QA_SEMANTIC_CACHE_MAX_ENTRIES_PER_SCOPE: int = 64
+    QA_RETRIEVAL_EXECUTOR_WORKERS: int = 16
+    QA_STATS_LOG_INTERVAL_SECONDS: int = 300
     AUTH_RATE_LIMIT_WINDOW_SECONDS: int = 60
     LOGIN_RATE_LIMIT_PER_WINDOW: int = 10
     REGISTER_RATE_LIMIT_PER_WINDOW: int = 5
 
     OPENAI_API_KEY: str
+    OBLIGATION_VALIDATION_CONCURRENCY: int = 8
+    OBLIGATION_FAST_PATH_MIN_CONFIDENCE: float = 0.8
+    OBLIGATION_VALIDATION_BATCH_SIZE: int = 0
+    OBLIGATION_VALIDATION_CACHE_TTL_SECONDS: int = 2592000
+    OBLIGATION_VALIDATION_LOCAL_CACHE_SIZE: int = 10000
 
     CHROMA_DIR: str = "./chroma_db"
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "./embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
+    EMBEDDING_CACHE_REDIS_ENABLED: bool = False
+    EMBEDDING_CACHE_REDIS_TTL_SECONDS: int = 604800
     GCS_BUCKET: str = "documents"
     GCP_PROJECT_ID: str | None = None
     GCS_CREDENTIALS_FILE: str | None = None
@@ -42,6 +69,12 @@ class Settings(BaseSettings):
     )
     ALLOWED_UPLOAD_EXTENSIONS: str = ".pdf,.txt,.docx,.csv,.xlsx,.xls,.jpg,.jpeg,.png,.eml,.msg,.html,.htm"
     PII_REDACTION_ENABLED: bool = True
+    PII_REDACTION_WORKERS: int = 0
+    PII_REDACTION_WINDOW_CHARS: int = 1048576
+    PII_PARALLEL_MIN_CHARS: int = 8388608
+    INGESTION_STREAMING_MIN_BYTES: int = 5242880
+    PDF_PARALLEL_PAGE_THRESHOLD: int = 200
+    PDF_EXTRACTION_WORKERS: int = 0
     JWT_SECRET_KEY: str = "siva_jwt_secret_key"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
@@ -13,5 +13,9 @@ class Document(Base):
     file_name = Column(String, nullable=False)
     file_type = Column(String, nullable=False)
     storage_path = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
     document_status = Column(String, default="uploaded")
     uploaded_at = Column(DateTime(timezone=True),server_default=func.now())
+    obligations_available_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped whenever the document's stored chunks change; part of QA cache keys.
+    index_generation = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,282 @@
+import pytest
+
+from shared.cache.cache_service import CacheService, LocalCache
+
+
+class _FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def setex(self, key, ttl_seconds, value):
+        self.commands.append((key, value, False))
+
+    def set(self, key, value, ex=None, nx=False):
+        self.commands.append((key, value, nx))
+
+    def execute(self):
+        self.redis_client._check()
+        self.redis_client.round_trips += 1
+        results = []
+        for key, value, nx in self.commands:
+            results.append(not (nx and key in self.redis_client.store))
+            if results[-1]:
+                self.redis_client.store[key] = value
+        return results
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.gets = 0
+        self.round_trips = 0
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis is down")
+
+    def mget(self, keys):
+        self._check()
+        self.gets += len(keys)
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        self._check()
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        self._check()
+        if self.store.get(key) == token:
+            del self.store[key]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def delete(self, key):
+        self._check()
+        self.store.pop(key, None)
+
+
+class _FakeAsyncPipeline(_FakePipeline):
+    async def execute(self):
+        return super().execute()
+
+
+class _FakeAsyncRedis:
+    """redis.asyncio-style client over the same store as a _FakeRedis."""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+    async def mget(self, keys):
+        return self.redis_client.mget(keys)
+
+    async def set(self, key, value, nx=False, ex=None):
+        return self.redis_client.set(key, value, nx=nx, ex=ex)
+
+    async def eval(self, script, numkeys, key, token):
+        return self.redis_client.eval(script, numkeys, key, token)
+
+    def pipeline(self, transaction=True):
+        return _FakeAsyncPipeline(self.redis_client)
+
+
+def _cache_service(monkeypatch, redis_client, max_entries=100) -> CacheService:
+    monkeypatch.setattr(CacheService, "_redis_client", redis_client)
+    monkeypatch.setattr(CacheService, "_local", LocalCache(max_entries))
+    monkeypatch.setattr("shared.cache.cache_service.settings.CACHE_ENABLED", True)
+    monkeypatch.setattr("shared.cache.cache_service.settings.CACHE_LOCAL_ENABLED", True)
+    monkeypatch.setattr(CacheService, "_init_async_redis_client", lambda self: _FakeAsyncRedis(redis_client))
+    return CacheService()
+
+
+def test_hot_keys_are_served_locally(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    redis_client.store["qa:retrieval:v1:doc-1:5:abc"] = '["chunk"]'
+
+    assert cache.get_json("qa:retrieval:v1:doc-1:5:abc") == ["chunk"]
+    assert cache.get_json("qa:retrieval:v1:doc-1:5:abc") == ["chunk"]
+
+    assert redis_client.gets == 1
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["remote_hits"] == 1
+
+
+def test_unlisted_and_zero_ttl_keyspaces_always_read_redis(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+
+    cache.set_json("embedding:v1:abc", [0.1], ttl_seconds=60)
+    cache.set_json("qa:thread:user-1:thread-1", [{"question": "q"}], ttl_seconds=60)
+    cache.get_json("embedding:v1:abc")
+    cache.get_json("qa:thread:user-1:thread-1")
+
+    assert redis_client.gets == 2
+    assert cache.stats()["local_entries"] == 0
+
+
+def test_local_tier_is_lru_bounded(monkeypatch):
+    cache = _cache_service(monkeypatch, _FakeRedis(), max_entries=2)
+
+    for idx in range(3):
+        cache.set_json(f"qa:response:v1:docs:{idx}", {"answer": idx}, ttl_seconds=60)
+
+    assert cache.stats()["local_entries"] == 2
+    assert cache._local.get("qa:response:v1:docs:0") is None
+
+
+def test_redis_outage_degrades_to_local_caching(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    redis_client.down = True
+
+    cache.set_json("qa:thread:user-1:thread-1", [{"question": "q", "answer": "a"}], ttl_seconds=60)
+    assert cache.get_json("qa:thread:user-1:thread-1") == [{"question": "q", "answer": "a"}]
+
+    # Once Redis answers again it is the source of truth for degraded entries.
+    redis_client.down = False
+    monkeypatch.setattr(cache, "_redis_retry_at", 0.0)
+    assert cache.get_json("qa:thread:user-1:thread-1") is None
+
+
+def test_redis_outage_keeps_index_generations_on_their_local_ttl(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    monkeypatch.setattr("shared.cache.cache_service.settings.INDEX_GENERATION_LOCAL_TTL_SECONDS", 5)
+    redis_client.down = True
+    remembered = []
+    monkeypatch.setattr(cache._local, "set", lambda key, value, ttl, degraded=False: remembered.append((key, ttl)))
+
+    cache.set_json("index:generation:doc-1", 3, ttl_seconds=3600)
+    cache.set_json("qa:response:v1:docs:q", {"answer": "ok"}, ttl_seconds=3600)
+
+    assert remembered == [("index:generation:doc-1", 5), ("qa:response:v1:docs:q", 3600)]
+
+
+def test_delete_invalidates_both_tiers(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    cache.set_json("notification:pref:v1:user-1", {"email_enabled": True}, ttl_seconds=60)
+    cache.set_json("qa:response:v1:docs:q", {"answer": "ok"}, ttl_seconds=60)
+
+    cache.delete("notification:pref:v1:user-1")
+    cache.invalidate_local("qa:response")
+
+    assert redis_client.store == {"qa:response:v1:docs:q": '{"answer": "ok"}'}
+    assert cache.stats()["local_entries"] == 0
+    assert cache.get_json("notification:pref:v1:user-1") is None
+
+
+def test_batch_operations_take_one_round_trip(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    keys = [f"qa:retrieval:v1:doc-{idx}:6:abc" for idx in range(4)]
+
+    cache.set_many_json({key: [idx] for idx, key in enumerate(keys[:3])}, ttl_seconds=60)
+    cache.invalidate_local()
+    found = cache.get_many_json(keys)
+
+    assert found == {keys[0]: [0], keys[1]: [1], keys[2]: [2]}
+    assert redis_client.round_trips == 2
+
+    assert cache.get_many_json(keys[:3]) == found
+    assert redis_client.round_trips == 2
+
+
+def test_lock_is_exclusive_and_only_released_by_its_holder(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+
+    token = cache.acquire_lock("lock:qa:response:k", ttl_seconds=30)
+    assert token is not None
+    assert cache.acquire_lock("lock:qa:response:k", ttl_seconds=30) is None
+
+    cache.release_lock("lock:qa:response:k", "someone-else")
+    assert "lock:qa:response:k" in redis_client.store
+    cache.release_lock("lock:qa:response:k", token)
+    assert cache.acquire_lock("lock:qa:response:k", ttl_seconds=30) is not None
+
+
+def test_only_if_absent_keeps_newer_values(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    cache.set_json("index:generation:doc-1", 3, ttl_seconds=60)
+
+    cache.set_many_json({"index:generation:doc-1": 2, "index:generation:doc-2": 0}, ttl_seconds=60, only_if_absent=True)
+
+    assert cache.get_many_json(["index:generation:doc-1", "index:generation:doc-2"]) == {
+        "index:generation:doc-1": 3,
+        "index:generation:doc-2": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_methods_share_the_local_tier_and_redis(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    cache.set_json("qa:response:v3:docs:q", {"answer": "ok"}, ttl_seconds=60)
+
+    assert await cache.aget_json("qa:response:v3:docs:q") == {"answer": "ok"}
+    assert redis_client.gets == 0
+
+    await cache.aset_many_json({"embedding:v1:a": [0.1], "embedding:v1:b": [0.2]}, ttl_seconds=60)
+    assert await cache.aget_many_json(["embedding:v1:a", "embedding:v1:b", "embedding:v1:c"]) == {
+        "embedding:v1:a": [0.1],
+        "embedding:v1:b": [0.2],
+    }
+    assert cache.get_json("embedding:v1:b") == [0.2]
+    # One pipelined write each for set_json and aset_many_json, one MGET each for the reads.
+    assert redis_client.round_trips == 4
+
+    token = await cache.aacquire_lock("lock:qa:response:k", ttl_seconds=30)
+    assert cache.acquire_lock("lock:qa:response:k", ttl_seconds=30) is None
+    await cache.arelease_lock("lock:qa:response:k", token)
+    assert "lock:qa:response:k" not in redis_client.store
+
+
+@pytest.mark.asyncio
+async def test_async_redis_outage_degrades_to_local_caching(monkeypatch):
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    redis_client.down = True
+
+    await cache.aset_json("qa:thread:user-1:thread-1", [{"question": "q"}], ttl_seconds=60)
+
+    assert await cache.aget_json("qa:thread:user-1:thread-1") == [{"question": "q"}]
+    assert cache.get_json("qa:thread:user-1:thread-1") == [{"question": "q"}]
+
+
+def test_aclose_releases_the_client_of_each_asyncio_run(monkeypatch):
+    import asyncio
+
+    redis_client = _FakeRedis()
+    cache = _cache_service(monkeypatch, redis_client)
+    clients = []
+    monkeypatch.setattr(
+        CacheService,
+        "_init_async_redis_client",
+        lambda self: clients.append(_FakeAsyncRedis(redis_client)) or clients[-1],
+    )
+
+    async def _lookup():
+        try:
+            return await cache.aget_json("embedding:v1:missing")
+        finally:
+            await cache.aclose()
+
+    asyncio.run(_lookup())
+    asyncio.run(_lookup())
+
+    assert len(clients) == 2
+    assert all(client.closed for client in clients)
+    assert cache._async_redis_client is None
@@ -0,0 +1,161 @@
+import hashlib
+import io
+from types import SimpleNamespace
+
+from services.document_service.document_service import DocumentService
+from services.ingestion_service.ingestion_pipeline import run_ingestion_pipeline
+
+
+class _FakeQuery:
+    def __init__(self, result):
+        self._result = result
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def order_by(self, *args, **kwargs):
+        return self
+
+    def first(self):
+        return self._result
+
+
+class _FakeUploadDB:
+    def __init__(self, existing):
+        self.existing = existing
+        self.added = []
+
+    def query(self, *args, **kwargs):
+        return _FakeQuery(self.existing)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def flush(self):
+        return None
+
+    def commit(self):
+        return None
+
+    def refresh(self, _obj):
+        return None
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.uploads = 0
+
+    def upload_file(self, file_obj, filename):
+        self.uploads += 1
+        return f"new_{filename}"
+
+
+def _upload(monkeypatch, existing):
+    storage = _FakeStorage()
+    monkeypatch.setattr("services.document_service.document_service.StorageService", lambda: storage)
+    enqueued = []
+    monkeypatch.setattr(
+        "services.document_service.document_service.ingest_document_task",
+        SimpleNamespace(delay=enqueued.append),
+    )
+    upload = SimpleNamespace(
+        filename="policy.pdf",
+        content_type="application/pdf",
+        file=io.BytesIO(b"same policy bytes"),
+    )
+    db = _FakeUploadDB(existing)
+    document = DocumentService().upload_document(db=db, file=upload, user_id="user-1")
+    return document, storage, enqueued
+
+
+def test_upload_stores_sha256_of_file(monkeypatch):
+    document, storage, enqueued = _upload(monkeypatch, existing=None)
+
+    assert document.content_hash == hashlib.sha256(b"same policy bytes").hexdigest()
+    assert document.storage_path == "new_policy.pdf"
+    assert storage.uploads == 1
+    assert len(enqueued) == 1
+
+
+def test_upload_reuses_blob_for_identical_content(monkeypatch):
+    document, storage, _ = _upload(monkeypatch, existing=SimpleNamespace(storage_path="old_policy.pdf"))
+
+    assert document.storage_path == "old_policy.pdf"
+    assert storage.uploads == 0
+
+
+class _FakeIngestionDB:
+    def __init__(self, document, duplicate):
+        self._results = [document, duplicate]
+
+    def query(self, *args, **kwargs):
+        return _FakeQuery(self._results.pop(0))
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+    def close(self):
+        return None
+
+    def refresh(self, _obj):
+        return None
+
+
+def test_ingestion_clones_identical_ingested_document(monkeypatch):
+    document = SimpleNamespace(
+        id="doc-new",
+        user_id="user-1",
+        file_name="policy.pdf",
+        storage_path="old_policy.pdf",
+        content_hash="a" * 64,
+        document_status="uploaded",
+    )
+    duplicate = SimpleNamespace(id="doc-old")
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.SessionLocal",
+        lambda: _FakeIngestionDB(document, duplicate),
+    )
+
+    def _fail_storage():
+        raise AssertionError("duplicate should not be downloaded")
+
+    monkeypatch.setattr("services.ingestion_service.ingestion_pipeline.StorageService", _fail_storage)
+
+    cloned = {}
+
+    def _fake_clone_chunks(source_id, target_id):
+        cloned["chunks"] = (source_id, target_id)
+        return 12
+
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_common._clone_document_chunks",
+        _fake_clone_chunks,
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_common.clone_document_risks",
+        lambda db, source_id, target_id: cloned.update({"risks": (source_id, target_id)}),
+    )
+
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_common.clone_document_obligations",
+        lambda db, source_id, target, commit=True: cloned.update({"obligations": (source_id, target.id, commit)})
+        or ["obligation"],
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_common.ReminderGenerator.generate_many",
+        lambda db, obligations, commit=True: cloned.update({"reminders": (obligations, commit)}),
+    )
+
+    run_ingestion_pipeline("doc-new")
+
+    assert cloned == {
+        "chunks": ("doc-old", "doc-new"),
+        "risks": ("doc-old", "doc-new"),
+        "obligations": ("doc-old", "doc-new", False),
+        "reminders": (["obligation"], False),
+    }
+    assert document.obligations_available_at is not None
+    assert document.document_status == "EXTRACTED"
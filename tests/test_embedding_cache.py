@@ -0,0 +1,93 @@
+import sqlite3
+
+from services.extraction_service.embedding_cache import CachedEmbeddings, LocalEmbeddingStore
+
+
+class _FakeEmbeddings:
+    model = "text-embedding-test"
+
+    def __init__(self):
+        self.requested = []
+
+    def embed_documents(self, texts):
+        self.requested.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    def embed_query(self, text):
+        self.requested.append([text])
+        return [float(len(text)), 0.5]
+
+
+def test_cached_embeddings_only_sends_misses(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.extraction_service.embedding_cache.settings.EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr("services.extraction_service.embedding_cache.settings.EMBEDDING_CACHE_REDIS_ENABLED", False)
+    fake = _FakeEmbeddings()
+    cached = CachedEmbeddings(fake, LocalEmbeddingStore(str(tmp_path / "emb.sqlite3"), max_entries=100))
+
+    first = cached.embed_documents(["clause a", "clause bb", "clause a"])
+    second = cached.embed_documents(["clause bb", "clause ccc"])
+
+    assert first == [[8.0, 0.5], [9.0, 0.5], [8.0, 0.5]]
+    assert second == [[9.0, 0.5], [10.0, 0.5]]
+    assert fake.requested == [["clause a", "clause bb"], ["clause ccc"]]
+    assert cached.stats() == {"local_hits": 1, "redis_hits": 0, "misses": 4, "hit_rate": 0.2}
+
+
+def test_local_store_persists_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.extraction_service.embedding_cache._TOUCH_INTERVAL_SECONDS", 0)
+    path = str(tmp_path / "emb.sqlite3")
+    store = LocalEmbeddingStore(path, max_entries=2)
+    store.set_many({"a": [1.0]})
+    store.set_many({"b": [2.0]})
+    store.get_many(["a"])
+    store.set_many({"c": [3.0]})
+
+    reopened = LocalEmbeddingStore(path, max_entries=2)
+
+    assert len(reopened) == 2
+    assert reopened.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+
+
+def test_local_store_tracks_row_count_without_counting_each_write(tmp_path):
+    store = LocalEmbeddingStore(str(tmp_path / "emb.sqlite3"), max_entries=3)
+    store.set_many({"a": [1.0], "b": [2.0]})
+    store.set_many({"a": [1.5]})
+    assert store._count == 2
+
+    store.set_many({"c": [3.0], "d": [4.0]})
+
+    assert store._count == len(store) == 3
+    assert store.get_many(["a", "b", "c", "d"]) == {"a": [1.5], "c": [3.0], "d": [4.0]}
+
+
+def test_local_store_reads_recently_used_keys_without_writing(tmp_path):
+    store = LocalEmbeddingStore(str(tmp_path / "emb.sqlite3"), max_entries=10)
+    store.set_many({"a": [1.0]})
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+
+    assert store.get_many(["a", "b"]) == {"a": [1.0]}
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("UPDATE")]
+
+
+class _LockedConnection:
+    def execute(self, *args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    executemany = execute
+
+    def rollback(self):
+        return None
+
+
+def test_locked_local_store_never_fails_an_embedding_call(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.extraction_service.embedding_cache.settings.EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr("services.extraction_service.embedding_cache.settings.EMBEDDING_CACHE_REDIS_ENABLED", False)
+    store = LocalEmbeddingStore(str(tmp_path / "emb.sqlite3"), max_entries=10)
+    store._conn = _LockedConnection()
+    fake = _FakeEmbeddings()
+
+    vectors = CachedEmbeddings(fake, store).embed_documents(["clause a"])
+
+    assert vectors == [[8.0, 0.5]]
+    assert fake.requested == [["clause a"]]
@@ -0,0 +1,79 @@
+import uuid
+from types import SimpleNamespace
+
+from services.extraction_service import index_generation
+from services.extraction_service.index_generation import get_index_generations, publish_index_generations
+
+
+class _FakeCache:
+    def __init__(self, store=None):
+        self.store = dict(store or {})
+        self.nx_writes = []
+
+    def get_many_json(self, keys):
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    def set_many_json(self, items, ttl_seconds, only_if_absent=False):
+        for key, value in items.items():
+            if only_if_absent:
+                self.nx_writes.append(key)
+                if key in self.store:
+                    continue
+            self.store[key] = value
+
+
+class _FakeQuery:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def all(self):
+        self.calls.append(1)
+        return self.rows
+
+
+class _FakeSession:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def query(self, *args):
+        return _FakeQuery(self.rows, self.calls)
+
+    def close(self):
+        return None
+
+
+def test_generations_are_read_from_cache_then_database(monkeypatch):
+    cached_id, stored_id, unknown_id = (str(uuid.uuid4()) for _ in range(3))
+    cache = _FakeCache({f"index:generation:{cached_id}": 4})
+    calls = []
+    monkeypatch.setattr(index_generation, "get_cache_service", lambda: cache)
+    monkeypatch.setattr(
+        index_generation,
+        "SessionLocal",
+        lambda: _FakeSession([(uuid.UUID(stored_id), 2)], calls),
+    )
+
+    generations = get_index_generations([cached_id, stored_id, unknown_id, "not-a-uuid"])
+
+    assert generations == {cached_id: 4, stored_id: 2, unknown_id: 0, "not-a-uuid": 0}
+    assert len(calls) == 1
+    assert sorted(cache.nx_writes) == sorted(
+        f"index:generation:{document_id}" for document_id in (stored_id, unknown_id, "not-a-uuid")
+    )
+
+    assert get_index_generations([stored_id]) == {stored_id: 2}
+    assert len(calls) == 1
+
+
+def test_published_generation_overrides_cached_one(monkeypatch):
+    cache = _FakeCache({"index:generation:doc-1": 1})
+    monkeypatch.setattr(index_generation, "get_cache_service", lambda: cache)
+
+    publish_index_generations([SimpleNamespace(id="doc-1", index_generation=2)])
+
+    assert cache.store["index:generation:doc-1"] == 2
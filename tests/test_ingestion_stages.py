@@ -0,0 +1,232 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from services.ingestion_service import ingestion_stages
+from services.ingestion_service.ingestion_stages import (
+    artifact_name,
+    run_analyze_stage,
+    run_embed_stage,
+    run_finalize_stage,
+    run_obligation_stage,
+    run_parse_stage,
+    run_redact_stage,
+)
+
+
+class _FakeQuery:
+    def __init__(self, document):
+        self._document = document
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def first(self):
+        return self._document
+
+
+class _FakeDB:
+    def __init__(self, document):
+        self._document = document
+
+    def query(self, *args, **kwargs):
+        return _FakeQuery(self._document)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+    def close(self):
+        return None
+
+
+class _FakeStorage:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def download_file(self, object_name, destination_path):
+        Path(destination_path).write_bytes(self.objects[object_name])
+        return destination_path
+
+    def upload_path(self, source_path, object_name):
+        self.objects[object_name] = Path(source_path).read_bytes()
+        return object_name
+
+    def exists(self, object_name):
+        return object_name in self.objects
+
+    def delete_file(self, object_name):
+        self.objects.pop(object_name, None)
+
+
+def _setup(monkeypatch, document, objects):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    monkeypatch.setattr(ingestion_stages, "SessionLocal", lambda: _FakeDB(document))
+    monkeypatch.setattr(ingestion_stages, "StorageService", lambda: _FakeStorage(objects))
+    monkeypatch.setattr(ingestion_stages, "reuse_ingested_duplicate", lambda db, doc: False)
+
+
+def test_stages_checkpoint_artifacts_and_finish(monkeypatch):
+    document = SimpleNamespace(
+        id="doc-1",
+        file_name="contract.pdf",
+        storage_path="obj-key",
+        document_status="uploaded",
+        uploaded_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        obligations_available_at=None,
+    )
+    objects = {"obj-key": b"binary"}
+    _setup(monkeypatch, document, objects)
+    monkeypatch.setattr(
+        ingestion_stages,
+        "iter_document_segments",
+        lambda _path: iter([(1, "Mail a@example.com."), (2, "We may share your data with third parties. Rent is due on 2026-05-01.")]),
+    )
+    stored = []
+
+    def _fake_store_segments(document_id, segments):
+        stored.extend(segments)
+        return len(stored)
+
+    monkeypatch.setattr(ingestion_stages, "store_redacted_segments", _fake_store_segments)
+    persisted = []
+
+    def _fake_persist_obligations(db, doc, items, commit=True):
+        assert commit is False
+        persisted.extend(items)
+        return items
+
+    reminder_batches = []
+    monkeypatch.setattr(ingestion_stages, "persist_obligations", _fake_persist_obligations)
+    monkeypatch.setattr(
+        ingestion_stages.ReminderGenerator,
+        "generate_many",
+        lambda db, obligations, commit=True: reminder_batches.append((list(obligations), commit)),
+    )
+    recorded = {}
+    monkeypatch.setattr(
+        ingestion_stages,
+        "record_detected_risks",
+        lambda document_id, findings: recorded.update({document_id: findings}),
+    )
+
+    run_parse_stage("doc-1")
+    assert objects[artifact_name("doc-1", "extracted")] == b"Mail a@example.com.\fWe may share your data with third parties. Rent is due on 2026-05-01."
+
+    run_redact_stage("doc-1")
+    assert objects[artifact_name("doc-1", ingestion_stages._redacted_artifact())] == b"Mail [PII_EMAIL_1].\fWe may share your data with third parties. Rent is due on 2026-05-01."
+    assert artifact_name("doc-1", "sentences") in objects
+
+    run_embed_stage("doc-1")
+    assert stored == [(1, "Mail [PII_EMAIL_1]."), (2, "We may share your data with third parties. Rent is due on 2026-05-01.")]
+
+    run_analyze_stage("doc-1")
+    assert len(recorded["doc-1"]) == 1
+
+    run_obligation_stage("doc-1")
+    assert [item.detected_by for item in persisted] == ["rule_engine"]
+    assert reminder_batches == [(persisted, False)]
+    assert document.obligations_available_at is not None
+    assert document.document_status == "PROCESSING"
+
+    run_obligation_stage("doc-1")
+    assert len(persisted) == 1
+
+    run_finalize_stage("doc-1")
+    assert document.document_status == "EXTRACTED"
+    assert set(objects) == {"obj-key"}
+
+
+def test_redact_stage_resumes_from_existing_checkpoint(monkeypatch):
+    document = SimpleNamespace(id="doc-2", file_name="a.pdf", storage_path="obj", document_status="PROCESSING")
+    objects = {artifact_name("doc-2", ingestion_stages._redacted_artifact()): b"already redacted"}
+    _setup(monkeypatch, document, objects)
+
+    run_redact_stage("doc-2")
+
+    assert objects == {artifact_name("doc-2", ingestion_stages._redacted_artifact()): b"already redacted"}
+
+
+def test_obligation_stage_does_not_persist_candidates_the_llm_rejects(monkeypatch):
+    from services.obligation_service import obligation_detector
+    from services.obligation_service.schemas import ObligationStructured, ObligationValidation
+
+    document = SimpleNamespace(
+        id="doc-5",
+        file_name="a.pdf",
+        storage_path="obj",
+        document_status="PROCESSING",
+        uploaded_at=None,
+        obligations_available_at=None,
+    )
+    objects = {
+        artifact_name("doc-5", ingestion_stages._redacted_artifact()): (
+            b"Premium must be paid before the renewal date.\f"
+            b"The insurer must be described in section 2 for reference."
+        )
+    }
+    _setup(monkeypatch, document, objects)
+
+    async def fake_validate_obligation(sentence: str):
+        if "insurer" in sentence:
+            return ObligationValidation(is_obligation=False)
+        return ObligationValidation(
+            is_obligation=True,
+            obligation=ObligationStructured(title="Pay premium", confidence_score=0.9),
+        )
+
+    monkeypatch.setattr(obligation_detector, "_resolve_validator", lambda: fake_validate_obligation)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_BATCH_SIZE", 0)
+    persisted = []
+    monkeypatch.setattr(
+        ingestion_stages,
+        "persist_obligations",
+        lambda db, doc, items, commit=True: persisted.extend(items) or items,
+    )
+    monkeypatch.setattr(ingestion_stages.ReminderGenerator, "generate_many", lambda db, obligations, commit=True: None)
+
+    run_obligation_stage("doc-5")
+
+    assert [item.title for item in persisted] == ["Pay premium"]
+    assert document.obligations_available_at is not None
+
+
+def test_analyze_stage_rebuilds_missing_sentence_index(monkeypatch):
+    document = SimpleNamespace(id="doc-4", file_name="a.pdf", storage_path="obj", document_status="PROCESSING")
+    objects = {artifact_name("doc-4", ingestion_stages._redacted_artifact()): b"Intro.\fThe tenant shall indemnify the landlord."}
+    _setup(monkeypatch, document, objects)
+    recorded = {}
+    monkeypatch.setattr(
+        ingestion_stages,
+        "record_detected_risks",
+        lambda document_id, findings: recorded.update({document_id: findings}),
+    )
+
+    run_analyze_stage("doc-4")
+
+    assert [finding["severity"] for finding in recorded["doc-4"]] == ["HIGH"]
+
+
+def test_ingest_task_chains_stages_in_order():
+    from workers.tasks.ingestion_tasks import build_ingestion_chain
+
+    workflow = build_ingestion_chain("doc-3")
+
+    parse, redact, analyzers = workflow.tasks
+    assert [parse.name.rsplit(".", 1)[-1], redact.name.rsplit(".", 1)[-1]] == [
+        "parse_document_task",
+        "redact_document_task",
+    ]
+    assert sorted(task.name.rsplit(".", 1)[-1] for task in analyzers.tasks) == [
+        "analyze_document_task",
+        "detect_obligations_task",
+        "embed_document_task",
+    ]
+    assert analyzers.body.name.rsplit(".", 1)[-1] == "finalize_document_task"
+    assert analyzers.body.args == ("doc-3",)
+    assert parse.args == ("doc-3",)
@@ -8,4 +8,5 @@ async def test_llm_validator():
     result = await validate_obligation(sentence)
 
     assert result is not None
-    assert result.title is not None
+    assert result.is_obligation is True
+    assert result.obligation.title is not None
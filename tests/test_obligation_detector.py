@@ -1,8 +1,18 @@
+import datetime
+from types import SimpleNamespace
+
 import pytest
 
 import services.obligation_service.obligation_detector as obligation_detector
 from services.obligation_service.obligation_detector import detect_obligations
-from services.obligation_service.schemas import ObligationStructured
+from services.obligation_service.schemas import ObligationStructured, ObligationValidation
+
+
+def _accepted(title: str, confidence_score: float) -> ObligationValidation:
+    return ObligationValidation(
+        is_obligation=True,
+        obligation=ObligationStructured(title=title, due_date=None, confidence_score=confidence_score),
+    )
 
 
 @pytest.mark.asyncio
@@ -13,11 +23,7 @@ async def test_detect_obligations(monkeypatch):
     """
 
     async def fake_validate_obligation(sentence: str):
-        return ObligationStructured(
-            title=sentence[:80],
-            due_date=None,
-            confidence_score=0.91,
-        )
+        return _accepted(sentence[:80], 0.91)
 
     monkeypatch.setattr(
         obligation_detector,
@@ -47,3 +53,138 @@ async def test_detect_obligations_returns_empty_when_no_candidates():
     )
 
     assert results == []
+
+
+@pytest.mark.asyncio
+async def test_detect_obligations_validates_concurrently_in_order(monkeypatch):
+    import asyncio
+
+    text = "\n".join(f"Payment {idx} must be made." for idx in range(6))
+    state = {"in_flight": 0, "peak": 0}
+
+    async def fake_validate_obligation(sentence: str):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        # Later sentences finish first to prove ordering does not follow completion.
+        await asyncio.sleep(0.01 * (6 - int(sentence.split()[1])))
+        state["in_flight"] -= 1
+        return _accepted(sentence, 0.8)
+
+    monkeypatch.setattr(obligation_detector, "_resolve_validator", lambda: fake_validate_obligation)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_CONCURRENCY", 3)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_BATCH_SIZE", 0)
+
+    results = await detect_obligations(document_id="doc", text=text)
+
+    assert [item.title for item in results] == [f"Payment {idx} must be made" for idx in range(6)]
+    assert state["peak"] == 3
+
+
+@pytest.mark.asyncio
+async def test_detect_obligations_batched_mode(monkeypatch):
+    text = "\n".join(f"Payment {idx} must be made." for idx in range(5))
+    batches = []
+
+    async def fake_validate_batch(sentences):
+        batches.append(list(sentences))
+        return [
+            _accepted(sentence, 0.9) if "3" not in sentence else None
+            for sentence in sentences
+        ]
+
+    monkeypatch.setattr(obligation_detector, "_resolve_batch_validator", lambda: fake_validate_batch)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_BATCH_SIZE", 2)
+
+    results = await detect_obligations(document_id="doc", text=text)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [item.confidence_score for item in results] == [0.9, 0.9, 0.9, 0.3, 0.9]
+
+
+@pytest.mark.asyncio
+async def test_detect_obligations_fast_path_skips_llm(monkeypatch):
+    text = """
+    The policy expires on 2026-01-31.
+    Premium must be paid before the renewal date.
+    """
+    validated = []
+
+    async def fake_validate_obligation(sentence: str):
+        validated.append(sentence)
+        return _accepted(sentence, 0.9)
+
+    monkeypatch.setattr(obligation_detector, "_resolve_validator", lambda: fake_validate_obligation)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_BATCH_SIZE", 0)
+
+    stats = {}
+    results = await detect_obligations(document_id="doc", text=text, stats=stats)
+
+    assert validated == ["Premium must be paid before the renewal date"]
+    assert [item.detected_by for item in results] == ["rule_engine", "llm"]
+    assert results[0].due_date.isoformat().startswith("2026-01-31")
+    assert stats == {"candidates": 2, "resolved_by_rules": 1, "llm_validations": 1, "llm_rejected": 0}
+
+
+@pytest.mark.asyncio
+async def test_detect_obligations_drops_candidates_the_llm_rejects(monkeypatch, capsys):
+    text = """
+    Premium must be paid before the renewal date.
+    The insurer must be described in section 2 for reference.
+    Payment shall be made within 30 days.
+    """
+
+    async def fake_validate_obligation(sentence: str):
+        if "insurer" in sentence:
+            return ObligationValidation(is_obligation=False)
+        if "Payment" in sentence:
+            return None
+        return _accepted(sentence, 0.9)
+
+    monkeypatch.setattr(obligation_detector, "_resolve_validator", lambda: fake_validate_obligation)
+    monkeypatch.setattr(obligation_detector.settings, "OBLIGATION_VALIDATION_BATCH_SIZE", 0)
+
+    stats = {}
+    results = await detect_obligations(document_id="doc", text=text, stats=stats)
+
+    # The rejected sentence is dropped; only the failed validation falls back to 0.3.
+    assert [(item.source_text, item.confidence_score) for item in results] == [
+        ("Premium must be paid before the renewal date", 0.9),
+        ("Payment shall be made within 30 days", 0.3),
+    ]
+    assert stats["llm_rejected"] == 1
+    assert "Obligation validation cache: hit rate" in capsys.readouterr().out
+
+
+def test_clone_document_obligations_copies_rows_to_the_new_document(monkeypatch):
+    source = SimpleNamespace(
+        title="Pay premium",
+        description=None,
+        category="payment",
+        due_date=datetime.date(2026, 5, 1),
+        recurrence=None,
+        priority="HIGH",
+        risk_level=None,
+        confidence_score=0.9,
+        detected_by="RULE",
+        source_text="Premium is due on 2026-05-01.",
+        status="COMPLETED",
+    )
+    monkeypatch.setattr(
+        obligation_detector.ObligationRepository,
+        "get_by_document",
+        lambda db, document_id: [source] if document_id == "doc-old" else [],
+    )
+    created = []
+    monkeypatch.setattr(
+        obligation_detector.ObligationRepository,
+        "create_many",
+        lambda db, obligations, commit=True: created.extend(obligations) or obligations,
+    )
+    document = SimpleNamespace(id="doc-new", user_id="user-1")
+
+    cloned = obligation_detector.clone_document_obligations(None, "doc-old", document, commit=False)
+
+    assert cloned == created
+    assert [(item.document_id, item.user_id, item.title, item.due_date, item.status) for item in cloned] == [
+        ("doc-new", "user-1", "Pay premium", datetime.date(2026, 5, 1), "PENDING")
+    ]
@@ -1,4 +1,11 @@
-from services.obligation_service.rule_engine import extract_candidates
+from datetime import datetime
+
+from services.extraction_service.sentence_index import SentenceIndex
+from services.obligation_service.rule_engine import (
+    extract_candidates,
+    iter_candidate_spans,
+    resolve_deterministically,
+)
 
 
 def test_extract_candidates_basic():
@@ -12,3 +19,38 @@ def test_extract_candidates_basic():
 
     assert len(candidates) >= 2
     assert "premium must be paid" in candidates[0].sentence.lower()
+    assert text[candidates[0].start:candidates[0].end] == candidates[0].sentence
+
+
+def test_iter_candidate_spans_matches_dates_and_keywords_once_per_sentence():
+    text = (
+        "Background only. Renewal notice on 2026-01-31, payment due.\n"
+        "Reference 110 March 2026 is not a date. Cover ends 5 JUNE 2027\n"
+        "Fee\nwithin 30 days"
+    )
+
+    sentences = [text[start:end] for start, end in iter_candidate_spans(SentenceIndex.from_text(text))]
+
+    assert sentences == [
+        "Renewal notice on 2026-01-31, payment due",
+        "Cover ends 5 JUNE 2027",
+        "within 30 days",
+    ]
+
+
+def test_resolve_deterministically_structures_due_date_sentence():
+    result = resolve_deterministically("The annual premium payment is due on 12 March 2025.")
+
+    assert result is not None
+    assert result.due_date == datetime(2025, 3, 12)
+    assert result.title == "The annual premium payment is due"
+    assert result.confidence_score >= 0.8
+
+
+def test_resolve_deterministically_skips_ambiguous_sentences():
+    assert resolve_deterministically("The premium must be paid before 10 March 2026.") is None
+    assert resolve_deterministically("Renewal is due within 30 days.") is None
+
+    ambiguous = resolve_deterministically("Payment is due 2025-03-12 or 04/05/2025.")
+    assert ambiguous is not None
+    assert ambiguous.confidence_score < 0.8
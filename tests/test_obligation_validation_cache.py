@@ -0,0 +1,140 @@
+import pytest
+
+import services.obligation_service.llm_validator as llm_validator
+from services.obligation_service.schemas import (
+    ObligationBatchItem,
+    ObligationStructured,
+    ObligationStructuredBatch,
+    ObligationValidation,
+)
+from services.obligation_service.validation_cache import ObligationValidationCache
+
+
+class _FakeCache:
+    def __init__(self):
+        self.store = {}
+        self.async_round_trips = 0
+
+    async def aget_many_json(self, keys):
+        self.async_round_trips += 1
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    async def aset_many_json(self, items, ttl_seconds):
+        self.async_round_trips += 1
+        self.store.update(items)
+
+
+class _FakeChain:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    async def ainvoke(self, payload):
+        self.calls.append(payload)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class _FakePrompt:
+    def __init__(self, chain):
+        self.chain = chain
+
+    def __or__(self, _other):
+        return self.chain
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    cache = _FakeCache()
+    monkeypatch.setattr("services.obligation_service.validation_cache.get_cache_service", lambda: cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_cache_normalizes_sentences_and_stores_negatives(shared_cache):
+    cache = ObligationValidationCache(max_local_entries=10)
+    positive = ObligationStructured(title="Pay invoice", due_date=None, confidence_score=0.9)
+
+    await cache.aset("Payment is due within  30 days of invoice.", "m", positive)
+    await cache.aset("This is background only.", "m", None)
+
+    assert await cache.aget("payment is due within 30 days of invoice", "m") == (True, positive)
+    assert await cache.aget("This is background only.", "m") == (True, None)
+    assert await cache.aget("Unseen sentence.", "m") == (False, None)
+    assert await cache.aget("Payment is due within 30 days of invoice.", "other-model") == (False, None)
+    assert cache.stats() == {"local_hits": 2, "shared_hits": 0, "misses": 2, "hit_rate": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_cache_falls_back_to_shared_tier_after_local_eviction(shared_cache):
+    cache = ObligationValidationCache(max_local_entries=1)
+    await cache.aset("First sentence.", "m", ObligationStructured(title="First", confidence_score=0.8))
+    await cache.aset("Second sentence.", "m", None)
+
+    found, result = await cache.aget("First sentence.", "m")
+
+    assert found is True
+    assert result.title == "First"
+    assert cache.stats()["shared_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_obligation_serves_repeats_from_cache(monkeypatch, shared_cache):
+    cache = ObligationValidationCache(10)
+    monkeypatch.setattr(llm_validator, "get_validation_cache", lambda: cache)
+    chain = _FakeChain(
+        [
+            RuntimeError("rate limited"),
+            ObligationValidation(
+                is_obligation=True,
+                obligation=ObligationStructured(title="Pay invoice", due_date=None, confidence_score=0.9),
+            ),
+            ObligationValidation(is_obligation=False),
+        ]
+    )
+    monkeypatch.setattr(llm_validator, "prompt", _FakePrompt(chain))
+
+    failed = await llm_validator.validate_obligation("Payment is due within 30 days.")
+    first = await llm_validator.validate_obligation("Payment is due within 30 days.")
+    second = await llm_validator.validate_obligation("payment is due within 30 days")
+    negative = await llm_validator.validate_obligation("This is background only.")
+    negative_again = await llm_validator.validate_obligation("This is background only.")
+
+    assert failed is None
+    assert first.is_obligation is True
+    assert first.obligation.title == "Pay invoice"
+    assert second == first
+    # A rejection is a verdict, not a failure, and is served from the cache too.
+    assert negative == negative_again == ObligationValidation(is_obligation=False)
+    assert len(chain.calls) == 3
+    assert cache.stats()["local_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_validation_reads_and_writes_redis_once(monkeypatch, shared_cache):
+    cache = ObligationValidationCache(10)
+    monkeypatch.setattr(llm_validator, "get_validation_cache", lambda: cache)
+    await cache.aset("Known sentence.", llm_validator.VALIDATOR_MODEL, None)
+    cache._local.clear()
+    shared_cache.async_round_trips = 0
+    chain = _FakeChain(
+        [
+            ObligationStructuredBatch(
+                items=[
+                    ObligationBatchItem(index=0, obligation=ObligationStructured(title="Pay rent", confidence_score=0.8)),
+                    ObligationBatchItem(index=1, obligation=None),
+                ]
+            )
+        ]
+    )
+    monkeypatch.setattr(llm_validator, "batch_prompt", _FakePrompt(chain))
+
+    results = await llm_validator.validate_obligations_batch(["Rent is due monthly.", "Known sentence.", "Intro."])
+
+    assert results[0].obligation.title == "Pay rent"
+    assert [result.is_obligation for result in results] == [True, False, False]
+    assert shared_cache.async_round_trips == 2
+    assert cache.stats()["shared_hits"] == 1
+    assert await cache.aget("Intro.", llm_validator.VALIDATOR_MODEL) == (True, None)
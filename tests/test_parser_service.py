@@ -2,7 +2,7 @@ import sys
 from pathlib import Path
 from types import SimpleNamespace
 
-from services.ingestion_service.parser_service import extract_text_from_document
+from services.ingestion_service.parser_service import extract_text_from_document, iter_document_segments
 
 
 def test_extract_text_file(tmp_path):
@@ -71,3 +71,84 @@ def test_extract_unsupported_type(tmp_path):
         assert False, "Expected ValueError for unsupported type"
     except ValueError as exc:
         assert "Unsupported document type" in str(exc)
+
+
+class _FakePdf:
+    def __init__(self, pages):
+        self.pages = pages
+        self.page_count = len(pages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __iter__(self):
+        return iter(SimpleNamespace(get_text=lambda text=text: text) for text in self.pages)
+
+    def load_page(self, index):
+        return SimpleNamespace(get_text=lambda: self.pages[index])
+
+
+def test_iter_document_segments_yields_pdf_pages(monkeypatch, tmp_path):
+    file_path = tmp_path / "contract.pdf"
+    file_path.write_text("placeholder", encoding="utf-8")
+    monkeypatch.setitem(
+        sys.modules,
+        "fitz",
+        SimpleNamespace(open=lambda _path: _FakePdf(["Page one.\n", "Page two.\n"])),
+    )
+
+    segments = list(iter_document_segments(str(file_path)))
+
+    assert segments == [(1, "Page one.\n"), (2, "Page two.\n")]
+    assert extract_text_from_document(str(file_path)) == "Page one.\nPage two.\n"
+
+
+def test_iter_document_segments_single_segment_for_text(tmp_path):
+    file_path = tmp_path / "sample.txt"
+    file_path.write_text("hello world", encoding="utf-8")
+
+    assert list(iter_document_segments(str(file_path))) == [(1, "hello world")]
+
+
+def test_extract_pdf_reassembles_parallel_ranges_in_order(monkeypatch, tmp_path):
+    file_path = tmp_path / "large.pdf"
+    file_path.write_text("placeholder", encoding="utf-8")
+    pages = [f"page {index}\n" for index in range(10)]
+    monkeypatch.setitem(sys.modules, "fitz", SimpleNamespace(open=lambda _path: _FakePdf(pages)))
+    monkeypatch.setattr("services.ingestion_service.parser_service.settings.PDF_EXTRACTION_WORKERS", 3)
+    monkeypatch.setattr("services.ingestion_service.parser_service.settings.PDF_PARALLEL_PAGE_THRESHOLD", 5)
+
+    class _InlineExecutor:
+        def __init__(self, max_workers):
+            self.max_workers = max_workers
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def submit(self, fn, *args):
+            outstanding.append(args)
+            peak[0] = max(peak[0], len(outstanding))
+            return _InlineFuture(fn, args)
+
+    class _InlineFuture:
+        def __init__(self, fn, args):
+            self.fn = fn
+            self.args = args
+
+        def result(self):
+            outstanding.remove(self.args)
+            return self.fn(*self.args)
+
+    outstanding = []
+    peak = [0]
+    monkeypatch.setattr("services.ingestion_service.parser_service.ProcessPoolExecutor", _InlineExecutor)
+
+    assert extract_text_from_document(str(file_path)) == "".join(pages)
+    # 10 single-page ranges, but never more than two per worker in flight.
+    assert peak[0] == 6
@@ -1,6 +1,8 @@
 from types import SimpleNamespace
 
 from services.extraction_service.extraction_pipeline import run_extraction_pipeline
+from services.privacy_service import pii_redactor
+from services.privacy_service.pii_redactor import REDACTION_VERSION
 from services.ingestion_service.ingestion_pipeline import run_ingestion_pipeline
 from services.qa_service.qa_pipeline import run_qa_pipeline
 
@@ -67,7 +69,7 @@ def test_ingestion_stores_only_redacted_text(monkeypatch):
 
     captured = {}
     monkeypatch.setattr(
-        "services.ingestion_service.ingestion_pipeline._store_document_chunks",
+        "services.ingestion_service.ingestion_pipeline.store_redacted_text",
         lambda doc_id, text: captured.update({"doc_id": doc_id, "text": text}),
     )
 
@@ -80,6 +82,58 @@ def test_ingestion_stores_only_redacted_text(monkeypatch):
     assert "[PII_SSN_1]" in captured["text"]
 
 
+def test_streaming_ingestion_stores_only_redacted_pages(monkeypatch):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.settings.INGESTION_STREAMING_MIN_BYTES",
+        0,
+    )
+    fake_document = SimpleNamespace(
+        id="doc-4",
+        file_name="large.pdf",
+        storage_path="obj-key",
+        document_status="uploaded",
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.SessionLocal",
+        lambda: _FakeDB(fake_document),
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.StorageService",
+        lambda: SimpleNamespace(download_file=lambda object_name, destination_path: destination_path),
+    )
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.iter_document_segments",
+        lambda _path: iter([(1, "Email john@example.com."), (2, "Auto-renew applies. Ping john@example.com.")]),
+    )
+
+    stored = []
+
+    def _fake_store_segments(doc_id, segments):
+        stored.extend(segments)
+        return len(stored)
+
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.store_redacted_segments",
+        _fake_store_segments,
+    )
+    recorded = {}
+    monkeypatch.setattr(
+        "services.ingestion_service.ingestion_pipeline.record_detected_risks",
+        lambda doc_id, findings: recorded.update({"doc_id": doc_id, "findings": findings}),
+    )
+
+    run_ingestion_pipeline("doc-4")
+
+    assert stored == [(1, "Email [PII_EMAIL_1]."), (2, "Auto-renew applies. Ping [PII_EMAIL_1].")]
+    assert recorded["doc_id"] == "doc-4"
+    assert len(recorded["findings"]) == 1
+    assert fake_document.document_status == "EXTRACTED"
+
+
 def test_extraction_pipeline_redacts_before_llm(monkeypatch):
     monkeypatch.setattr(
         "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
@@ -90,9 +144,9 @@ def test_extraction_pipeline_redacts_before_llm(monkeypatch):
         lambda: _FakeDB(None),
     )
     monkeypatch.setattr(
-        "services.extraction_service.extraction_pipeline.retrieve_document_chunks",
+        "services.extraction_service.extraction_pipeline.retrieve_document_evidence",
         lambda query, document_id, top_k=5: [
-            "Candidate email is john@example.com and SSN is 123-45-6789"
+            {"text": "Candidate email is john@example.com and SSN is 123-45-6789"}
         ],
     )
 
@@ -126,16 +180,20 @@ def test_qa_pipeline_redacts_before_openai(monkeypatch):
         True,
     )
     monkeypatch.setattr(
-        "services.qa_service.qa_pipeline.retrieve_document_evidence",
-        lambda query, document_id, top_k=6: [
-            {
-                "chunk_id": "doc-3:0:abc",
-                "document_id": document_id,
-                "chunk_index": 0,
-                "text": "Contact: john@example.com and SSN: 123-45-6789",
-                "distance": 0.2,
-            }
-        ],
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [
+                {
+                    "chunk_id": "doc-3:0:abc",
+                    "document_id": document_id,
+                    "chunk_index": 0,
+                    "text": "Contact: john@example.com and SSN: 123-45-6789",
+                    "distance": 0.2,
+                }
+            ]
+            for query in queries
+            for document_id in document_ids
+        },
     )
     monkeypatch.setattr(
         "services.qa_service.qa_pipeline.get_cache_service",
@@ -168,3 +226,68 @@ def test_qa_pipeline_redacts_before_openai(monkeypatch):
     assert "123-45-6789" not in user_prompt
     assert "[PII_EMAIL_1]" in user_prompt
     assert "[PII_SSN_1]" in user_prompt
+
+
+def test_qa_pipeline_skips_redacting_current_version_evidence(monkeypatch):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [
+                {
+                    "chunk_id": f"{document_id}:{idx}:abc",
+                    "document_id": document_id,
+                    "chunk_index": idx,
+                    "text": text,
+                    "distance": 0.2,
+                    "redaction_version": version,
+                }
+                for idx, (text, version) in enumerate(
+                    [
+                        ("Contact: [PII_EMAIL_1] for renewals", REDACTION_VERSION),
+                        ("Legacy chunk: jane@example.com", None),
+                    ]
+                )
+            ]
+            for query in queries
+            for document_id in document_ids
+        },
+    )
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.get_cache_service",
+        lambda: SimpleNamespace(get_json=lambda _key: None, set_json=lambda *_args, **_kwargs: None),
+    )
+
+    redacted_inputs = []
+    original_redact_text = pii_redactor.redact_text
+
+    def _tracking_redact_text(text):
+        redacted_inputs.append(text)
+        return original_redact_text(text)
+
+    monkeypatch.setattr("services.privacy_service.pii_redactor.redact_text", _tracking_redact_text)
+
+    captured = {}
+
+    class _FakeCompletions:
+        @staticmethod
+        def create(model, messages):
+            captured["messages"] = messages
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))]
+            )
+
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.client",
+        SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions())),
+    )
+
+    assert run_qa_pipeline("Who handles renewals?", "doc-5") == "ok"
+
+    assert redacted_inputs == ["Legacy chunk: jane@example.com"]
+    user_prompt = captured["messages"][1]["content"]
+    assert "jane@example.com" not in user_prompt
+    assert "[PII_EMAIL_1]" in user_prompt
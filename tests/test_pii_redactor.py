@@ -1,4 +1,17 @@
-from services.privacy_service.pii_redactor import redact_text
+from concurrent.futures import Future
+
+from services.privacy_service.pii_redactor import (
+    REDACTION_VERSION,
+    _apply_redactions,
+    _apply_redactions_sequential,
+    _build_tokenizer,
+    _iter_windows,
+    applied_redaction_version,
+    redact_if_stale,
+    redact_segments,
+    redact_stream,
+    redact_text,
+)
 
 
 def test_redact_text_replaces_common_pii(monkeypatch):
@@ -44,3 +57,150 @@ def test_redact_text_disabled_returns_original(monkeypatch):
 
     assert redacted_text == text
     assert redactions == []
+
+
+def test_redact_segments_keeps_placeholders_consistent_across_pages(monkeypatch):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    pages = [
+        (1, "Write to a@example.com."),
+        (2, "Copy b@example.com and a@example.com."),
+    ]
+
+    results = list(redact_segments(iter(pages)))
+
+    assert results[0] == (1, "Write to [PII_EMAIL_1].", [
+        {"placeholder": "[PII_EMAIL_1]", "pii_type": "EMAIL", "value": "a@example.com"},
+    ])
+    assert results[1][1] == "Copy [PII_EMAIL_2] and [PII_EMAIL_1]."
+    assert [item["value"] for item in results[1][2]] == ["b@example.com"]
+
+
+def test_redact_if_stale_only_redacts_older_versions(monkeypatch):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    text = "Mail jane@example.com"
+
+    assert applied_redaction_version() == REDACTION_VERSION
+    assert redact_if_stale(text, REDACTION_VERSION) == text
+    assert redact_if_stale(text, None) == "Mail [PII_EMAIL_1]"
+    assert redact_if_stale(text, "v0") == "Mail [PII_EMAIL_1]"
+
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        False,
+    )
+    assert applied_redaction_version() is None
+
+
+def test_single_pass_matches_sequential_passes():
+    samples = [
+        "Card 4111 1111 1111 1111 and 4111-1111-1111-1111, not 4111111111111112.",
+        "Call +1 415 555 1234 or (415) 555-1234; SSN 123-45-6789+1 415 555 1234.",
+        "Row: 12345 4111111111111111 415-555-1234 5105105105105100x",
+        "ids 1234567890123 12-34@example.com _a@b.co 9 8 7 6 5 4 3 2 1 0 1 2 3 4",
+        "٣٣٣-٣٣-٣٣٣٣ and 4111 1111 1111 1111",
+    ]
+    for text in samples:
+        sequential: list[dict] = []
+        single: list[dict] = []
+        expected = _apply_redactions_sequential(text, _build_tokenizer(sequential))
+
+        assert _apply_redactions(text, _build_tokenizer(single), single) == expected
+        assert single == sequential
+
+
+def test_redact_text_handles_long_padded_digit_runs(monkeypatch):
+    monkeypatch.setattr(
+        "services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED",
+        True,
+    )
+    text = ("7" + " " * 40) * 5000 + "x " + "4111" + " " * 30 + "1111 1111 1111"
+
+    redacted_text, redactions = redact_text(text)
+
+    assert redacted_text.endswith("[PII_CARD_1]")
+    assert [item["value"] for item in redactions] == ["4111" + " " * 30 + "1111 1111 1111"]
+
+
+def _enable_windows(monkeypatch, window_chars: int, workers: int = 1):
+    monkeypatch.setattr("services.privacy_service.pii_redactor.settings.PII_REDACTION_ENABLED", True)
+    monkeypatch.setattr("services.privacy_service.pii_redactor.settings.PII_REDACTION_WINDOW_CHARS", window_chars)
+    monkeypatch.setattr("services.privacy_service.pii_redactor.settings.PII_REDACTION_WORKERS", workers)
+
+
+def test_redact_stream_numbers_placeholders_across_windows(monkeypatch):
+    _enable_windows(monkeypatch, window_chars=10)
+    text = (
+        "a@example.com, 4111 1111 1111 1111; b@example.com\n"
+        "415-555-1234, a@example.com, 123-45-6789, 415-555-1234\n"
+    ) * 3
+    blocks = [text[start:start + 7] for start in range(0, len(text), 7)]
+
+    results = list(redact_stream(blocks))
+
+    expected_text, expected_redactions = redact_text(text)
+    assert len(results) > 1
+    assert "".join(redacted for redacted, _ in results) == expected_text
+    streamed = [item for _, new_redactions in results for item in new_redactions]
+    assert sorted(streamed, key=str) == sorted(expected_redactions, key=str)
+
+
+def test_redact_stream_with_separator_matches_redact_segments(monkeypatch):
+    _enable_windows(monkeypatch, window_chars=10)
+    pages = ["Write to a@example.com, call 415 555", "1234 or b@example.com.", "", "Again a@example.com."]
+    text = "\f".join(pages)
+    blocks = [text[start:start + 6] for start in range(0, len(text), 6)]
+
+    results = list(redact_stream(blocks, separator="\f"))
+
+    expected = list(redact_segments(enumerate(pages, start=1)))
+    # The phone number split by the page break is not joined into one match.
+    assert "".join(redacted for redacted, _ in results).split("\f") == [page for _, page, _ in expected]
+    streamed = [item for _, new_redactions in results for item in new_redactions]
+    assert streamed == [item for _, _, page_redactions in expected for item in page_redactions]
+
+
+def test_windows_never_split_a_phone_number_across_lines():
+    text = "12345 678\n415\n555-1234 rest"
+
+    windows = list(_iter_windows([text], 8))
+
+    assert "".join(windows) == text
+    assert not any(window.endswith("415\n") for window in windows)
+
+
+def test_large_text_fans_windows_out_to_process_pool(monkeypatch):
+    _enable_windows(monkeypatch, window_chars=16, workers=3)
+    monkeypatch.setattr("services.privacy_service.pii_redactor.settings.PII_PARALLEL_MIN_CHARS", 32)
+    submitted = []
+
+    class _InlineExecutor:
+        def __init__(self, max_workers):
+            self.max_workers = max_workers
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def submit(self, fn, *args):
+            submitted.append(fn)
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr("services.privacy_service.pii_redactor.ProcessPoolExecutor", _InlineExecutor)
+    text = "Mail a@example.com, card 4111-1111-1111-1111; again a@example.com.\n" * 4
+
+    redacted_text, redactions = redact_text(text)
+
+    assert len(submitted) > 2
+    assert redacted_text.count("[PII_EMAIL_1]") == 8
+    assert redacted_text.count("[PII_CARD_1]") == 4
+    assert [item["placeholder"] for item in redactions] == ["[PII_EMAIL_1]", "[PII_CARD_1]"]
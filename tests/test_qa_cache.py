@@ -1,20 +1,52 @@
 from types import SimpleNamespace
 import sys
+import threading
 
-from services.qa_service.qa_pipeline import run_qa_pipeline_with_metadata
-from services.qa_service.retriever_service import retrieve_document_chunks
+import pytest
+
+from services.qa_service.qa_pipeline import (
+    arun_qa_pipeline_with_metadata_for_documents,
+    run_qa_pipeline_with_metadata,
+    run_qa_pipeline_with_metadata_for_documents,
+    stream_qa_pipeline_for_documents,
+)
+from services.qa_service.semantic_cache import SemanticResponseCache
+from services.qa_service.retriever_service import retrieve_document_chunks, retrieve_evidence_batch
 
 
 class _FakeCache:
     def __init__(self):
         self.store = {}
+        self.round_trips = 0
 
     def get_json(self, key):
+        self.round_trips += 1
         return self.store.get(key)
 
     def set_json(self, key, value, ttl_seconds):
+        self.round_trips += 1
         self.store[key] = value
 
+    def get_many_json(self, keys):
+        self.round_trips += 1
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    def set_many_json(self, items, ttl_seconds):
+        self.round_trips += 1
+        self.store.update(items)
+
+    async def aget_json(self, key):
+        return self.get_json(key)
+
+    async def aget_many_json(self, keys):
+        return self.get_many_json(keys)
+
+    async def aset_json(self, key, value, ttl_seconds):
+        self.set_json(key, value, ttl_seconds)
+
+    async def aset_many_json(self, items, ttl_seconds):
+        self.set_many_json(items, ttl_seconds)
+
 
 def test_retriever_uses_cache(monkeypatch):
     fake_cache = _FakeCache()
@@ -43,6 +75,51 @@ def test_retriever_uses_cache(monkeypatch):
     assert calls["count"] == 1
 
 
+def test_batch_retrieval_embeds_once_and_queries_each_document(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr(
+        "services.qa_service.retriever_service.get_cache_service",
+        lambda: fake_cache,
+    )
+
+    calls = {"embed": 0, "query": []}
+    # doc-a has many chunks closer to every query than doc-b's; doc-b still gets its own top_k.
+    chunks = {"doc-a": 5, "doc-b": 2}
+
+    def _fake_embed_documents(texts):
+        calls["embed"] += 1
+        return [[float(idx)] for idx, _ in enumerate(texts)]
+
+    def _fake_query(query_embeddings, where, n_results):
+        document_id = where["document_id"]
+        calls["query"].append(document_id)
+        count = min(n_results, chunks[document_id])
+        return {
+            "ids": [[f"{document_id}:{i}:h" for i in range(count)] for _ in query_embeddings],
+            "documents": [[f"{document_id} chunk {i}" for i in range(count)] for _ in query_embeddings],
+            "metadatas": [[{"document_id": document_id, "chunk_index": i} for i in range(count)] for _ in query_embeddings],
+            "distances": [[0.5 + 0.1 * i for i in range(count)] for _ in query_embeddings],
+        }
+
+    fake_vector_service = SimpleNamespace(
+        embeddings=SimpleNamespace(embed_documents=_fake_embed_documents),
+        collection=SimpleNamespace(query=_fake_query),
+    )
+    monkeypatch.setitem(sys.modules, "services.extraction_service.vector_service", fake_vector_service)
+
+    grouped = retrieve_evidence_batch(["q1", "q2"], ["doc-a", "doc-b"], top_k=3)
+    again = retrieve_evidence_batch(["q1", "q2"], ["doc-a", "doc-b"], top_k=3)
+
+    assert calls["embed"] == 1
+    assert sorted(calls["query"]) == ["doc-a", "doc-b"]
+    # Read, re-check under the single-flight lock, write; then one read for the second call.
+    assert fake_cache.round_trips == 4
+    assert set(grouped) == {("q1", "doc-a"), ("q1", "doc-b"), ("q2", "doc-a"), ("q2", "doc-b")}
+    assert [item["text"] for item in grouped[("q2", "doc-a")]] == ["doc-a chunk 0", "doc-a chunk 1", "doc-a chunk 2"]
+    assert [item["text"] for item in grouped[("q2", "doc-b")]] == ["doc-b chunk 0", "doc-b chunk 1"]
+    assert again == grouped
+
+
 def test_qa_pipeline_uses_response_cache(monkeypatch):
     fake_cache = _FakeCache()
     monkeypatch.setattr(
@@ -50,16 +127,20 @@ def test_qa_pipeline_uses_response_cache(monkeypatch):
         lambda: fake_cache,
     )
     monkeypatch.setattr(
-        "services.qa_service.qa_pipeline.retrieve_document_evidence",
-        lambda query, document_id, top_k=6: [
-            {
-                "chunk_id": f"{document_id}:0:abc",
-                "document_id": document_id,
-                "chunk_index": 0,
-                "text": "Policy has premium and due date clauses.",
-                "distance": 0.2,
-            }
-        ],
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [
+                {
+                    "chunk_id": f"{document_id}:0:abc",
+                    "document_id": document_id,
+                    "chunk_index": 0,
+                    "text": "Policy has premium and due date clauses.",
+                    "distance": 0.2,
+                }
+            ]
+            for query in queries
+            for document_id in document_ids
+        },
     )
 
     calls = {"count": 0}
@@ -86,3 +167,312 @@ def test_qa_pipeline_uses_response_cache(monkeypatch):
     assert first["answer"] == "Answer from model"
     assert second["answer"] == "Answer from model"
     assert calls["count"] == 1
+
+
+def test_thread_turn_is_saved_without_rereading_the_thread(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.get_cache_service",
+        lambda: fake_cache,
+    )
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [{"chunk_id": "doc-2:0:abc", "document_id": document_id, "text": "Premium is due monthly."}]
+            for query in queries
+            for document_id in document_ids
+        },
+    )
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.client",
+        SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(
+                    create=lambda model, messages: SimpleNamespace(
+                        choices=[SimpleNamespace(message=SimpleNamespace(content="Monthly."))]
+                    )
+                )
+            )
+        ),
+    )
+
+    for question in ("When is premium due?", "How much is it?"):
+        run_qa_pipeline_with_metadata_for_documents(question, ["doc-2"], thread_id="t-1", user_id="u-1")
+
+    # One read of the thread and one write per turn.
+    assert fake_cache.round_trips == 4
+    assert fake_cache.store["qa:thread:u-1:t-1"] == [
+        {"question": "When is premium due?", "answer": "Monthly."},
+        {"question": "How much is it?", "answer": "Monthly."},
+    ]
+
+
+def test_retrieval_cache_misses_after_the_index_generation_changes(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr(
+        "services.qa_service.retriever_service.get_cache_service",
+        lambda: fake_cache,
+    )
+    generations = {"doc-1": 0}
+    monkeypatch.setattr(
+        "services.qa_service.retriever_service.get_index_generations",
+        lambda document_ids: {document_id: generations[document_id] for document_id in document_ids},
+    )
+    calls = {"count": 0}
+
+    def _fake_query(**_kwargs):
+        calls["count"] += 1
+        return {"documents": [[f"chunk v{calls['count']}"]]}
+
+    fake_vector_service = SimpleNamespace(
+        embeddings=SimpleNamespace(embed_query=lambda _query: [0.11, 0.22]),
+        collection=SimpleNamespace(query=_fake_query),
+    )
+    monkeypatch.setitem(sys.modules, "services.extraction_service.vector_service", fake_vector_service)
+
+    assert retrieve_document_chunks("What is premium?", "doc-1") == ["chunk v1"]
+    assert retrieve_document_chunks("What is premium?", "doc-1") == ["chunk v1"]
+    generations["doc-1"] = 1
+    assert retrieve_document_chunks("What is premium?", "doc-1") == ["chunk v2"]
+    assert calls["count"] == 2
+
+
+def test_paraphrased_question_is_served_from_the_semantic_cache(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr("services.qa_service.qa_pipeline.get_cache_service", lambda: fake_cache)
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.get_index_generations",
+        lambda document_ids: {document_id: 0 for document_id in document_ids},
+    )
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [{"chunk_id": "doc-2:0:abc", "document_id": document_id, "text": "Premium is due monthly."}]
+            for query in queries
+            for document_id in document_ids
+        },
+    )
+    vectors = {
+        "When is the premium due?": [0.9, 0.1, 0.0],
+        "When do I have to pay the premium?": [0.88, 0.12, 0.01],
+        "Who is the insurer?": [0.1, 0.2, 0.9],
+    }
+    monkeypatch.setattr("services.qa_service.qa_pipeline._embed_question", lambda question: vectors[question])
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline._semantic_cache",
+        SemanticResponseCache(threshold=0.95, max_scopes=4, max_entries_per_scope=4),
+    )
+    calls = {"count": 0}
+
+    def _create(model, messages):
+        calls["count"] += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Answer {calls['count']}"))])
+
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.client",
+        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create))),
+    )
+
+    first = run_qa_pipeline_with_metadata("When is the premium due?", "doc-2")
+    paraphrase = run_qa_pipeline_with_metadata("When do I have to pay the premium?", "doc-2")
+    other = run_qa_pipeline_with_metadata("Who is the insurer?", "doc-2")
+    other_documents = run_qa_pipeline_with_metadata("When do I have to pay the premium?", "doc-3")
+
+    assert first["answer"] == paraphrase["answer"] == "Answer 1"
+    assert other["answer"] == "Answer 2"
+    assert other_documents["answer"] == "Answer 3"
+    assert calls["count"] == 3
+
+
+def test_streamed_answer_fills_the_response_cache_and_thread(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr("services.qa_service.qa_pipeline.get_cache_service", lambda: fake_cache)
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.get_index_generations",
+        lambda document_ids: {document_id: 0 for document_id in document_ids},
+    )
+    monkeypatch.setattr("services.qa_service.qa_pipeline._embed_question", lambda question: None)
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.retrieve_evidence_batch",
+        lambda queries, document_ids, top_k=6: {
+            (query, document_id): [{"chunk_id": "doc-2:0:abc", "document_id": document_id, "text": "Premium is due monthly."}]
+            for query in queries
+            for document_id in document_ids
+        },
+    )
+    calls = []
+
+    def _create(model, messages, stream=False):
+        calls.append(stream)
+        return iter(
+            [
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Paid "))]),
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None))]),
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="monthly."))]),
+                SimpleNamespace(choices=[]),
+            ]
+        )
+
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.client",
+        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create))),
+    )
+
+    events = list(stream_qa_pipeline_for_documents("When is premium due?", ["doc-2"]))
+
+    assert [event for event, _ in events] == ["metadata", "token", "token", "done"]
+    assert "answer" not in events[0][1]
+    assert events[0][1]["citations"][0]["chunk_id"] == "doc-2:0:abc"
+    assert events[-1][1]["answer"] == "Paid monthly."
+    assert calls == [True]
+
+    # The blocking pipeline is served from the cache the stream filled.
+    assert run_qa_pipeline_with_metadata("When is premium due?", "doc-2") == events[-1][1]
+    replay = list(stream_qa_pipeline_for_documents("When is premium due?", ["doc-2"]))
+    assert replay[1:] == [("token", {"text": "Paid monthly."}), ("done", events[-1][1])]
+    assert calls == [True]
+
+    list(stream_qa_pipeline_for_documents("When is premium due?", ["doc-2"], thread_id="t-1", user_id="u-1"))
+    assert fake_cache.store["qa:thread:u-1:t-1"] == [{"question": "When is premium due?", "answer": "Paid monthly."}]
+
+
+@pytest.mark.asyncio
+async def test_async_pipeline_queries_documents_concurrently(monkeypatch):
+    fake_cache = _FakeCache()
+    for module in ("qa_pipeline", "retriever_service"):
+        monkeypatch.setattr(f"services.qa_service.{module}.get_cache_service", lambda: fake_cache)
+
+    async def _generations(document_ids):
+        return {document_id: 0 for document_id in document_ids}
+
+    for module in ("qa_pipeline", "retriever_service"):
+        monkeypatch.setattr(f"services.qa_service.{module}.aget_index_generations", _generations)
+    monkeypatch.setattr("services.qa_service.qa_pipeline._embed_question", lambda question: None)
+
+    # Each document's query waits for the other, so this only passes if they run at the same time.
+    both_querying = threading.Barrier(2, timeout=5)
+    queried = []
+
+    def _fake_query(query_embeddings, where, n_results):
+        queried.append(where["document_id"])
+        both_querying.wait()
+        document_id = where["document_id"]
+        return {
+            "ids": [[f"{document_id}:0:h"] for _ in query_embeddings],
+            "documents": [[f"{document_id} premium is due monthly."] for _ in query_embeddings],
+            "metadatas": [[{"document_id": document_id, "chunk_index": 0}] for _ in query_embeddings],
+            "distances": [[0.2] for _ in query_embeddings],
+        }
+
+    monkeypatch.setitem(
+        sys.modules,
+        "services.extraction_service.vector_service",
+        SimpleNamespace(
+            embeddings=SimpleNamespace(embed_documents=lambda texts: [[0.1] for _ in texts]),
+            collection=SimpleNamespace(query=_fake_query),
+        ),
+    )
+    calls = {"count": 0}
+
+    async def _create(model, messages):
+        calls["count"] += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Monthly."))])
+
+    monkeypatch.setattr(
+        "services.qa_service.qa_pipeline.async_client",
+        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create))),
+    )
+
+    first = await arun_qa_pipeline_with_metadata_for_documents("When is premium due?", ["doc-a", "doc-b"])
+    again = await arun_qa_pipeline_with_metadata_for_documents("When is premium due?", ["doc-a", "doc-b"])
+    await arun_qa_pipeline_with_metadata_for_documents(
+        "When is premium due?", ["doc-a", "doc-b"], thread_id="t-1", user_id="u-1"
+    )
+
+    assert sorted(queried) == ["doc-a", "doc-b"]
+    assert first["answer"] == "Monthly."
+    assert {citation["document_id"] for citation in first["citations"]} == {"doc-a", "doc-b"}
+    assert again == first
+    assert calls["count"] == 2
+    assert fake_cache.store["qa:thread:u-1:t-1"] == [{"question": "When is premium due?", "answer": "Monthly."}]
+
+
+def test_concurrent_identical_batch_retrievals_share_one_fetch(monkeypatch):
+    fake_cache = _FakeCache()
+    monkeypatch.setattr("services.qa_service.retriever_service.get_cache_service", lambda: fake_cache)
+    monkeypatch.setattr(
+        "services.qa_service.retriever_service.get_index_generations",
+        lambda document_ids: {document_id: 0 for document_id in document_ids},
+    )
+    monkeypatch.setattr(
+        "shared.cache.single_flight.get_cache_service",
+        lambda: SimpleNamespace(acquire_lock=lambda key, ttl_seconds: "token", release_lock=lambda key, token: None),
+    )
+    release = threading.Event()
+    calls = {"embed": 0}
+
+    def _fake_embed_documents(texts):
+        calls["embed"] += 1
+        release.wait(timeout=5)
+        return [[0.1] for _ in texts]
+
+    def _fake_query(query_embeddings, where, n_results):
+        return {
+            "ids": [[f"{where['document_id']}:0:h"] for _ in query_embeddings],
+            "documents": [["chunk"] for _ in query_embeddings],
+            "metadatas": [[{"document_id": where["document_id"]}] for _ in query_embeddings],
+            "distances": [[0.1] for _ in query_embeddings],
+        }
+
+    monkeypatch.setitem(
+        sys.modules,
+        "services.extraction_service.vector_service",
+        SimpleNamespace(
+            embeddings=SimpleNamespace(embed_documents=_fake_embed_documents),
+            collection=SimpleNamespace(query=_fake_query),
+        ),
+    )
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(retrieve_evidence_batch(["q1", "q2"], ["doc-a", "doc-b"], top_k=2)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert calls["embed"] == 1
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+    assert set(results[0]) == {("q1", "doc-a"), ("q1", "doc-b"), ("q2", "doc-a"), ("q2", "doc-b")}
+
+
+def test_cache_stats_are_logged_at_most_once_per_interval(monkeypatch, capsys):
+    import time
+
+    from services.qa_service import qa_pipeline
+
+    monkeypatch.setattr(qa_pipeline.settings, "QA_STATS_LOG_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(qa_pipeline, "_stats_logged_at", time.monotonic() - 61)
+    monkeypatch.setattr(qa_pipeline, "qa_cache_stats", lambda: {"semantic_cache": {"hits": 2}})
+
+    qa_pipeline._maybe_log_cache_stats()
+    qa_pipeline._maybe_log_cache_stats()
+
+    assert capsys.readouterr().out == 'QA cache stats: {"semantic_cache": {"hits": 2}}\n'
+
+
+def test_cache_stats_include_the_embedding_cache(monkeypatch):
+    from services.qa_service import qa_pipeline
+
+    fake_embeddings = SimpleNamespace(stats=lambda: {"local_hits": 3, "redis_hits": 0, "misses": 1, "hit_rate": 0.75})
+    monkeypatch.setitem(
+        sys.modules,
+        "services.extraction_service.vector_service",
+        SimpleNamespace(embeddings=fake_embeddings),
+    )
+
+    assert qa_pipeline.qa_cache_stats()["embedding_cache"]["hit_rate"] == 0.75
@@ -40,12 +40,19 @@ def _override_get_db_other_owner():
     yield _FakeDB(SimpleNamespace(id="doc", user_id="other-user-id"))
 
 
+def _fake_pipeline(result):
+    async def _run(question, document_ids, thread_id=None, user_id=None):
+        return {**result, "document_ids": document_ids, "thread_id": thread_id}
+
+    return _run
+
+
 def test_ask_question_success(monkeypatch):
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_db] = _override_get_db_owned
     monkeypatch.setattr(
-        "gateway.api.v1.qa_routes.run_qa_pipeline",
-        lambda question, document_id: "This is a mocked answer.",
+        "gateway.api.v1.qa_routes.arun_qa_pipeline_with_metadata_for_documents",
+        _fake_pipeline({"answer": "This is a mocked answer.", "confidence": 0.8}),
     )
 
     response = client.post(
@@ -67,8 +74,8 @@ def test_ask_question_no_relevant_info(monkeypatch):
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_db] = _override_get_db_owned
     monkeypatch.setattr(
-        "gateway.api.v1.qa_routes.run_qa_pipeline",
-        lambda question, document_id: "No relevant information found.",
+        "gateway.api.v1.qa_routes.arun_qa_pipeline_with_metadata_for_documents",
+        _fake_pipeline({"answer": "No relevant information found.", "confidence": 0.0}),
     )
 
     response = client.post(
@@ -90,16 +97,18 @@ def test_ask_question_with_reasoning(monkeypatch):
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_db] = _override_get_db_owned
     monkeypatch.setattr(
-        "gateway.api.v1.qa_routes.run_qa_pipeline_with_metadata",
-        lambda question, document_id: {
-            "answer": "Reasoned answer",
-            "query_type": "analysis",
-            "confidence": 0.81,
-            "confidence_band": "high",
-            "missing_information": [],
-            "evidence_count": 3,
-            "citations": [],
-        },
+        "gateway.api.v1.qa_routes.arun_qa_pipeline_with_metadata_for_documents",
+        _fake_pipeline(
+            {
+                "answer": "Reasoned answer",
+                "query_type": "analysis",
+                "confidence": 0.81,
+                "confidence_band": "high",
+                "missing_information": [],
+                "evidence_count": 3,
+                "citations": [],
+            }
+        ),
     )
 
     response = client.post(
@@ -144,18 +153,18 @@ def test_ask_question_multi_document_reasoning(monkeypatch):
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_db] = _override_get_db_owned
     monkeypatch.setattr(
-        "gateway.api.v1.qa_routes.run_qa_pipeline_with_metadata_for_documents",
-        lambda question, document_ids, thread_id=None, user_id=None: {
-            "answer": "Comparison answer",
-            "query_type": "comparison",
-            "confidence": 0.76,
-            "confidence_band": "high",
-            "missing_information": [],
-            "evidence_count": 4,
-            "document_ids": document_ids,
-            "citations": [],
-            "thread_id": thread_id,
-        },
+        "gateway.api.v1.qa_routes.arun_qa_pipeline_with_metadata_for_documents",
+        _fake_pipeline(
+            {
+                "answer": "Comparison answer",
+                "query_type": "comparison",
+                "confidence": 0.76,
+                "confidence_band": "high",
+                "missing_information": [],
+                "evidence_count": 4,
+                "citations": [],
+            }
+        ),
     )
 
     response = client.post(
@@ -180,3 +189,52 @@ def test_ask_question_multi_document_reasoning(monkeypatch):
         assert len(payload["document_ids"]) == 2
     finally:
         app.dependency_overrides.clear()
+
+
+def test_ask_question_stream_emits_server_sent_events(monkeypatch):
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    app.dependency_overrides[get_db] = _override_get_db_owned
+
+    def _fake_stream(question, document_ids, thread_id=None, user_id=None):
+        yield "metadata", {"confidence": 0.8, "citations": [], "thread_id": thread_id}
+        yield "token", {"text": "Paid "}
+        yield "token", {"text": "monthly."}
+        yield "done", {"answer": "Paid monthly.", "confidence": 0.8, "citations": [], "thread_id": thread_id}
+        raise RuntimeError("not reached")
+
+    monkeypatch.setattr("gateway.api.v1.qa_routes.stream_qa_pipeline_for_documents", _fake_stream)
+
+    response = client.post(
+        "/api/v1/qa/ask/stream",
+        json={"question": "When is premium due?", "document_id": "4af7a36f-a262-43e8-bc78-376cbe94383e"},
+    )
+
+    try:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+        assert [event for event, _ in events] == [
+            "event: metadata",
+            "event: token",
+            "event: token",
+            "event: done",
+            "event: error",
+        ]
+        assert events[1][1] == 'data: {"text": "Paid "}'
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_ask_question_stream_checks_access_before_streaming():
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    app.dependency_overrides[get_db] = _override_get_db_other_owner
+
+    response = client.post(
+        "/api/v1/qa/ask/stream",
+        json={"question": "When is premium due?", "document_id": "4af7a36f-a262-43e8-bc78-376cbe94383e"},
+    )
+
+    try:
+        assert response.status_code == 403
+    finally:
+        app.dependency_overrides.clear()
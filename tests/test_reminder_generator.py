@@ -13,8 +13,8 @@ def test_generate_reminders_creates_default_offsets(monkeypatch):
     created = []
 
     monkeypatch.setattr(
-        "services.obligation_service.reminder_generator.ReminderRepository.create",
-        lambda db, reminder: created.append(reminder),
+        "services.obligation_service.reminder_generator.ReminderRepository.create_many",
+        lambda db, reminders, commit=True: created.extend(reminders),
     )
 
     ReminderGenerator.generate(db=object(), obligation=obligation)
@@ -32,10 +32,32 @@ def test_generate_reminders_skips_when_no_due_date(monkeypatch):
     created = []
 
     monkeypatch.setattr(
-        "services.obligation_service.reminder_generator.ReminderRepository.create",
-        lambda db, reminder: created.append(reminder),
+        "services.obligation_service.reminder_generator.ReminderRepository.create_many",
+        lambda db, reminders, commit=True: created.extend(reminders),
     )
 
     ReminderGenerator.generate(db=object(), obligation=obligation)
 
     assert created == []
+
+
+def test_generate_many_persists_all_reminders_in_one_call(monkeypatch):
+    obligations = [
+        SimpleNamespace(id=uuid.uuid4(), due_date=datetime(2026, 3, 10)),
+        SimpleNamespace(id=uuid.uuid4(), due_date=None),
+        SimpleNamespace(id=uuid.uuid4(), due_date=datetime(2026, 6, 1)),
+    ]
+    calls = []
+
+    monkeypatch.setattr(
+        "services.obligation_service.reminder_generator.ReminderRepository.create_many",
+        lambda db, reminders, commit=True: calls.append((list(reminders), commit)),
+    )
+
+    ReminderGenerator.generate_many(db=object(), obligations=obligations, commit=False)
+
+    assert len(calls) == 1
+    reminders, commit = calls[0]
+    assert commit is False
+    assert len(reminders) == 6
+    assert {r.obligation_id for r in reminders} == {obligations[0].id, obligations[2].id}
@@ -13,3 +13,30 @@ def test_detect_risks_finds_common_clauses():
     assert len(findings) >= 3
     severities = {item["severity"] for item in findings}
     assert "HIGH" in severities or "MEDIUM" in severities
+
+
+def test_compiled_rules_report_every_rule_matching_a_sentence():
+    from services.risk_service.risk_detector import CompiledRiskRules
+
+    rules = CompiledRiskRules(
+        [
+            {"name": "fee", "severity": "LOW", "confidence": 0.5, "patterns": [r"\btermination"], "description": "a"},
+            {"name": "exit", "severity": "LOW", "confidence": 0.5, "patterns": [r"\btermination fee"], "description": "b"},
+            {"name": "other", "severity": "LOW", "confidence": 0.5, "patterns": [r"\bnever seen"], "description": "c"},
+        ]
+    )
+
+    matched = rules.matching_rules("A TERMINATION FEE applies.")
+
+    assert [rule["name"] for rule in matched] == ["fee", "exit"]
+    assert rules.matching_rules("Nothing relevant here.") == []
+
+
+def test_compiled_rules_evaluate_unanchored_patterns_everywhere():
+    from services.risk_service.risk_detector import CompiledRiskRules
+
+    rules = CompiledRiskRules(
+        [{"name": "any", "severity": "LOW", "confidence": 0.5, "patterns": [r"(?:late|overdue) charge"], "description": "d"}]
+    )
+
+    assert [rule["name"] for rule in rules.matching_rules("An overdue charge applies.")] == ["any"]
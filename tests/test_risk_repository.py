@@ -8,10 +8,15 @@ class FakeDBSession:
         self.added = []
         self.committed = False
         self.refreshed = []
+        self.batches = 0
 
     def add(self, obj):
         self.added.append(obj)
 
+    def add_all(self, objs):
+        self.added.extend(objs)
+        self.batches += 1
+
     def commit(self):
         self.committed = True
 
@@ -34,3 +39,19 @@ def test_create_risk():
     assert db_session.added == [risk]
     assert db_session.committed is True
     assert db_session.refreshed == [risk]
+
+
+def test_create_many_risks_uses_one_transaction():
+    db_session = FakeDBSession()
+    risks = [
+        Risk(id=uuid.uuid4(), document_id=uuid.uuid4(), description=f"Risk {idx}", severity="LOW")
+        for idx in range(40)
+    ]
+
+    created = RiskRepository.create_many(db_session, risks)
+
+    assert created == risks
+    assert db_session.added == risks
+    assert db_session.batches == 1
+    assert db_session.committed is True
+    assert db_session.refreshed == []
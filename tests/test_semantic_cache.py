@@ -0,0 +1,66 @@
+from services.qa_service.semantic_cache import SemanticResponseCache
+
+
+def test_close_questions_hit_and_distant_ones_miss():
+    cache = SemanticResponseCache(threshold=0.9, max_scopes=4, max_entries_per_scope=4)
+    cache.add("v3:docs-a", [1.0, 0.0, 0.0], "qa:response:v3:docs-a:q1")
+
+    assert cache.lookup("v3:docs-a", [0.98, 0.1, 0.0])[0] == "qa:response:v3:docs-a:q1"
+    assert cache.lookup("v3:docs-a", [0.5, 0.8, 0.0]) is None
+    assert cache.lookup("v3:docs-b", [1.0, 0.0, 0.0]) is None
+
+    stats = cache.stats()
+    assert stats["lookups"] == 3
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.3333
+    assert 0.99 < stats["hit_similarity"]["min"] <= stats["hit_similarity"]["max"] <= 1.0
+
+
+def test_least_recently_used_question_is_evicted_from_a_full_scope():
+    cache = SemanticResponseCache(threshold=0.99, max_scopes=4, max_entries_per_scope=2)
+    cache.add("scope", [1.0, 0.0, 0.0], "q1")
+    cache.add("scope", [0.0, 1.0, 0.0], "q2")
+    assert cache.lookup("scope", [1.0, 0.0, 0.0])[0] == "q1"
+
+    cache.add("scope", [0.0, 0.0, 1.0], "q3")
+
+    assert cache.lookup("scope", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("scope", [1.0, 0.0, 0.0])[0] == "q1"
+    assert cache.lookup("scope", [0.0, 0.0, 1.0])[0] == "q3"
+    assert cache.stats()["entries"] == 2
+
+
+def test_scopes_are_evicted_least_recently_used_first():
+    cache = SemanticResponseCache(threshold=0.99, max_scopes=2, max_entries_per_scope=4)
+    cache.add("a", [1.0, 0.0], "qa")
+    cache.add("b", [1.0, 0.0], "qb")
+    cache.lookup("a", [1.0, 0.0])
+
+    cache.add("c", [1.0, 0.0], "qc")
+
+    assert cache.lookup("b", [1.0, 0.0]) is None
+    assert cache.lookup("a", [1.0, 0.0])[0] == "qa"
+    assert cache.stats()["scopes"] == 2
+
+
+def test_index_grows_and_discard_keeps_rows_contiguous():
+    cache = SemanticResponseCache(threshold=0.99, max_scopes=1, max_entries_per_scope=32)
+    basis = [[1.0 if idx == row else 0.0 for idx in range(12)] for row in range(12)]
+    for row, vector in enumerate(basis):
+        cache.add("scope", vector, f"q{row}")
+
+    cache.discard("scope", "q3")
+
+    assert cache.lookup("scope", basis[3]) is None
+    assert cache.lookup("scope", basis[11])[0] == "q11"
+    assert cache.stats()["entries"] == 11
+
+
+def test_zero_or_mismatched_vectors_are_ignored():
+    cache = SemanticResponseCache(threshold=0.9, max_scopes=1, max_entries_per_scope=4)
+    cache.add("scope", [0.0, 0.0], "q0")
+    cache.add("scope", [1.0, 0.0], "q1")
+
+    assert cache.lookup("scope", [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("scope", [0.0, 0.0]) is None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,32 @@
+from services.extraction_service.sentence_index import SentenceIndex, tokenize
+
+
+def test_sentence_index_tracks_offsets_pages_and_tokens():
+    index = SentenceIndex.from_segments(
+        [
+            (1, "  Premium is 2.5 percent. Renewal is due!\n\n"),
+            (2, "The tenant shall pay rent"),
+        ]
+    )
+
+    assert list(index.sentences()) == ["Premium is 2.5 percent.", "Renewal is due!", "The tenant shall pay rent"]
+    assert [index.page(idx) for idx in range(len(index))] == [1, 1, 2]
+    start, end = index.span(2)
+    assert index.text[start:end] == "The tenant shall pay rent"
+    assert index.token_set(1) == frozenset({"renewal", "is", "due"})
+    assert index.locate(start + 4) == 2
+    assert index.locate(0) is None
+
+
+def test_sentence_index_round_trips_through_dump(tmp_path):
+    index = SentenceIndex.from_text("Fees are due on 1 May 2026.\nNo penalty applies.")
+    path = str(tmp_path / "sentences.idx")
+
+    index.dump(path)
+    loaded = SentenceIndex.load(path)
+
+    assert loaded.text == index.text
+    assert list(loaded.sentences()) == list(index.sentences())
+    assert loaded.token_set(1) == tokenize("No penalty applies.")
+    loaded.add_page(2, "Auto-renew applies.")
+    assert loaded.sentence(2) == "Auto-renew applies."
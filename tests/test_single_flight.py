@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.cache import single_flight
+from shared.cache.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class _FakeLockCache:
+    def __init__(self, free_after_attempts=0):
+        self.attempts = 0
+        self.free_after_attempts = free_after_attempts
+        self.released = []
+
+    def acquire_lock(self, key, ttl_seconds):
+        self.attempts += 1
+        return "token" if self.attempts > self.free_after_attempts else None
+
+    def release_lock(self, key, token):
+        self.released.append((key, token))
+
+    async def aacquire_lock(self, key, ttl_seconds):
+        return self.acquire_lock(key, ttl_seconds)
+
+    async def arelease_lock(self, key, token):
+        self.release_lock(key, token)
+
+
+@pytest.fixture
+def lock_cache(monkeypatch):
+    cache = _FakeLockCache()
+    monkeypatch.setattr(single_flight, "get_cache_service", lambda: cache)
+    monkeypatch.setattr(single_flight, "_POLL_SECONDS", 0)
+    return cache
+
+
+def test_concurrent_callers_share_one_computation(lock_cache):
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"answer": "ok"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("qa:response:k", _compute, lambda: None)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [{"answer": "ok"}] * 5
+    assert flight.stats() == {"leaders": 1, "coalesced_local": 4, "coalesced_remote": 0, "wait_timeouts": 0}
+    assert lock_cache.released == [("lock:qa:response:k", "token")]
+
+
+def test_waits_for_another_process_to_fill_the_cache(monkeypatch):
+    cache = _FakeLockCache(free_after_attempts=100)
+    monkeypatch.setattr(single_flight, "get_cache_service", lambda: cache)
+    monkeypatch.setattr(single_flight, "_POLL_SECONDS", 0)
+    polls = iter([None, None, ["chunk"]])
+
+    result = SingleFlight().do("qa:retrieval:k", lambda: pytest.fail("computed twice"), lambda: next(polls))
+
+    assert result == ["chunk"]
+
+
+def test_takes_over_when_the_other_process_gives_up(monkeypatch):
+    cache = _FakeLockCache(free_after_attempts=2)
+    monkeypatch.setattr(single_flight, "get_cache_service", lambda: cache)
+    monkeypatch.setattr(single_flight, "_POLL_SECONDS", 0)
+    flight = SingleFlight()
+
+    assert flight.do("qa:retrieval:k", lambda: ["fresh"], lambda: None) == ["fresh"]
+    assert flight.stats()["leaders"] == 1
+    assert cache.attempts == 3
+
+
+def test_leader_errors_reach_waiting_callers(lock_cache):
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def _compute():
+        release.wait(timeout=5)
+        raise RuntimeError("llm unavailable")
+
+    errors = []
+
+    def _call():
+        try:
+            flight.do("qa:response:k", _compute, lambda: None)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=_call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == ["llm unavailable"] * 3
+    assert flight._inflight == {}
+
+
+async def _nothing_cached():
+    return None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_coroutines_share_one_computation(lock_cache):
+    flight = AsyncSingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def _compute():
+        calls.append(1)
+        await release.wait()
+        return {"answer": "ok"}
+
+    callers = [asyncio.create_task(flight.do("qa:response:k", _compute, _nothing_cached)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert len(calls) == 1
+    assert results == [{"answer": "ok"}] * 5
+    assert flight.stats() == {"leaders": 1, "coalesced_local": 4, "coalesced_remote": 0, "wait_timeouts": 0}
+    assert lock_cache.released == [("lock:qa:response:k", "token")]
+
+
+@pytest.mark.asyncio
+async def test_waiters_compute_themselves_when_the_leader_is_cancelled(lock_cache):
+    flight = AsyncSingleFlight()
+    started = asyncio.Event()
+
+    async def _slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def _fast():
+        return ["fresh"]
+
+    leader = asyncio.create_task(flight.do("qa:retrieval:k", _slow, _nothing_cached))
+    await started.wait()
+    waiter = asyncio.create_task(flight.do("qa:retrieval:k", _fast, _nothing_cached))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == ["fresh"]
+    assert flight._inflight == {}
@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain.text_splitter")
+
+import services.extraction_service.vector_service as vector_service
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows = {}
+        self.deleted = []
+
+    def get(self, where=None, ids=None, include=None, limit=None, offset=0):
+        if ids is not None:
+            selected = [chunk_id for chunk_id in ids if chunk_id in self.rows]
+        elif where is not None:
+            selected = [
+                chunk_id for chunk_id, row in self.rows.items()
+                if row["metadata"]["document_id"] == where["document_id"]
+            ]
+        else:
+            selected = list(self.rows)[offset:offset + limit if limit else None]
+        return {
+            "ids": selected,
+            "embeddings": [self.rows[chunk_id]["embedding"] for chunk_id in selected],
+            "documents": [self.rows[chunk_id]["document"] for chunk_id in selected],
+            "metadatas": [self.rows[chunk_id]["metadata"] for chunk_id in selected],
+        }
+
+    def update(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.rows[chunk_id]["metadata"] = metadata
+
+    def add(self, documents, embeddings, ids, metadatas):
+        for document, embedding, chunk_id, metadata in zip(documents, embeddings, ids, metadatas):
+            self.rows[chunk_id] = {"document": document, "embedding": embedding, "metadata": metadata}
+
+    def delete(self, ids=None, where=None):
+        self.deleted.extend(ids or [])
+        for chunk_id in ids or []:
+            self.rows.pop(chunk_id, None)
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+
+def test_reingestion_only_embeds_changed_chunks(monkeypatch):
+    collection = _FakeCollection()
+    fake_embeddings = _FakeEmbeddings()
+    monkeypatch.setattr(vector_service, "collection", collection)
+    monkeypatch.setattr(vector_service, "embeddings", fake_embeddings)
+
+    chunk_sets = iter([["alpha", "beta", "gamma"], ["alpha", "delta", "beta", "gamma"]])
+    monkeypatch.setattr(vector_service, "chunk_text", lambda _text: next(chunk_sets))
+
+    vector_service.store_document_chunks("doc-1", "v1")
+    vector_service.store_document_chunks("doc-1", "v2")
+
+    assert fake_embeddings.embedded == ["alpha", "beta", "gamma", "delta"]
+    assert sorted(row["document"] for row in collection.rows.values()) == ["alpha", "beta", "delta", "gamma"]
+    assert sorted(chunk_id.split(":")[1] for chunk_id in collection.rows) == ["0", "1", "2", "3"]
+    assert len(collection.deleted) == 2
+
+
+def test_reredaction_job_upgrades_stale_chunks(monkeypatch):
+    monkeypatch.setattr(vector_service.settings, "PII_REDACTION_ENABLED", True)
+    collection = _FakeCollection()
+    fake_embeddings = _FakeEmbeddings()
+    monkeypatch.setattr(vector_service, "collection", collection)
+    monkeypatch.setattr(vector_service, "embeddings", fake_embeddings)
+
+    chunk_sets = iter([["Premium is due monthly", "Mail jane@example.com"], ["Renewal is automatic"]])
+    monkeypatch.setattr(vector_service, "chunk_text", lambda _text: next(chunk_sets))
+    vector_service.store_document_chunks("doc-1", "legacy")
+    vector_service.store_document_chunks("doc-2", "current", redaction_version=vector_service.REDACTION_VERSION)
+    fake_embeddings.embedded.clear()
+
+    stats = vector_service.reredact_stale_chunks(batch_size=1)
+
+    assert stats == {"scanned": 2, "stale": 2, "rewritten": 1, "relabelled": 1, "rewritten_documents": ["doc-1"]}
+    assert fake_embeddings.embedded == ["Mail [PII_EMAIL_1]"]
+    assert sorted(row["document"] for row in collection.rows.values()) == [
+        "Mail [PII_EMAIL_1]",
+        "Premium is due monthly",
+        "Renewal is automatic",
+    ]
+    assert all(
+        row["metadata"]["redaction_version"] == vector_service.REDACTION_VERSION
+        for row in collection.rows.values()
+    )
+    assert sorted(chunk_id.split(":")[1] for chunk_id in collection.rows if chunk_id.startswith("doc-1")) == ["0", "1"]
@@ -9,6 +9,7 @@ celery_app = Celery(
     include=[
         "workers.tasks.ingestion_tasks",
         "workers.tasks.extraction_tasks",
+        "workers.tasks.redaction_tasks",
         "workers.tasks.reminder_dispatcher",
         "workers.tasks.reminder_processor",
     ],
@@ -19,8 +20,15 @@ celery_app.conf.task_acks_late = True
 celery_app.conf.broker_connection_retry_on_startup = True
 
 celery_app.conf.task_routes = {
+    # Parsing/OCR and redaction are CPU-bound; embedding and obligation validation
+    # wait on the OpenAI API. Separate queues let each worker pool be scaled independently.
+    "workers.tasks.ingestion_tasks.parse_document_task": {"queue": "ingestion_cpu"},
+    "workers.tasks.ingestion_tasks.redact_document_task": {"queue": "ingestion_cpu"},
+    "workers.tasks.ingestion_tasks.embed_document_task": {"queue": "ingestion_io"},
+    "workers.tasks.ingestion_tasks.detect_obligations_task": {"queue": "ingestion_io"},
     "workers.tasks.ingestion_tasks.*": {"queue": "ingestion"},
     "workers.tasks.extraction_tasks.*": {"queue": "extraction"},
+    "workers.tasks.redaction_tasks.*": {"queue": "ingestion_cpu"},
     "workers.tasks.reminder_dispatcher.*": {"queue": "reminders"},
     "workers.tasks.reminder_processor.*": {"queue": "reminders"},
 }
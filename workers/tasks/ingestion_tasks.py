@@ -1,7 +1,66 @@
+from celery import chain, chord, group
+
 from workers.celery_app import celery_app
-from services.ingestion_service.ingestion_pipeline import run_ingestion_pipeline
+from services.ingestion_service.ingestion_stages import (
+    run_analyze_stage,
+    run_embed_stage,
+    run_finalize_stage,
+    run_obligation_stage,
+    run_parse_stage,
+    run_redact_stage,
+)
+
+
+# Each stage retries on its own, so a transient embedding error does not
+# re-download or re-parse the file. Stages hand over the document id only;
+# intermediate text lives in storage artifacts.
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def parse_document_task(self, document_id: str):
+    return run_parse_stage(document_id)
+
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def redact_document_task(self, document_id: str):
+    return run_redact_stage(document_id)
+
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def embed_document_task(self, document_id: str):
+    return run_embed_stage(document_id)
+
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def analyze_document_task(self, document_id: str):
+    return run_analyze_stage(document_id)
+
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def detect_obligations_task(self, document_id: str):
+    return run_obligation_stage(document_id)
+
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
+def finalize_document_task(self, _stage_results, document_id: str):
+    return run_finalize_stage(document_id)
+
+
+def build_ingestion_chain(document_id: str):
+    # Embedding, risk detection and obligation detection only need the redacted
+    # text, so they run side by side; the document is finalized once all finish.
+    return chain(
+        parse_document_task.s(document_id),
+        redact_document_task.s(),
+        chord(
+            group(
+                embed_document_task.s(),
+                analyze_document_task.s(),
+                detect_obligations_task.s(),
+            ),
+            finalize_document_task.s(document_id),
+        ),
+    )
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5) 
-def ingest_document_task(self, document_id: str):
-    run_ingestion_pipeline(document_id)
+@celery_app.task
+def ingest_document_task(document_id: str):
+    build_ingestion_chain(document_id).apply_async()
@@ -0,0 +1,22 @@
+try:
+    from workers.celery_app import celery_app
+except ModuleNotFoundError:
+    celery_app = None
+
+
+def _run_reredaction(batch_size: int) -> dict:
+    from services.extraction_service.index_generation import bump_index_generations
+    from services.extraction_service.vector_service import reredact_stale_chunks
+
+    stats = reredact_stale_chunks(batch_size=batch_size)
+    bump_index_generations(stats["rewritten_documents"])
+    return stats
+
+
+if celery_app is not None:
+    @celery_app.task
+    def reredact_stale_chunks_task(batch_size: int = 256) -> dict:
+        return _run_reredaction(batch_size)
+else:
+    def reredact_stale_chunks_task(batch_size: int = 256) -> dict:
+        return _run_reredaction(batch_size)